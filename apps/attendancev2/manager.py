@@ -2,6 +2,12 @@ import pymongo
 import datetime
 from csc_app.settings import mongo_uri
 from apps.staffs.models import Staff
+from .signals import lab_attendance_changed, theory_attendance_changed
+
+# databases whose theory_collection indexes were already ensured by this process
+_indexed_databases = set()
+_lab_indexed_databases = set()
+
 
 class AttendanceManager:
     def __init__(self,mongodb_database):
@@ -13,6 +19,20 @@ class AttendanceManager:
         self.lab_collection = self.db['lab_collection']
         self.theory_collection = self.db['theory_collection']
 
+    def ensure_theory_indexes(self):
+        if self.db_name not in _indexed_databases:
+            # date first so one day's lookup for many batches is a single index range
+            self.theory_collection.create_index([("date", pymongo.ASCENDING), ("batch_id", pymongo.ASCENDING)])
+            # batch first for one student's history across all their batches
+            self.theory_collection.create_index([("batch_id", pymongo.ASCENDING), ("date", pymongo.ASCENDING)])
+            _indexed_databases.add(self.db_name)
+
+    def ensure_lab_indexes(self):
+        if self.db_name not in _lab_indexed_databases:
+            # students are keys under data, a wildcard index serves data.<enrol_no> lookups
+            self.lab_collection.create_index([("data.$**", pymongo.ASCENDING)])
+            _lab_indexed_databases.add(self.db_name)
+
     def put_lab_collection(self,lab_no,system_no,student_id,start,stop,date):
         doc = self.lab_collection.find_one({"date":date,"system_no":system_no,"lab_no":lab_no})
 
@@ -43,6 +63,7 @@ class AttendanceManager:
             {"$set": {f"data.{student_id}": usage_data}})
 
             print("came here")
+        lab_attendance_changed.send(sender=self.__class__, student_id=student_id, date=date)
 
 
     def delete_lab_data(self, lab_no, system_no, student_id, date):
@@ -60,6 +81,7 @@ class AttendanceManager:
                 print("No matching documents found for deletion")
         except Exception as e:
             print("An error occurred:", e)
+        lab_attendance_changed.send(sender=self.__class__, student_id=student_id, date=date)
 
 
     def get_lab_data(self,lab_no,system_no,date):
@@ -83,6 +105,9 @@ class AttendanceManager:
                 "students": students
             }
             self.theory_collection.insert_one(document)
+            theory_attendance_changed.send(
+                sender=self.__class__, batch_id=batch_id, date=date, student_ids=list(students)
+            )
 
     def add_theory_attendance(self, batch_id, student_id, date, status, content, entry_time, exit_time):
         result = self.theory_collection.update_one(
@@ -98,6 +123,9 @@ class AttendanceManager:
         )
         if result.modified_count > 0:
                 print("modified")
+                theory_attendance_changed.send(
+                    sender=self.__class__, batch_id=batch_id, date=date, student_ids=[student_id]
+                )
         else:
             print("No matching documents found for for modification")
 
@@ -106,11 +134,23 @@ class AttendanceManager:
             {"batch_id": batch_id, "date": date},
             {"$unset": {f"students.{student_id}": ""}}
         )
+        theory_attendance_changed.send(
+            sender=self.__class__, batch_id=batch_id, date=date, student_ids=[student_id]
+        )
 
     def get_theory_data(self,batch,date):
         doc = self.theory_collection.find_one({"batch_id":batch,"date":date})
         return doc
 
+    def get_batches_with_theory(self, batch_ids, date):
+        """Ids of the given batches that have a theory record on date, in one query"""
+        self.ensure_theory_indexes()
+        docs = self.theory_collection.find(
+            {"date": date, "batch_id": {"$in": list(batch_ids)}},
+            {"batch_id": 1, "_id": 0},
+        )
+        return {doc["batch_id"] for doc in docs}
+
 
     def get_student_lab_data(self, student_id, week=None):
         if week is None:
@@ -188,18 +228,15 @@ class AttendanceManager:
     
     """here the student id is students enroll number it suits for all documents wedont use model id in documents"""
     def get_public_student_lab_data(self, student_id):
-
-
-        # Define the pipeline
-        pipeline = [
-            {"$match": {"data." + str(student_id): {"$exists": True}}},
-            {"$sort":{"date":1}}
-        ]
-
-        # Aggregate using pipeline
-        week_documents = list(self.lab_collection.aggregate(pipeline))
+        self.ensure_lab_indexes()
+        key = f"data.{student_id}"
+        # only this student's slot of each system document
+        docs = self.lab_collection.find(
+            {key: {"$exists": True}},
+            {"_id": 0, "date": 1, "lab_no": 1, "system_no": 1, key: 1},
+        ).sort("date", pymongo.ASCENDING)
         formatted_data = []
-        for doc in week_documents:
+        for doc in docs:
             formatted_doc = {
                 "date": doc["date"],
                 "lab_no": doc["lab_no"],
@@ -208,8 +245,38 @@ class AttendanceManager:
                 "end_time": doc["data"][str(student_id)]["stop"]
             }
             formatted_data.append(formatted_doc)
-        #print(formatted_data)
         return formatted_data
+
+    def get_public_theory_data(self, student_id, batch_ids):
+        """
+        One student's theory attendance in all the given batches, in one query.
+
+        Only the student's own status is projected out of each roster, so the
+        documents stay small however big the batch is.
+        """
+        self.ensure_theory_indexes()
+        pipeline = [
+            {"$match": {"batch_id": {"$in": list(batch_ids)}}},
+            {"$sort": {"batch_id": 1, "date": 1}},
+            {"$project": {
+                "_id": 0,
+                "batch_id": 1,
+                "date": 1,
+                "content": 1,
+                "entry_time": 1,
+                "exit_time": 1,
+                "student_status": {"$ifNull": [f"$students.{student_id}", "not found"]},
+            }},
+        ]
+        result = {batch_id: [] for batch_id in batch_ids}
+        for doc in self.theory_collection.aggregate(pipeline):
+            result[doc["batch_id"]].append({
+                "date": doc["date"],
+                "content": doc["content"],
+                "time_string": f"{doc['entry_time']} - {doc['exit_time']}",
+                "student_status": doc["student_status"],
+            })
+        return result
     
     def get_all_theory_data(self,batch_id):
         documents = self.theory_collection.find({"batch_id": batch_id})
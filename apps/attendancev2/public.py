@@ -0,0 +1,78 @@
+import hashlib
+import uuid
+
+from django.core.cache import cache
+
+from apps.batch.models import BatchModel
+from csc_app.settings import db
+
+from .manager import AttendanceManager
+
+VERSION_KEY = "public-attendance:version"
+TIMEOUT = 60 * 60
+
+
+def load_public_attendance(student):
+    """
+    The student's theory attendance per batch and lab usage, in two queries
+    to MongoDB whatever the number of batches.
+
+    Theory rows are keyed "course(batch id)" with the staff username last, as
+    the public attendance page pops it off each list.
+    """
+    batches = list(
+        BatchModel.objects.filter(batch_students__id=student.id)
+        .select_related("batch_course", "batch_staff")
+        .order_by("id")
+    )
+    manager = AttendanceManager(db)
+    theory = manager.get_public_theory_data(student.enrol_no, [batch.id for batch in batches]) if batches else {}
+    data = {}
+    for batch in batches:
+        data[str(batch.batch_course) + "(" + str(batch.batch_id) + ")"] = theory[batch.id] + [batch.batch_staff.username]
+    return data, manager.get_public_student_lab_data(student.enrol_no)
+
+
+def _batches_digest(student):
+    """Changes when the student's batches, their names or their staff do"""
+    rows = BatchModel.objects.filter(batch_students__id=student.id).order_by("id").values_list(
+        "id", "batch_id", "batch_course__name", "batch_staff__username"
+    )
+    return hashlib.md5(repr(list(rows)).encode()).hexdigest()
+
+
+def get_public_attendance(student):
+    """
+    load_public_attendance() through the cache, until the student's attendance
+    is written. The key carries a digest of the student's batches, so joining
+    or leaving a batch or a change of its staff is picked up without a signal.
+    """
+    version = cache.get(VERSION_KEY) or invalidate_all_public_attendance()
+    student_version = cache.get(_student_version_key(student.enrol_no), version=version)
+    if student_version is None:
+        student_version = uuid.uuid4().int
+        cache.set(_student_version_key(student.enrol_no), student_version, None, version=version)
+    key = f"public-attendance:{student.enrol_no}:{student_version}:{_batches_digest(student)}"
+    attendance = cache.get(key, version=version)
+    if attendance is None:
+        attendance = load_public_attendance(student)
+        cache.set(key, attendance, TIMEOUT, version=version)
+    return attendance
+
+
+def invalidate_public_attendance(enrol_nos):
+    """Drop the cached timelines of these students"""
+    version = cache.get(VERSION_KEY)
+    if version is not None:
+        cache.delete_many([_student_version_key(enrol_no) for enrol_no in enrol_nos], version=version)
+
+
+def invalidate_all_public_attendance():
+    """Start a new version so every cached timeline is loaded again"""
+    version = uuid.uuid4().int
+    cache.set(VERSION_KEY, version, None)
+    return version
+
+
+def _student_version_key(enrol_no):
+    return f"public-attendance:{enrol_no}:version"
@@ -0,0 +1,10 @@
+from django.dispatch import Signal
+
+# sent by AttendanceManager whenever a theory attendance document is written,
+# with batch_id, date and the enrolment numbers touched (student_ids) as
+# keyword arguments
+theory_attendance_changed = Signal()
+
+# sent by AttendanceManager when a student's lab usage is written or removed,
+# with student_id (the enrolment number) and date as keyword arguments
+lab_attendance_changed = Signal()
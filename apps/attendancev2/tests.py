@@ -1,3 +1,81 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from apps.batch.models import BatchModel
+from apps.corecode.models import Subject, Time
+from apps.course.models import CourseModel
+from apps.staffs.models import Staff
+from apps.students.models import Student
+
+from .manager import AttendanceManager
+from .public import get_public_attendance
+from .signals import lab_attendance_changed, theory_attendance_changed
+
+THEORY_ROW = {"date": "2024-01-02", "content": "Ledgers", "time_string": "09:00 - 10:00", "student_status": "present"}
+LAB_ROW = {"date": "2024-01-03", "lab_no": 1, "system_no": 4, "start_time": "10:00", "end_time": "11:00"}
+
+
+class PublicAttendanceTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+        Student.objects.bulk_create([
+            Student(student_name="Asha", enrol_no=24010001, rel_name="Ravi", rel_occupation="Farmer", address="", remark="", course=course)
+        ])
+        self.student = Student.objects.get(enrol_no=24010001)
+        staff = Staff.objects.create(name="Trainer", username="trainer", password="secret", address="", pincode=606001)
+        timing = Time.objects.create(time="9-10")
+        self.batches = [
+            BatchModel.objects.create(
+                batch_status="Active", batch_id=batch_id, batch_course=Subject.objects.create(name=name),
+                batch_staff=staff, batch_timing=timing,
+            )
+            for batch_id, name in [("B1", "Tally"), ("B2", "Excel")]
+        ]
+        for batch in self.batches:
+            batch.batch_students.add(self.student)
+
+        theory = mock.patch.object(
+            AttendanceManager, "get_public_theory_data",
+            side_effect=lambda student_id, batch_ids: {batch_id: [dict(THEORY_ROW)] for batch_id in batch_ids},
+        )
+        lab = mock.patch.object(AttendanceManager, "get_public_student_lab_data", return_value=[LAB_ROW])
+        self.theory = theory.start()
+        self.lab = lab.start()
+        self.addCleanup(theory.stop)
+        self.addCleanup(lab.stop)
+
+    def test_one_theory_query_for_all_batches(self):
+        data, lab_data = get_public_attendance(self.student)
+        self.theory.assert_called_once_with(24010001, [batch.id for batch in self.batches])
+        self.assertEqual(data, {
+            "Tally(B1)": [THEORY_ROW, "trainer"],
+            "Excel(B2)": [THEORY_ROW, "trainer"],
+        })
+        self.assertEqual(lab_data, [LAB_ROW])
+
+    def test_cached_until_attendance_written(self):
+        get_public_attendance(self.student)
+        get_public_attendance(self.student)
+        self.assertEqual(self.theory.call_count, 1)
+
+        # another student's attendance leaves this timeline cached
+        theory_attendance_changed.send(sender=AttendanceManager, batch_id=self.batches[0].id, date="2024-01-04", student_ids=[24010002])
+        get_public_attendance(self.student)
+        self.assertEqual(self.theory.call_count, 1)
+
+        theory_attendance_changed.send(sender=AttendanceManager, batch_id=self.batches[0].id, date="2024-01-04", student_ids=["24010001"])
+        get_public_attendance(self.student)
+        self.assertEqual(self.theory.call_count, 2)
+
+        lab_attendance_changed.send(sender=AttendanceManager, student_id=24010001, date="2024-01-04")
+        get_public_attendance(self.student)
+        self.assertEqual(self.lab.call_count, 3)
+
+    def test_batch_changes_are_picked_up(self):
+        get_public_attendance(self.student)
+        self.batches[1].batch_students.remove(self.student)
+        data, _ = get_public_attendance(self.student)
+        self.assertEqual(list(data), ["Tally(B1)"])
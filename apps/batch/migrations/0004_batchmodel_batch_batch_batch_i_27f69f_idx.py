@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("batch", "0003_alter_batchmodel_batch_staff_and_more"),
+        ("corecode", "0007_sequence"),
+        ("staffs", "0004_alter_staff_pincode"),
+        ("students", "0009_studentbulkupload_error_report_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="batchmodel",
+            index=models.Index(
+                fields=["batch_id"], name="batch_batch_batch_i_27f69f_idx"
+            ),
+        ),
+    ]
@@ -38,6 +38,7 @@ class BatchModel(models.Model):
 
     class Meta:
         ordering = ["-batch_start_date"]
+        indexes = [models.Index(fields=["batch_id"])]
 
     def initialize_batch_attendance(self, date, content, entry_time, exit_time):
         manager = AttendanceManager(db)
@@ -71,6 +72,17 @@ class BatchModel(models.Model):
             #print(doc)
             return doc
 
+    @staticmethod
+    def attendance_status(date):
+        """How many active batches have (not) recorded theory attendance on date"""
+        batch_ids = list(BatchModel.objects.filter(batch_status="Active").values_list("id", flat=True))
+        completed = len(AttendanceManager(db).get_batches_with_theory(batch_ids, date)) if batch_ids else 0
+        return {
+            'total': len(batch_ids),
+            'completed': completed,
+            'not_completed': len(batch_ids) - completed,
+        }
+
     def finished_topics(self):
         manager = AttendanceManager(db)
         doc = manager.get_all_theory_data(self.id)
@@ -0,0 +1,37 @@
+from django.db.models import Count
+from django.urls import reverse
+from django.utils.formats import date_format
+
+from apps.corecode.datatables import Column, ServerSideTable
+
+from .models import BatchModel
+
+
+class BatchTable(ServerSideTable):
+    columns = [
+        Column("Batch Id", lambda batch: batch.batch_id, "batch_id", "batch_id__istartswith"),
+        Column("Batch status", lambda batch: batch.batch_status, "batch_status", "batch_status__iexact"),
+        Column("Batch started On", lambda batch: date_format(batch.batch_start_date), "batch_start_date"),
+        Column("Batch course", lambda batch: batch.batch_course.name, "batch_course__name", "batch_course__name__istartswith"),
+        Column("Batch Staff", lambda batch: batch.batch_staff.name, "batch_staff__name", "batch_staff__name__istartswith"),
+        Column("Batch Timing", lambda batch: batch.batch_timing.time, "batch_timing__time"),
+        Column("Total Student", lambda batch: batch.student_count, "student_count"),
+    ]
+    default_order = ["-batch_start_date"]
+
+    def get_queryset(self, request):
+        batches = (
+            BatchModel.objects.select_related("batch_course", "batch_staff", "batch_timing")
+            .only(
+                "batch_id", "batch_status", "batch_start_date",
+                "batch_course__name", "batch_staff__name", "batch_timing__time",
+            )
+            .annotate(student_count=Count("batch_students"))
+        )
+        # staff only see the batches they take
+        if not request.user.is_superuser:
+            batches = batches.filter(batch_staff=request.user.staff_profile)
+        return batches
+
+    def row_attrs(self, batch):
+        return {"data-href": reverse("batch_detail", args=[batch.pk])}
@@ -1,3 +1,60 @@
 from django.test import TestCase
 
-# Create your tests here.
+from apps.corecode.models import Subject, Time, User
+from apps.corecode.sequences import preview_number
+from apps.staffs.models import Staff
+
+from .models import BatchModel
+from .views import BATCH_ID_TEMPLATE
+
+
+class BatchCreateViewTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+        self.staff = Staff.objects.create(name="Trainer", username="trainer", password="secret", address="", pincode=606001)
+        self.subject = Subject.objects.create(name="Tally")
+        self.timing = Time.objects.create(time="9-10")
+
+    def post(self, batch_id, suggested=None):
+        data = {
+            "batch_status": "Active", "batch_id": batch_id, "batch_course": self.subject.pk,
+            "batch_staff": self.staff.pk, "batch_start_date": "2024-01-01", "batch_timing": self.timing.pk,
+        }
+        if suggested:
+            data["suggested_batch_id"] = suggested
+        return self.client.post("/batches/create/", data)
+
+    def preview(self):
+        return preview_number("batch", BATCH_ID_TEMPLATE, per_year=True)
+
+    def test_form_only_previews_the_next_id(self):
+        response = self.client.get("/batches/create/")
+        first = response.context["form"].fields["batch_id"].initial
+        self.assertContains(response, f'name="suggested_batch_id" value="{first}"')
+        # reloading or abandoning the form leaves no gap
+        self.assertEqual(self.client.get("/batches/create/").context["form"].fields["batch_id"].initial, first)
+
+        self.post(first, suggested=first)
+        self.assertTrue(BatchModel.objects.filter(batch_id=first).exists())
+        self.assertNotEqual(self.preview(), first)
+
+    def test_forms_opened_together_get_their_own_ids(self):
+        suggested = self.preview()
+        self.post(suggested, suggested=suggested)
+        self.post(suggested, suggested=suggested)
+        self.assertEqual(BatchModel.objects.count(), 2)
+        self.assertEqual(len(set(BatchModel.objects.values_list("batch_id", flat=True))), 2)
+
+    def test_typed_ids_are_kept_and_claimed(self):
+        second = self.preview()
+        # an id outside the numbering takes nothing from the counter
+        self.post("SPECIAL")
+        self.assertTrue(BatchModel.objects.filter(batch_id="SPECIAL").exists())
+        self.assertEqual(self.preview(), second)
+
+        typed = second[:2] + "050"
+        self.post(typed)
+        self.assertEqual(self.preview(), second[:2] + "051")
+        # ids are unique
+        self.assertEqual(self.post(typed).status_code, 200)
+        self.assertEqual(BatchModel.objects.filter(batch_id=typed).count(), 1)
@@ -4,32 +4,28 @@ from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from .models import BatchModel
 from .forms import BatchModelForm,AddStudentForm
+from .tables import BatchTable
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django import forms
+from django.db import transaction
 from apps.course.models import *
 from apps.students.models import Classmodel
 from django.utils import timezone
 from apps.students.models import Student
 from apps.corecode.models import Time
+from apps.corecode.sequences import claim_number, next_number, preview_number
+from apps.corecode.datatables import render_table
+
+# Two digit year followed by a running number that restarts every year
+BATCH_ID_TEMPLATE = "{yy}{n:03d}"
 
 
 def BatchListView(request):
-    # Get the authenticated user
-    user = request.user
+    template_name = "batch/batchlist.html"
+    return render_table(request, BatchTable(), template_name)
 
-    # Check if the user is an admin
-    if user.is_superuser:
-        # If user is admin, return all batches
-        batches = BatchModel.objects.all()
-    else:
-        # For regular staff users, filter batches where staff matches the user
-        batches = BatchModel.objects.filter(batch_staff=user.staff_profile)
 
-    template_name = "batch/batchlist.html"
-    context = {"batches": batches}
-    
-    return render(request, template_name, context)
 class BatchDetailView(DetailView):
     model = BatchModel
     template_name = "batch/batchdetails.html"
@@ -84,36 +80,53 @@ class BatchModelUpdateForm(forms.ModelForm):
             'batch_end_date': forms.DateInput(attrs={'type': 'date'}),
             'batch_students': forms.SelectMultiple(attrs={'size': 10}),
         }
+    def clean_batch_id(self):
+        batch_id = self.cleaned_data.get('batch_id')
+        if batch_id and BatchModel.objects.filter(batch_id=batch_id).exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError("Batch Id already exists.")
+        return batch_id
 class BatchCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
     model = BatchModel
     form_class = BatchModelUpdateForm
     template_name = "batch/batchform.html"
     success_message = "Record successfully Created."
+    allocate_batch_id = False
     def get_auto_id(self):
-        # Customize this method to generate the auto-incremented ID with date and time
-        current_datetime = timezone.now()
-        formatted_datetime = current_datetime.strftime("%M%S")
-        
-        # Combine the formatted date and time to create the ID
-        return f"{formatted_datetime}"
+        return next_number("batch", BATCH_ID_TEMPLATE, per_year=True)
+    def preview_auto_id(self):
+        return preview_number("batch", BATCH_ID_TEMPLATE, per_year=True)
     def get(self, request, *args, **kwargs):
         form = BatchModelUpdateForm()
-        form.fields['batch_id'].initial = self.get_auto_id()  # Replace generate_auto_id() with your logic
+        # allocated when the form is saved, see form_valid
+        batch_id = self.preview_auto_id()
+        form.fields['batch_id'].initial = batch_id
 
             
-        return render(request, 'batch/batchform.html', {'form': form})
+        return render(request, 'batch/batchform.html', {'form': form, 'suggested_batch_id': batch_id})
     def post(self, request, *args, **kwargs):
 
-            form = BatchModelUpdateForm(request.POST)
+            data = request.POST.copy()
+            suggested = data.get('suggested_batch_id')
+            if suggested and data.get('batch_id') == suggested:
+                # the suggestion may be stale by now, a fresh id is taken
+                # from the counter on save
+                data['batch_id'] = data['suggested_batch_id'] = self.preview_auto_id()
+                self.allocate_batch_id = True
+            form = BatchModelUpdateForm(data)
             
             if form.is_valid():
                 return self.form_valid(form)
             
-            return render(request, self.template_name, {'form': form})
+            return render(request, self.template_name, {'form': form, 'suggested_batch_id': data.get('suggested_batch_id')})
 
     def form_valid(self, form):
-            
-            response = super().form_valid(form)
+            with transaction.atomic():
+                if self.allocate_batch_id:
+                    form.instance.batch_id = self.get_auto_id()
+                else:
+                    # keep the counter ahead of an id typed in by hand
+                    claim_number("batch", form.instance.batch_id, BATCH_ID_TEMPLATE, per_year=True)
+                response = super().form_valid(form)
             return response
 
 class BatchUpdateView(LoginRequiredMixin, SuccessMessageMixin, UpdateView):
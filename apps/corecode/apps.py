@@ -6,3 +6,10 @@ class CorecodeConfig(AppConfig):
 
     def ready(self):
         import apps.corecode.signals
+
+        from pymongo import monitoring
+
+        from .telemetry import MongoCommandListener
+
+        # applies to every MongoClient created after this point
+        monitoring.register(MongoCommandListener())
@@ -0,0 +1,81 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.revenue.models import GST
+
+from .models import Bill
+
+VERSION_KEY = "billing-config:version"
+CONFIG_KEY = "billing-config"
+
+
+class BillingConfig:
+    """Snapshot of the bill prefix and GST settings used on every receipt"""
+
+    def __init__(self, bill_id, prefix, gst_percent, gst_number):
+        self.bill_id = bill_id
+        self.prefix = prefix
+        self.gst_percent = gst_percent
+        self.gst_number = gst_number
+
+    @property
+    def bill(self):
+        """Unsaved handle on the Bill row, enough for allocate() and claim()"""
+        return Bill(pk=self.bill_id, prefix=self.prefix)
+
+    @property
+    def gst(self):
+        return GST(percent=self.gst_percent, gst_number=self.gst_number)
+
+    def calculate_gst(self, price):
+        return self.gst.calculate_gst(price)
+
+    def next_bill_no(self):
+        """Number the bill form suggests next, read fresh since receipts move it"""
+        last_bill = (
+            Bill.objects.filter(pk=self.bill_id)
+            .values_list("last_bill", flat=True)
+            .first()
+        )
+        return (last_bill or 0) + 1
+
+    @classmethod
+    def load(cls):
+        bill = Bill.objects.first()
+        gst = GST.objects.first()
+        return cls(
+            bill_id=bill.pk if bill else None,
+            prefix=bill.prefix if bill else "",
+            gst_percent=gst.percent if gst else 0,
+            gst_number=gst.gst_number if gst else None,
+        )
+
+
+def get_billing_config():
+    """Cached BillingConfig for the current config version"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = invalidate_billing_config()
+    config = cache.get(CONFIG_KEY, version=version)
+    if config is None:
+        config = BillingConfig.load()
+        cache.set(CONFIG_KEY, config, None, version=version)
+    return config
+
+
+def invalidate_billing_config():
+    """Start a new config version so every process reloads on next use"""
+    version = uuid.uuid4().int
+    cache.set(VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_billing_config_on_commit():
+    """
+    invalidate_billing_config() once the writer's transaction commits, so a
+    concurrent request cannot cache the old prefix or GST percent under the
+    new version.
+    """
+    transaction.on_commit(invalidate_billing_config)
@@ -1,15 +1,13 @@
-from .models import AcademicSession, AcademicTerm, SiteConfig
+from .site_config import get_site_config
 
 
 def site_defaults(request):
-    current_session = AcademicSession.objects.get(current=True)
-    current_term = AcademicTerm.objects.get(current=True)
-    vals = SiteConfig.objects.all()
+    # the SiteWideConfigs middleware has already loaded it for this request
+    config = getattr(request, "site_config", None) or get_site_config()
     contexts = {
-        "current_session": current_session.name,
-        "current_term": current_term.name,
+        "current_session": config["session"].name,
+        "current_term": config["term"].name,
     }
-    for val in vals:
-        contexts[val.key] = val.value
+    contexts.update(config["values"])
 
     return contexts
@@ -0,0 +1,111 @@
+import uuid
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Count, Q, Sum
+
+from apps.batch.models import BatchModel
+from apps.enquiry.models import Enquiry
+from apps.finance.models import Invoice
+from apps.students.models import Student
+
+VERSION_KEY = "dashboard:version"
+HITS_KEY = "dashboard:hits"
+MISSES_KEY = "dashboard:misses"
+TIMEOUT = 60 * 60
+STUDENTS_PER_PAGE = 50
+
+
+def compute_metrics(start_date, end_date, today):
+    """
+    Admissions, billing, enquiry and batch figures for an admission date range.
+
+    Runs a fixed number of queries whatever the size of the range: one
+    conditional aggregate for the enquiry statuses, one grouped count for
+    admissions per course, one aggregate over invoice totals and the batch
+    status lookup.
+    """
+    enquiries = Enquiry.objects.filter(enquiry_date__range=[start_date, end_date]).aggregate(
+        total=Count('pk'),
+        admitted=Count('pk', filter=Q(enquiry_status='Admitted')),
+        following=Count('pk', filter=Q(enquiry_status='Following')),
+        dropped=Count('pk', filter=Q(enquiry_status='Rejected')),
+    )
+    enquiry_data = enquiries if enquiries['total'] else {}
+
+    students = Student.objects.filter(date_of_admission__range=[start_date, end_date])
+    course_admissions = list(
+        students.values('course__course_name').annotate(admission_count=Count('pk')).order_by('-admission_count')
+    )
+    total_admissions = sum(course['admission_count'] for course in course_admissions)
+
+    totals = Invoice.with_totals(Invoice.objects.filter(student__in=students)).aggregate(
+        billed=Sum('payable'), collected=Sum('paid'),
+    )
+    total_invoice_amount = totals['billed'] or 0
+    total_collected_amount = totals['collected'] or 0
+    avg_invoice_amount = total_invoice_amount / total_admissions if total_admissions > 0 else 0
+    if total_invoice_amount != 0:
+        cr_percent = round((total_collected_amount/total_invoice_amount) * 100, 2)
+    else:
+        cr_percent = 0
+
+    return {
+        'total_invoices': total_admissions,
+        'total_invoice_amount': total_invoice_amount,
+        'total_collected_amount': total_collected_amount,
+        'average_per_admission': round(avg_invoice_amount, 2),
+        'cr_percent': cr_percent,
+        'course_admissions': course_admissions,
+        'enquiry_data': enquiry_data,
+        'batch_data': BatchModel.attendance_status(today),
+    }
+
+
+def student_rows(start_date, end_date, page=None, per_page=STUDENTS_PER_PAGE):
+    """One page of the students admitted in the range, with only the listed columns"""
+    students = (
+        Student.objects.filter(date_of_admission__range=[start_date, end_date])
+        .select_related('course')
+        .only('student_name', 'enrol_no', 'gender', 'mobile_number', 'current_status', 'course__course_s_name')
+    )
+    return Paginator(students, per_page).get_page(page)
+
+
+def get_dashboard_metrics(start_date, end_date, today):
+    """compute_metrics() through the cache, keyed by date range and day"""
+    version = cache.get(VERSION_KEY) or invalidate_dashboard()
+    key = f"dashboard:{start_date}:{end_date}:{today}"
+    metrics = cache.get(key, version=version)
+    if metrics is None:
+        _count(MISSES_KEY)
+        metrics = compute_metrics(start_date, end_date, today)
+        cache.set(key, metrics, TIMEOUT, version=version)
+    else:
+        _count(HITS_KEY)
+    return metrics
+
+
+def invalidate_dashboard():
+    """Start a new version so every cached date range is recomputed"""
+    version = uuid.uuid4().int
+    cache.set(VERSION_KEY, version, None)
+    return version
+
+
+def cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0,
+    }
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
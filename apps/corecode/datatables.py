@@ -0,0 +1,138 @@
+from django.db.models import Q
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.utils.html import conditional_escape
+
+PAGE_LENGTH = 50
+MAX_PAGE_LENGTH = 500
+
+
+class Column:
+    """
+    One column of a server side table.
+
+    ``value`` turns a row object into the cell text, which is escaped unless
+    it is already safe (format_html). ``order_by`` is the field the column
+    sorts on, if any. ``search`` is a lookup such as "name__istartswith", or
+    a callable returning a Q for the search term (or None to skip).
+    """
+
+    def __init__(self, title, value, order_by=None, search=None):
+        self.title = title
+        self.value = value
+        self.order_by = order_by
+        self.search = search
+
+    def search_q(self, term):
+        if self.search is None:
+            return None
+        if callable(self.search):
+            return self.search(term)
+        return Q(**{self.search: term})
+
+
+def _int(value, default, low=0, high=None):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    value = max(value, low)
+    return min(value, high) if high is not None else value
+
+
+class ServerSideTable:
+    """
+    Backend for a DataTables table in server side processing mode.
+
+    Subclasses set ``columns`` and implement ``get_queryset``, restricted to
+    the displayed columns with select_related()/only(). Each draw runs a count
+    of all rows, a count of the search matches when searching, and one query
+    for the rows of the requested page. Searches use prefix lookups so the
+    indexes on the searched fields can be used.
+    """
+
+    columns = []
+    default_order = []
+    page_length = PAGE_LENGTH
+    row_number = True  # first column is the running S/N
+
+    def get_queryset(self, request):
+        raise NotImplementedError
+
+    def row_attrs(self, obj):
+        """Extra attributes of the row, e.g. data-href for clickable rows"""
+        return {}
+
+    def search(self, queryset, term):
+        query = Q()
+        for column in self.columns:
+            column_q = column.search_q(term)
+            if column_q is not None:
+                query |= column_q
+        return queryset.filter(query) if query else queryset.none()
+
+    def ordering(self, params):
+        fields = []
+        index = 0
+        while f"order[{index}][column]" in params:
+            position = _int(params.get(f"order[{index}][column]"), -1) - self.row_number
+            if 0 <= position < len(self.columns) and self.columns[position].order_by:
+                prefix = "-" if params.get(f"order[{index}][dir]") == "desc" else ""
+                fields.append(prefix + self.columns[position].order_by)
+            index += 1
+        return fields + list(self.default_order) + ["pk"]
+
+    def data(self, request):
+        params = request.GET
+        queryset = self.get_queryset(request)
+        total = queryset.count()
+        filtered = total
+        term = params.get("search[value]", "").strip()
+        if term:
+            queryset = self.search(queryset, term)
+            filtered = queryset.count()
+
+        start = _int(params.get("start"), 0)
+        length = _int(params.get("length"), self.page_length, low=1, high=MAX_PAGE_LENGTH)
+        rows = []
+        for number, obj in enumerate(queryset.order_by(*self.ordering(params))[start:start + length], start + 1):
+            cells = [str(number)] if self.row_number else []
+            cells += [str(conditional_escape(column.value(obj))) for column in self.columns]
+            row = dict(enumerate(cells))
+            row["DT_RowClass"] = "clickable-row"
+            row["DT_RowAttr"] = self.row_attrs(obj)
+            rows.append(row)
+        return {
+            "draw": _int(params.get("draw"), 0),
+            "recordsTotal": total,
+            "recordsFiltered": filtered,
+            "data": rows,
+        }
+
+    def options(self, request):
+        """DataTables options for the page, rendered with json_script"""
+        columns = [{"data": position} for position in range(len(self.columns) + self.row_number)]
+        if self.row_number:
+            columns[0]["orderable"] = False
+        for position, column in enumerate(self.columns, self.row_number):
+            if not column.order_by:
+                columns[position]["orderable"] = False
+        return {
+            "serverSide": True,
+            "processing": True,
+            "searchDelay": 400,
+            "ajax": request.path,
+            "pageLength": self.page_length,
+            "columns": columns,
+            "order": [],
+        }
+
+
+def render_table(request, table, template_name, context=None):
+    """The page with the empty table, or the JSON of one draw when DataTables asks"""
+    if "draw" in request.GET:
+        return JsonResponse(table.data(request))
+    context = dict(context or {})
+    context["table"] = table
+    context["table_options"] = table.options(request)
+    return render(request, template_name, context)
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.corecode.models import Sequence
+from apps.corecode.sequences import next_value
+
+
+class Command(BaseCommand):
+    help = "Allocate numbers from a counter with concurrent writers and check for duplicates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument("--count", type=int, default=500, help="numbers per worker")
+        parser.add_argument("--name", default="benchmark")
+
+    def handle(self, *args, **options):
+        workers, count, name = options["workers"], options["count"], options["name"]
+        if Sequence.objects.filter(name=name).exists():
+            raise CommandError(f"counter '{name}' already exists, pick another --name")
+
+        allocated = []
+        errors = []
+        lock = threading.Lock()
+
+        def writer():
+            values = []
+            try:
+                for _ in range(count):
+                    values.append(next_value(name))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+            with lock:
+                allocated.extend(values)
+
+        threads = [threading.Thread(target=writer) for _ in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        Sequence.objects.filter(name=name).delete()
+
+        duplicates = len(allocated) - len(set(allocated))
+        self.stdout.write(
+            f"{len(allocated)} numbers from {workers} writers in {elapsed:.2f}s "
+            f"({len(allocated) / elapsed:.0f}/s), {duplicates} duplicates, {len(errors)} errors"
+        )
+        if errors:
+            raise CommandError(f"writers failed: {errors[0]}")
+        if duplicates or sorted(allocated) != list(range(1, len(allocated) + 1)):
+            raise CommandError("counter handed out duplicate or missing numbers")
@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.corecode import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the global search index from the students, enquiries, staff and receipts"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = search.rebuild()
+        self.stdout.write(f"{count} documents indexed in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,57 @@
+import mimetypes
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils._os import safe_join
+from django.views.static import serve
+
+# staff documents and uploaded spreadsheets, only staff may download them
+PROTECTED_MEDIA_PREFIXES = ("staff/certificates/", "students/bulkupload/")
+
+
+def is_protected(path):
+    return path.startswith(PROTECTED_MEDIA_PREFIXES)
+
+
+def serve_media(request, path):
+    """
+    Serve a file under MEDIA_ROOT according to MEDIA_SERVING.
+
+    "django" streams the file from the worker, "x-accel" hands it to nginx
+    through X-Accel-Redirect and "x-sendfile" to Apache or lighttpd through
+    X-Sendfile. With either header the worker only checks access and that
+    the file exists; public media is best served by the web server directly
+    so only protected paths reach Django at all.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File does not exist")
+    # safe_join normalises "//" and "./" segments, so the access check and
+    # every way of sending the file use the path that is actually opened
+    path = os.path.relpath(full_path, os.path.abspath(settings.MEDIA_ROOT)).replace(os.sep, "/")
+    protected = is_protected(path)
+    if protected and not (request.user.is_staff or request.user.is_superuser):
+        return HttpResponseForbidden()
+
+    mode = getattr(settings, "MEDIA_SERVING", "django")
+    if mode == "django":
+        response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    else:
+        if not os.path.isfile(full_path):
+            raise Http404("File does not exist")
+        content_type, encoding = mimetypes.guess_type(full_path)
+        response = HttpResponse(content_type=content_type or "application/octet-stream")
+        if encoding:
+            response["Content-Encoding"] = encoding
+        if mode == "x-accel":
+            response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + quote(path)
+        else:
+            response["X-Sendfile"] = full_path
+
+    visibility = "private" if protected else "public"
+    response["Cache-Control"] = f"{visibility}, max-age={settings.MEDIA_CACHE_SECONDS}"
+    return response
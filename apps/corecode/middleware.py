@@ -1,7 +1,12 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
 from django.shortcuts import redirect
 from django.urls import reverse
 
-from .models import AcademicSession, AcademicTerm
+from . import telemetry
+from .site_config import get_site_config
 
 
 
@@ -29,12 +34,41 @@ class SiteWideConfigs:
         self.get_response = get_response
 
     def __call__(self, request):
-        current_session = AcademicSession.objects.get(current=True)
-        current_term = AcademicTerm.objects.get(current=True)
+        config = get_site_config()
 
-        request.current_session = current_session
-        request.current_term = current_term
+        request.site_config = config
+        request.current_session = config["session"]
+        request.current_term = config["term"]
 
         response = self.get_response(request)
 
         return response
+
+
+class RequestTelemetry:
+    """
+    Record SQL, MongoDB and template time per request, tagged by URL name.
+
+    Figures go to the process wide telemetry registry served at /metrics;
+    requests slower than TELEMETRY_SLOW_REQUEST_MS are logged with their
+    slowest queries.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats, token = telemetry.start_request()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            telemetry.finish_request(token)
+        duration = time.perf_counter() - started
+
+        view = telemetry.view_label(request)
+        telemetry.registry.record(view, duration, stats)
+        telemetry.log_slow_request(request, view, duration, stats)
+        return response
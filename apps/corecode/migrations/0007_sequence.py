@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("corecode", "0006_alter_exam_exam_duration_alter_subject_contents_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Sequence",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.SlugField()),
+                ("year", models.IntegerField(default=0)),
+                ("last_value", models.IntegerField(default=0)),
+            ],
+            options={
+                "unique_together": {("name", "year")},
+            },
+        ),
+    ]
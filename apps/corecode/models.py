@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import AbstractUser
 
 class User(AbstractUser):
@@ -112,4 +113,32 @@ class StudentClass(models.Model):
 
 class Bill(models.Model):
     prefix = models.CharField(max_length=45,blank=False, null=False)
-    last_bill = models.IntegerField(blank=False, null=False)
\ No newline at end of file
+    last_bill = models.IntegerField(blank=False, null=False)
+    def allocate(self):
+        """Reserve the next bill number atomically and return it with the prefix"""
+        with transaction.atomic():
+            Bill.objects.filter(pk=self.pk).update(last_bill=F("last_bill") + 1)
+            self.refresh_from_db(fields=["last_bill"])
+        return f"{self.prefix}{self.last_bill}"
+
+    def claim(self, bill_no):
+        """Move last_bill forward to a manually entered bill number, never backwards"""
+        serial = str(bill_no)[len(self.prefix):]
+        if str(bill_no).startswith(self.prefix) and serial.isdigit():
+            Bill.objects.filter(pk=self.pk, last_bill__lt=int(serial)).update(
+                last_bill=int(serial)
+            )
+
+
+class Sequence(models.Model):
+    """Named counter for bill, enrolment, enquiry and batch numbers"""
+
+    name = models.SlugField(max_length=50)
+    year = models.IntegerField(default=0)
+    last_value = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ["name", "year"]
+
+    def __str__(self):
+        return f"{self.name}-{self.year}" if self.year else self.name
@@ -0,0 +1,20 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    make_password() over many raw passwords for bulk account creation.
+
+    PBKDF2 runs in C with the GIL released, so the hashes are spread over a
+    thread pool of PASSWORD_HASH_WORKERS threads (one per CPU by default).
+    """
+    workers = workers or getattr(settings, "PASSWORD_HASH_WORKERS", None) or os.cpu_count() or 1
+    passwords = list(passwords)
+    if workers == 1 or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    with ThreadPoolExecutor(min(workers, len(passwords))) as pool:
+        return list(pool.map(make_password, passwords))
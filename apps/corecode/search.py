@@ -0,0 +1,251 @@
+import re
+import sqlite3
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+
+from apps.enquiry.models import Enquiry
+from apps.finance.models import Receipt
+from apps.staffs.models import Staff
+from apps.students.models import Student
+
+BATCH_SIZE = 1000
+MAX_TERMS = 8
+# title matches count for more than matches on numbers and mobiles
+RANKING = "bm25(entries, 10.0, 4.0)"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    object_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    subtitle TEXT NOT NULL,
+    url TEXT NOT NULL,
+    UNIQUE (kind, object_id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries USING fts5(
+    title, terms, tokenize = 'unicode61', prefix = '2 3 4'
+);
+"""
+
+
+def _digits(value):
+    """Bill and enquiry numbers carry a prefix, the serial alone should match too"""
+    return re.findall(r"\d+", value or "")
+
+
+class Source:
+    """
+    One model in the search index.
+
+    ``document`` turns a row into (title, subtitle, url, terms); the title is
+    searched along with the terms. ``related`` is select_related() for the
+    rows ``document`` reads, and ``dependents`` returns the querysets whose
+    documents show something of the row, to be indexed again with it.
+    """
+
+    def __init__(self, kind, label, model, document, related=(), dependents=None):
+        self.kind = kind
+        self.label = label
+        self.model = model
+        self.document = document
+        self.related = related
+        self.dependents = dependents
+
+    def queryset(self, queryset=None):
+        queryset = self.model._default_manager.all() if queryset is None else queryset
+        return queryset.select_related(*self.related) if self.related else queryset
+
+
+def student_document(student):
+    return (
+        student.student_name,
+        f"{student.enrol_no} · {student.course}",
+        reverse("student-detail", args=[student.pk]),
+        [str(student.enrol_no), student.mobile_number],
+    )
+
+
+def enquiry_document(enquiry):
+    return (
+        enquiry.name,
+        f"Enquiry {enquiry.enquiry_no} · {enquiry.enquiry_status}",
+        reverse("enquiry-detail", args=[enquiry.pk]),
+        [enquiry.enquiry_no, enquiry.mobile_number] + _digits(enquiry.enquiry_no),
+    )
+
+
+def staff_document(staff):
+    return (
+        staff.name,
+        staff.staff_role or staff.username,
+        reverse("staff-detail", args=[staff.pk]),
+        [staff.username, staff.mobile_number],
+    )
+
+
+def receipt_document(receipt):
+    student = receipt.invoice.student
+    return (
+        f"Bill {receipt.Bill_No}",
+        f"{student.student_name} ({student.enrol_no}) · {receipt.amount_paid} on {receipt.date_paid}",
+        reverse("invoice-detail", args=[receipt.invoice_id]),
+        [receipt.Bill_No] + _digits(receipt.Bill_No),
+    )
+
+
+SOURCES = [
+    Source(
+        "student", "Student", Student, student_document, related=("course",),
+        # receipts show the student's name and enrolment number
+        dependents=lambda student: [Receipt.objects.filter(invoice__student_id=student.pk)],
+    ),
+    Source("enquiry", "Enquiry", Enquiry, enquiry_document),
+    Source("staff", "Staff", Staff, staff_document),
+    Source("receipt", "Receipt", Receipt, receipt_document, related=("invoice__student",)),
+]
+SOURCES_BY_MODEL = {source.model: source for source in SOURCES}
+SOURCES_BY_KIND = {source.kind: source for source in SOURCES}
+
+# sqlite3 connections may only be used by the thread that opened them
+_local = threading.local()
+
+
+def connect():
+    """This thread's connection to the index at SEARCH_INDEX_PATH, created on first use"""
+    path = settings.SEARCH_INDEX_PATH
+    connections = _local.__dict__.setdefault("connections", {})
+    if path not in connections:
+        connection = sqlite3.connect(path, timeout=10)
+        # readers are not blocked while a request writes its row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        connections[path] = connection
+    return connections[path]
+
+
+def _remove(connection, kind, object_id):
+    row = connection.execute(
+        "SELECT id FROM documents WHERE kind = ? AND object_id = ?", (kind, object_id)
+    ).fetchone()
+    if row is not None:
+        connection.execute("DELETE FROM entries WHERE rowid = ?", row)
+        connection.execute("DELETE FROM documents WHERE id = ?", row)
+
+
+def _insert(connection, kind, object_id, document):
+    title, subtitle, url, terms = document
+    cursor = connection.execute(
+        "INSERT INTO documents (kind, object_id, title, subtitle, url) VALUES (?, ?, ?, ?, ?)",
+        (kind, object_id, title, subtitle, url),
+    )
+    connection.execute(
+        "INSERT INTO entries (rowid, title, terms) VALUES (?, ?, ?)",
+        (cursor.lastrowid, title, " ".join(term for term in terms if term)),
+    )
+
+
+def _write(rows):
+    """Store (source, row) pairs in one transaction, replacing their old documents"""
+    connection = connect()
+    with connection:
+        for source, obj in rows:
+            _remove(connection, source.kind, obj.pk)
+            _insert(connection, source.kind, obj.pk, source.document(obj))
+
+
+def index_objects(objects):
+    """Index saved rows of the searched models, and the documents that show them"""
+    objects = [obj for obj in objects if type(obj) in SOURCES_BY_MODEL]
+    _write((SOURCES_BY_MODEL[type(obj)], obj) for obj in objects)
+    for obj in objects:
+        source = SOURCES_BY_MODEL[type(obj)]
+        for queryset in source.dependents(obj) if source.dependents else []:
+            index_queryset(queryset)
+
+
+def index_queryset(queryset):
+    """Index every row of the queryset, streamed in batches"""
+    source = SOURCES_BY_MODEL[queryset.model]
+    batch = []
+    for obj in source.queryset(queryset).iterator(chunk_size=BATCH_SIZE):
+        batch.append((source, obj))
+        if len(batch) == BATCH_SIZE:
+            _write(batch)
+            batch = []
+    _write(batch)
+
+
+def remove_object(model, object_id):
+    connection = connect()
+    with connection:
+        _remove(connection, SOURCES_BY_MODEL[model].kind, object_id)
+
+
+def index_on_commit(objects=None, queryset=None):
+    """
+    Index rows once the surrounding transaction commits, so a rollback leaves
+    the index alone. The index is a side copy, a failure is logged by Django
+    rather than failing the save.
+    """
+    if objects is not None:
+        objects = list(objects)
+        transaction.on_commit(lambda: index_objects(objects), robust=True)
+    if queryset is not None:
+        transaction.on_commit(lambda: index_queryset(queryset), robust=True)
+
+
+def remove_on_commit(obj):
+    model, object_id = type(obj), obj.pk
+    transaction.on_commit(lambda: remove_object(model, object_id), robust=True)
+
+
+def rebuild():
+    """Replace the whole index from the database, returning the documents written"""
+    connection = connect()
+    count = 0
+    with connection:
+        connection.execute("DELETE FROM entries")
+        connection.execute("DELETE FROM documents")
+        for source in SOURCES:
+            for obj in source.queryset().iterator(chunk_size=BATCH_SIZE):
+                _insert(connection, source.kind, obj.pk, source.document(obj))
+                count += 1
+    connection.execute("INSERT INTO entries (entries) VALUES ('optimize')")
+    connection.commit()
+    return count
+
+
+def match_expression(query):
+    """Every word of the query as a prefix, all of them required"""
+    words = re.findall(r"\w+", query.lower())[:MAX_TERMS]
+    return " AND ".join(f'"{word}"*' for word in words)
+
+
+def search(query, limit=20, kinds=None):
+    """
+    Best matches of the query across all sources, best first, as dicts with
+    kind, label, title, subtitle and url.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return []
+    sql = (
+        "SELECT documents.kind, documents.title, documents.subtitle, documents.url "
+        "FROM entries JOIN documents ON documents.id = entries.rowid "
+        "WHERE entries MATCH ?"
+    )
+    params = [expression]
+    if kinds:
+        sql += f" AND documents.kind IN ({', '.join('?' * len(kinds))})"
+        params += list(kinds)
+    sql += f" ORDER BY {RANKING} LIMIT ?"
+    params.append(limit)
+    return [
+        {"kind": kind, "label": SOURCES_BY_KIND[kind].label, "title": title, "subtitle": subtitle, "url": url}
+        for kind, title, subtitle, url in connect().execute(sql, params)
+    ]
@@ -0,0 +1,97 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Sequence
+
+
+def next_value(name, year=0, seed=None):
+    """
+    Atomically increment the named counter and return the new value.
+
+    The increment is a single UPDATE with an F() expression, so the row lock
+    taken by the database serialises concurrent writers and no two callers can
+    receive the same value. ``seed`` is an optional callable returning the
+    value the counter should continue from when it is created for the first
+    time (e.g. the number of rows allocated under an older scheme).
+    """
+    counter = Sequence.objects.filter(name=name, year=year)
+    with transaction.atomic():
+        if not counter.update(last_value=F("last_value") + 1):
+            start = seed() if seed else 0
+            try:
+                with transaction.atomic():
+                    Sequence.objects.create(name=name, year=year, last_value=start + 1)
+                return start + 1
+            except IntegrityError:
+                # another writer created the counter first, increment theirs
+                counter.update(last_value=F("last_value") + 1)
+        return counter.values_list("last_value", flat=True).get()
+
+
+def peek_value(name, year=0, seed=None):
+    """The value next_value() would return now, without allocating it"""
+    last_value = Sequence.objects.filter(name=name, year=year).values_list("last_value", flat=True).first()
+    if last_value is None:
+        last_value = seed() if seed else 0
+    return last_value + 1
+
+
+def claim_value(name, value, year=0, seed=None):
+    """Move the counter forward to a value allocated by hand, never backwards"""
+    counter = Sequence.objects.filter(name=name, year=year)
+    if not counter.exists():
+        start = seed() if seed else 0
+        try:
+            with transaction.atomic():
+                Sequence.objects.create(name=name, year=year, last_value=max(start, value))
+            return
+        except IntegrityError:
+            # another writer created the counter first, move theirs
+            pass
+    counter.filter(last_value__lt=value).update(last_value=value)
+
+
+def _format(template, value, on):
+    return template.format(
+        n=value,
+        yy=str(on.year)[-2:],
+        yyyy=on.year,
+        mm=str(on.month).zfill(2),
+    )
+
+
+def next_number(name, template="{n}", per_year=False, seed=None, on=None):
+    """
+    Allocate the next value of a counter and format it with ``template``.
+
+    The template can use ``n`` (the counter value), ``yy``/``yyyy`` and ``mm``
+    from ``on`` (defaults to today). With ``per_year`` the counter restarts
+    from one every calendar year.
+    """
+    on = on or timezone.localdate()
+    return _format(template, next_value(name, on.year if per_year else 0, seed=seed), on)
+
+
+def preview_number(name, template="{n}", per_year=False, seed=None, on=None):
+    """
+    The number next_number() would allocate now, for create forms to show.
+
+    Nothing is reserved, so an abandoned form leaves no gap; the form's save
+    allocates the real number, which differs if someone else saved first.
+    """
+    on = on or timezone.localdate()
+    return _format(template, peek_value(name, on.year if per_year else 0, seed=seed), on)
+
+
+def claim_number(name, number, template="{n}", per_year=False, seed=None, on=None):
+    """
+    Keep the counter ahead of a number typed in by hand, so next_number()
+    does not hand it out again. Only numbers in the current format, with
+    ``n`` last in ``template``, can collide and are claimed.
+    """
+    on = on or timezone.localdate()
+    prefix = _format(template[:template.index("{n")], 0, on)
+    serial = str(number)[len(prefix):]
+    if str(number).startswith(prefix) and serial.isdigit():
+        claim_value(name, int(serial), on.year if per_year else 0, seed=seed)
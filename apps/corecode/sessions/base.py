@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+REFRESHED_KEY = "_refreshed_at"
+CLEANUP_KEY = "sessions:cleanup"
+
+
+class LowWriteSessionMixin:
+    """
+    Skip the per-request save of unchanged sessions.
+
+    With SESSION_SAVE_EVERY_REQUEST the middleware saves the session on every
+    response just to slide its expiry. This only lets that save through once
+    SESSION_REFRESH_INTERVAL seconds have passed since the last one; changed
+    sessions are still saved straight away. The stored expiry therefore
+    trails the last request by at most the interval.
+    """
+
+    def save(self, must_create=False):
+        if not must_create and not self.modified and not self.refresh_due():
+            return
+        self[REFRESHED_KEY] = int(time.time())
+        super().save(must_create=must_create)
+        self.clear_expired_if_due()
+
+    def refresh_due(self):
+        refreshed = self.get(REFRESHED_KEY)
+        return refreshed is None or time.time() - refreshed >= settings.SESSION_REFRESH_INTERVAL
+
+    @classmethod
+    def clear_expired_if_due(cls):
+        """
+        Opt-in: delete expired sessions at most once per SESSION_CLEANUP_INTERVAL.
+        Off by default, the scheduled clearsessions job does it outside requests.
+        """
+        interval = getattr(settings, "SESSION_CLEANUP_INTERVAL", None)
+        if interval and cache.add(CLEANUP_KEY, True, interval):
+            cls.clear_expired()
@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+from .base import LowWriteSessionMixin
+
+
+class SessionStore(LowWriteSessionMixin, CachedDBStore):
+    pass
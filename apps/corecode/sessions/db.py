@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+from .base import LowWriteSessionMixin
+
+
+class SessionStore(LowWriteSessionMixin, DBStore):
+    pass
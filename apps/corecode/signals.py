@@ -1,7 +1,23 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import AcademicSession, AcademicTerm
+from apps.attendancev2.public import invalidate_all_public_attendance, invalidate_public_attendance
+from apps.attendancev2.signals import lab_attendance_changed, theory_attendance_changed
+from apps.course.models import CourseModel
+from apps.enquiry.models import Enquiry
+from apps.finance.models import Due, Invoice, InvoiceItem, Receipt
+from apps.result.models import Result
+from apps.result.utils import invalidate_result_sheets
+from apps.revenue.models import GST
+from apps.staffs.models import Staff
+from apps.students.models import Bookmodel, Certificatemodel, Classmodel, Exammodel, Student
+from apps.students.profile import invalidate_student_profile, invalidate_student_profiles
+
+from . import search
+from .billing import invalidate_billing_config_on_commit
+from .dashboard import invalidate_dashboard
+from .models import AcademicSession, AcademicTerm, Bill, Book, SiteConfig, Subject, Time
+from .site_config import invalidate_site_config_on_commit
 
 
 @receiver(post_save, sender=AcademicSession)
@@ -9,6 +25,7 @@ def after_saving_session(sender, created, instance, *args, **kwargs):
     """Change all academic sessions to false if this is true"""
     if instance.current is True:
         AcademicSession.objects.exclude(pk=instance.id).update(current=False)
+    invalidate_site_config_on_commit()
 
 
 @receiver(post_save, sender=AcademicTerm)
@@ -16,3 +33,102 @@ def after_saving_term(sender, created, instance, *args, **kwargs):
     """Change all academic terms to false if this is true."""
     if instance.current is True:
         AcademicTerm.objects.exclude(pk=instance.id).update(current=False)
+    invalidate_site_config_on_commit()
+
+
+@receiver(post_delete, sender=AcademicSession)
+@receiver(post_delete, sender=AcademicTerm)
+@receiver(post_save, sender=SiteConfig)
+@receiver(post_delete, sender=SiteConfig)
+def after_changing_site_config(sender, instance, *args, **kwargs):
+    """Sessions, terms or config values changed, drop the cached site config."""
+    invalidate_site_config_on_commit()
+
+
+@receiver(post_save, sender=Bill)
+@receiver(post_delete, sender=Bill)
+@receiver(post_save, sender=GST)
+@receiver(post_delete, sender=GST)
+def after_changing_billing_config(sender, instance, *args, **kwargs):
+    """Bill prefix or GST settings changed, drop the cached billing config."""
+    invalidate_billing_config_on_commit()
+
+
+@receiver(theory_attendance_changed)
+def after_changing_theory_attendance(sender, *args, **kwargs):
+    """Batch completion on the dashboards depends on today's theory attendance."""
+    invalidate_dashboard()
+    student_ids = kwargs.get("student_ids")
+    if student_ids is None:
+        invalidate_all_public_attendance()
+    else:
+        invalidate_public_attendance(student_ids)
+
+
+@receiver(lab_attendance_changed)
+def after_changing_lab_attendance(sender, student_id, *args, **kwargs):
+    """The student's lab usage is part of their public attendance page."""
+    invalidate_public_attendance([student_id])
+
+
+@receiver(post_save, sender=Result)
+@receiver(post_delete, sender=Result)
+def after_changing_result(sender, instance, *args, **kwargs):
+    """Scores changed, totals and ranks of every cached result sheet may move."""
+    invalidate_result_sheets()
+
+
+def after_changing_dashboard_data(sender, instance, *args, **kwargs):
+    """Admissions, billing or enquiries changed, drop every cached dashboard."""
+    invalidate_dashboard()
+
+
+for model in (Student, Invoice, InvoiceItem, Receipt, Enquiry):
+    post_save.connect(after_changing_dashboard_data, sender=model)
+    post_delete.connect(after_changing_dashboard_data, sender=model)
+
+
+def _student_id(instance):
+    if isinstance(instance, Student):
+        return instance.pk
+    if hasattr(instance, "student_id"):
+        return instance.student_id
+    # invoice items, receipts and dues belong to the student through the invoice
+    if type(instance).invoice.is_cached(instance):
+        return instance.invoice.student_id
+    return Invoice.objects.filter(pk=instance.invoice_id).values_list("student_id", flat=True).first()
+
+
+def after_changing_student_rows(sender, instance, *args, **kwargs):
+    """A student's row, invoices, dues or logs changed, drop that cached profile."""
+    student_id = _student_id(instance)
+    if student_id is not None:
+        invalidate_student_profile(student_id)
+
+
+def after_changing_profile_names(sender, instance, *args, **kwargs):
+    """Staff, books, subjects, courses or timings are shown on every profile."""
+    invalidate_student_profiles()
+
+
+for model in (Student, Invoice, InvoiceItem, Receipt, Due, Bookmodel, Classmodel, Exammodel, Certificatemodel):
+    post_save.connect(after_changing_student_rows, sender=model)
+    post_delete.connect(after_changing_student_rows, sender=model)
+
+for model in (Staff, Book, Subject, CourseModel, Time):
+    post_save.connect(after_changing_profile_names, sender=model)
+    post_delete.connect(after_changing_profile_names, sender=model)
+
+
+def after_saving_search_row(sender, instance, *args, **kwargs):
+    """A searched row changed, index it again once the save commits."""
+    search.index_on_commit([instance])
+
+
+def after_deleting_search_row(sender, instance, *args, **kwargs):
+    search.remove_on_commit(instance)
+
+
+for model in search.SOURCES_BY_MODEL:
+    post_save.connect(after_saving_search_row, sender=model)
+    post_delete.connect(after_deleting_search_row, sender=model)
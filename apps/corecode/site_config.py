@@ -0,0 +1,56 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import AcademicSession, AcademicTerm, SiteConfig
+
+VERSION_KEY = "site-config:version"
+CONFIG_KEY = "site-config"
+
+# (version, config) last seen by this process, swapped as one tuple
+_local = {}
+
+
+def load_site_config():
+    return {
+        "session": AcademicSession.objects.get(current=True),
+        "term": AcademicTerm.objects.get(current=True),
+        "values": dict(SiteConfig.objects.values_list("key", "value")),
+    }
+
+
+def get_site_config():
+    """
+    Current session, term and SiteConfig values for the current config version.
+
+    Each process keeps the last config it loaded and only goes back to the
+    shared cache, and from there to the database, when the version changes.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = invalidate_site_config()
+    seen_version, config = _local.get("entry", (None, None))
+    if seen_version != version:
+        config = cache.get(CONFIG_KEY, version=version)
+        if config is None:
+            config = load_site_config()
+            cache.set(CONFIG_KEY, config, None, version=version)
+        _local["entry"] = (version, config)
+    return config
+
+
+def invalidate_site_config():
+    """Start a new config version so every process reloads on next use"""
+    version = uuid.uuid4().int
+    cache.set(VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_site_config_on_commit():
+    """
+    invalidate_site_config() once the writer's transaction commits. Bumped
+    before, a concurrent request could cache the old rows under the new
+    version, where they would stay until the next change.
+    """
+    transaction.on_commit(invalidate_site_config)
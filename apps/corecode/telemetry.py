@@ -0,0 +1,209 @@
+import contextvars
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+METRICS = {
+    "http_request_duration_seconds": ("Total time spent serving the request", SECONDS_BUCKETS),
+    "db_queries_per_request": ("SQL queries run by the request", COUNT_BUCKETS),
+    "db_query_duration_seconds": ("Time spent in SQL queries per request", SECONDS_BUCKETS),
+    "mongo_commands_per_request": ("MongoDB commands run by the request", COUNT_BUCKETS),
+    "mongo_command_duration_seconds": ("Time spent in MongoDB commands per request", SECONDS_BUCKETS),
+    "template_render_duration_seconds": ("Time spent rendering templates per request", SECONDS_BUCKETS),
+}
+
+# stats of the request being served by the current thread, if any
+_current = contextvars.ContextVar("telemetry_request", default=None)
+
+
+class RequestStats:
+    """Counters for one request, filled in by the SQL, Mongo and template hooks"""
+
+    def __init__(self, keep_queries=5):
+        self.keep_queries = keep_queries
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.mongo_count = 0
+        self.mongo_time = 0.0
+        self.template_time = 0.0
+        self.rendering = False
+        self._slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute_wrapper timing every query"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add_query(sql, time.perf_counter() - started)
+
+    def add_query(self, sql, duration):
+        self.sql_count += 1
+        self.sql_time += duration
+        # min-heap holding only the slowest few, so long requests stay cheap
+        entry = (duration, self.sql_count, sql)
+        if len(self._slowest) < self.keep_queries:
+            heapq.heappush(self._slowest, entry)
+        else:
+            heapq.heappushpop(self._slowest, entry)
+
+    def slowest_queries(self):
+        return [(duration, sql) for duration, _, sql in sorted(self._slowest, reverse=True)]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {round(self.sum, 6)}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class Registry:
+    """Histograms per metric and view for this process since it started"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def observe(self, metric, view, value):
+        with self.lock:
+            histogram = self.histograms.get((metric, view))
+            if histogram is None:
+                histogram = self.histograms[(metric, view)] = Histogram(METRICS[metric][1])
+            histogram.observe(value)
+
+    def record(self, view, duration, stats):
+        self.observe("http_request_duration_seconds", view, duration)
+        self.observe("db_queries_per_request", view, stats.sql_count)
+        self.observe("db_query_duration_seconds", view, stats.sql_time)
+        self.observe("mongo_commands_per_request", view, stats.mongo_count)
+        self.observe("mongo_command_duration_seconds", view, stats.mongo_time)
+        self.observe("template_render_duration_seconds", view, stats.template_time)
+
+    def render(self):
+        """All histograms in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for metric, (description, _) in METRICS.items():
+                views = sorted(view for name, view in self.histograms if name == metric)
+                if not views:
+                    continue
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} histogram")
+                for view in views:
+                    lines.extend(self.histograms[(metric, view)].lines(metric, f'view="{view}"'))
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+
+registry = Registry()
+
+
+def start_request():
+    stats = RequestStats(getattr(settings, "TELEMETRY_SLOW_QUERY_COUNT", 5))
+    return stats, _current.set(stats)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or "unnamed"
+
+
+def log_slow_request(request, view, duration, stats):
+    threshold = getattr(settings, "TELEMETRY_SLOW_REQUEST_MS", 1000)
+    if duration * 1000 < threshold:
+        return
+    queries = "".join(f"\n  {duration * 1000:.1f}ms {sql}" for duration, sql in stats.slowest_queries())
+    logger.warning(
+        "Slow request %s %s (%s) %.0fms: %d SQL queries in %.0fms, %d Mongo commands in %.0fms, "
+        "templates %.0fms. Slowest queries:%s",
+        request.method, request.path, view, duration * 1000,
+        stats.sql_count, stats.sql_time * 1000, stats.mongo_count, stats.mongo_time * 1000,
+        stats.template_time * 1000, queries,
+    )
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Adds every MongoDB command to the stats of the request that issued it"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        stats = _current.get()
+        if stats is not None:
+            stats.mongo_count += 1
+            stats.mongo_time += event.duration_micros / 1e6
+
+
+class TimedTemplate:
+    """Wraps a backend template to add its render time to the current request"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        # includes and nested render_to_string calls are inside the outer render
+        if stats is None or stats.rendering:
+            return self.template.render(context, request)
+        stats.rendering = True
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - started
+            stats.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing each top level render"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
@@ -0,0 +1,16 @@
+from django import template
+from django.http import QueryDict
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, page):
+    """
+    A link to another page of the list, keeping the filters of the current
+    request. Views that are not filtered by GET pass theirs as page_params.
+    """
+    query = QueryDict(mutable=True)
+    query.update(context.get("page_params") or context["request"].GET)
+    query["page"] = page
+    return f"?{query.urlencode()}"
@@ -1,11 +1,18 @@
+import datetime
+
+from django.core.cache import cache
 from django.test import TestCase
 
 from apps.corecode.models import (
     AcademicSession,
     AcademicTerm,
+    Bill,
     SiteConfig,
     Subject,
 )
+from apps.corecode.billing import get_billing_config
+from apps.corecode.sequences import next_number, next_value, preview_number
+from apps.revenue.models import GST
 
 
 class SiteConfigTest(TestCase):
@@ -30,3 +37,60 @@ class SubjectTest(TestCase):
     def test_subject(self):
         subject = Subject.objects.create(name="a_subject")
         self.assertEqual(str(subject), "a_subject")
+
+
+class SequenceTest(TestCase):
+    def test_next_value_increments(self):
+        self.assertEqual([next_value("test") for _ in range(3)], [1, 2, 3])
+
+    def test_seed_used_on_first_allocation(self):
+        self.assertEqual(next_value("seeded", seed=lambda: 41), 42)
+        self.assertEqual(next_value("seeded", seed=lambda: 41), 43)
+
+    def test_per_year_reset_and_format(self):
+        last_year = datetime.date(2025, 12, 31)
+        this_year = datetime.date(2026, 1, 1)
+        self.assertEqual(next_number("enq", "EN{yy}-{n:04d}", True, on=last_year), "EN25-0001")
+        self.assertEqual(next_number("enq", "EN{yy}-{n:04d}", True, on=last_year), "EN25-0002")
+        self.assertEqual(next_number("enq", "EN{yy}-{n:04d}", True, on=this_year), "EN26-0001")
+
+    def test_preview_does_not_allocate(self):
+        self.assertEqual(preview_number("fresh", "B{n:03d}", seed=lambda: 6), "B007")
+        self.assertEqual(preview_number("fresh", "B{n:03d}", seed=lambda: 6), "B007")
+        self.assertEqual(next_number("fresh", "B{n:03d}", seed=lambda: 6), "B007")
+        self.assertEqual(preview_number("fresh", "B{n:03d}"), "B008")
+
+
+class BillTest(TestCase):
+    def test_allocate_and_claim(self):
+        bill = Bill.objects.create(prefix="CSC", last_bill=10)
+        self.assertEqual(bill.allocate(), "CSC11")
+        bill.claim("CSC20")
+        bill.claim("CSC15")
+        bill.refresh_from_db()
+        self.assertEqual(bill.last_bill, 20)
+
+
+class BillingConfigTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        bill = Bill.objects.first()
+        bill.prefix = "CSC"
+        bill.save()
+        self.gst = GST.objects.first() or GST()
+        self.gst.percent = 18
+        self.gst.gst_number = "33ABCDE1234F1Z5"
+        self.gst.save()
+
+    def test_config_cached_until_gst_changes(self):
+        self.assertEqual(get_billing_config().gst_percent, 18)
+        with self.assertNumQueries(0):
+            config = get_billing_config()
+        self.assertEqual(config.prefix, "CSC")
+        self.assertEqual(config.calculate_gst(118), (100.0, 18.0))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gst.percent = 5
+            self.gst.save()
+            # a reader before the commit keeps the old percent
+            self.assertEqual(get_billing_config().gst_percent, 18)
+        self.assertEqual(get_billing_config().gst_percent, 5)
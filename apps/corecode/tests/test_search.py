@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.course.models import CourseModel
+from apps.enquiry.models import Enquiry
+from apps.finance.models import Invoice, Receipt
+from apps.staffs.models import Staff
+from apps.students.models import Student
+
+from apps.corecode import search
+from apps.corecode.models import User
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class GlobalSearchTest(TestCase):
+    def setUp(self):
+        index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir)
+        settings_override = override_settings(SEARCH_INDEX_PATH=f"{index_dir}/search.sqlite3")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+            self.student = Student.objects.create(
+                student_name="Kavitha Raman", enrol_no=24010001, rel_name="Raman", rel_occupation="Farmer",
+                address="", remark="", course=course, mobile_number="9876501234",
+            )
+            self.staff = Staff.objects.create(
+                name="Kavin Kumar", username="kavin", password="secret", address="", pincode=606001,
+                mobile_number="9123456780",
+            )
+            self.enquiry = Enquiry.objects.create(
+                name="Kavya Devi", address="Main Road", mobile_number="9000011111", counsellor=self.staff,
+            )
+
+    def titles(self, query, **kwargs):
+        return [(result["kind"], result["title"]) for result in search.search(query, **kwargs)]
+
+    def test_typed_results_across_sources(self):
+        self.assertEqual(
+            sorted(self.titles("kav")),
+            [("enquiry", "Kavya Devi"), ("staff", "Kavin Kumar"), ("student", "Kavitha Raman")],
+        )
+        self.assertEqual(self.titles("2401"), [("student", "Kavitha Raman")])
+        self.assertEqual(self.titles("98765"), [("student", "Kavitha Raman")])
+        self.assertEqual(self.titles(self.enquiry.enquiry_no), [("enquiry", "Kavya Devi")])
+        self.assertEqual(self.titles("kav", kinds=["staff"]), [("staff", "Kavin Kumar")])
+        self.assertEqual(self.titles("kavitha raman"), [("student", "Kavitha Raman")])
+        # FTS5 syntax typed into the box is taken as plain words
+        self.assertEqual(self.titles('"kav*'), self.titles("kav"))
+        self.assertEqual(self.titles("  "), [])
+
+    def test_kept_in_sync_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.student_name = "Kavitha Selvam"
+            self.student.save()
+        self.assertEqual(self.titles("selvam"), [("student", "Kavitha Selvam")])
+        self.assertEqual(self.titles("raman"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enquiry.delete()
+        self.assertEqual(self.titles("kavya"), [])
+
+        # not indexed before the transaction commits
+        with self.captureOnCommitCallbacks(execute=False):
+            self.staff.name = "Priya"
+            self.staff.save()
+        self.assertEqual(self.titles("priya"), [])
+
+    def test_bulk_receipts_and_rebuild(self):
+        invoice = Invoice.objects.create(student=self.student)
+        Receipt.objects.bulk_create([
+            Receipt(Bill_No=f"VDM{serial:05}", invoice=invoice, amount_paid=500, received_by=self.staff)
+            for serial in range(1, 4)
+        ])
+        search.index_queryset(Receipt.objects.all())
+        results = search.search("00002")
+        self.assertEqual([result["title"] for result in results], ["Bill VDM00002"])
+        self.assertIn("Kavitha Raman (24010001)", results[0]["subtitle"])
+        self.assertEqual(results[0]["url"], f"/finance/{invoice.pk}/detail/")
+
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertTrue(out.getvalue().startswith("6 documents indexed"))
+        self.assertEqual(len(search.search("vdm")), 3)
+
+    def test_search_view(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+        response = self.client.get("/search/", {"q": "kavitha", "format": "json"})
+        self.assertEqual(response.json()["results"][0]["url"], f"/student/{self.student.pk}/")
+
+        response = self.client.get("/search/", {"q": "kavin"})
+        self.assertContains(response, "Kavin Kumar")
@@ -0,0 +1,323 @@
+import datetime
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.db import connection
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.corecode.dashboard import compute_metrics, get_dashboard_metrics, student_rows
+from apps.corecode.models import AcademicSession, AcademicTerm, SiteConfig, User
+from apps.corecode.site_config import get_site_config
+from apps.corecode import telemetry
+from apps.corecode.telemetry import registry
+from apps.course.models import CourseModel
+from apps.enquiry.models import Enquiry
+from apps.finance.models import Invoice, InvoiceItem
+from apps.staffs.models import Staff
+from apps.students.models import Student
+
+
+class DashboardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        AcademicSession.objects.create(name="2024", current=True)
+        AcademicTerm.objects.create(name="First", current=True)
+        self.course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+        self.range = (datetime.date(2024, 1, 1), datetime.date(2024, 1, 31), "2024-01-15")
+
+    def add_student(self, enrol_no):
+        return Student.objects.create(
+            student_name="Asha", enrol_no=enrol_no, rel_name="Ravi", rel_occupation="Farmer",
+            address="", remark="", course=self.course, date_of_admission=datetime.date(2024, 1, 10),
+        )
+
+    def test_cached_until_student_saved(self):
+        self.add_student(1)
+        self.assertEqual(get_dashboard_metrics(*self.range)["total_invoices"], 1)
+        with self.assertNumQueries(0):
+            get_dashboard_metrics(*self.range)
+        self.add_student(2)
+        self.assertEqual(get_dashboard_metrics(*self.range)["total_invoices"], 2)
+
+    def test_cache_stats_view(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+        get_dashboard_metrics(*self.range)
+        get_dashboard_metrics(*self.range)
+        stats = self.client.get("/dashboard/cache-stats").json()
+        self.assertGreaterEqual(stats["hits"], 1)
+        self.assertGreaterEqual(stats["misses"], 1)
+
+    def test_metrics_in_fixed_number_of_queries(self):
+        for enrol_no in (1, 2):
+            invoice = Invoice.objects.create(student=self.add_student(enrol_no))
+            InvoiceItem.objects.create(invoice=invoice, description="Course Fee", amount=3000)
+            InvoiceItem.objects.create(invoice=invoice, description="Exam Fee", amount=500)
+        counsellor = Staff.objects.create(name="Counsellor", username="counsellor", password="secret", address="", pincode=606001)
+        for status in ("Admitted", "Following", "Following", "Rejected"):
+            Enquiry.objects.create(
+                name="Asha", address="", counsellor=counsellor, enquiry_status=status, enquiry_date=datetime.date(2024, 1, 5),
+            )
+        # enquiries, admissions per course, invoice totals and active batches
+        with self.assertNumQueries(4):
+            metrics = compute_metrics(*self.range)
+        self.assertEqual(metrics["enquiry_data"], {"total": 4, "admitted": 1, "following": 2, "dropped": 1})
+        self.assertEqual(metrics["course_admissions"], [{"course__course_name": "Tally", "admission_count": 2}])
+        self.assertEqual(metrics["total_invoice_amount"], 7000)
+        self.assertEqual(metrics["average_per_admission"], 3500)
+
+    def test_student_rows_paginated(self):
+        for enrol_no in range(1, 4):
+            self.add_student(enrol_no)
+        page = student_rows(*self.range[:2], page=2, per_page=2)
+        with self.assertNumQueries(1):
+            self.assertEqual([str(student.course) for student in page], ["TALLY"])
+        self.assertEqual(page.paginator.count, 3)
+
+
+class SiteConfigCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.session = AcademicSession.objects.create(name="2024", current=True)
+        AcademicTerm.objects.create(name="First", current=True)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+
+    def test_warm_path_runs_no_queries(self):
+        get_site_config()
+        with self.assertNumQueries(0):
+            config = get_site_config()
+        self.assertEqual(config["session"], self.session)
+
+    def test_request_and_templates_share_config(self):
+        response = self.client.get("/")
+        self.assertEqual(response.wsgi_request.current_session, self.session)
+        self.assertEqual(response.context["current_term"], "First")
+
+    def test_saving_session_or_config_reloads(self):
+        get_site_config()
+        with self.captureOnCommitCallbacks(execute=True):
+            session = AcademicSession.objects.create(name="2025", current=True)
+            # a reader before the commit keeps the old config
+            self.assertEqual(get_site_config()["session"], self.session)
+        self.assertEqual(get_site_config()["session"], session)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/site-config", {
+                "form-TOTAL_FORMS": 1, "form-INITIAL_FORMS": 0,
+                "form-0-key": "school_name", "form-0-value": "CSC Computer Education",
+            })
+        self.assertEqual(get_site_config()["values"]["school_name"], "CSC Computer Education")
+
+    def test_deleting_session_or_config_reloads(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            config = SiteConfig.objects.create(key="school_name", value="CSC")
+        self.assertEqual(get_site_config()["values"]["school_name"], "CSC")
+        with self.captureOnCommitCallbacks(execute=True):
+            config.delete()
+        self.assertNotIn("school_name", get_site_config()["values"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            session = AcademicSession.objects.create(name="2025", current=True)
+        self.assertEqual(get_site_config()["session"], session)
+        with self.captureOnCommitCallbacks(execute=True):
+            session.delete()
+        with self.assertRaises(AcademicSession.DoesNotExist):
+            get_site_config()
+
+
+class TelemetryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        AcademicSession.objects.create(name="2024", current=True)
+        AcademicTerm.objects.create(name="First", current=True)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+
+    def test_metrics_endpoint(self):
+        self.client.get("/")
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertIn('http_request_duration_seconds_count{view="home"} 1', body)
+        self.assertIn('db_queries_per_request_bucket{view="home",le="+Inf"} 1', body)
+        self.assertIn('template_render_duration_seconds_count{view="home"} 1', body)
+        self.assertIn('dashboard_cache_requests_total{result="miss"} 1', body)
+
+    @override_settings(TELEMETRY_SLOW_REQUEST_MS=0)
+    def test_slow_requests_logged_with_queries(self):
+        with self.assertLogs("apps.corecode.telemetry", "WARNING") as logs:
+            self.client.get("/")
+        self.assertIn("Slow request GET / (home)", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+    def test_mongo_commands_counted_for_current_request(self):
+        listener = telemetry.MongoCommandListener()
+        listener.succeeded(SimpleNamespace(duration_micros=500))
+        stats, token = telemetry.start_request()
+        listener.succeeded(SimpleNamespace(duration_micros=1500))
+        listener.failed(SimpleNamespace(duration_micros=500))
+        telemetry.finish_request(token)
+        self.assertEqual(stats.mongo_count, 2)
+        self.assertAlmostEqual(stats.mongo_time, 0.002)
+
+
+@override_settings(SESSION_ENGINE="apps.corecode.sessions.db", SESSION_REFRESH_INTERVAL=300)
+class LowWriteSessionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        AcademicSession.objects.create(name="2024", current=True)
+        AcademicTerm.objects.create(name="First", current=True)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+
+    def session_writes(self, requests):
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(requests):
+                self.client.get("/dashboard/cache-stats")
+        return sum(query["sql"].startswith(("UPDATE", "INSERT")) and "django_session" in query["sql"] for query in queries)
+
+    def test_unchanged_session_not_saved_within_interval(self):
+        # the login itself saved the session
+        self.assertEqual(self.session_writes(20), 0)
+
+    def refresh_later(self):
+        session = Session.objects.get(expire_date__gt=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc))
+        Session.objects.create(session_key="expired", session_data="", expire_date=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc))
+        cache.clear()
+        later = session.expire_date.timestamp() - 10800 + 301
+        with mock.patch("apps.corecode.sessions.base.time.time", return_value=later):
+            self.assertEqual(self.session_writes(1), 1)
+        return session
+
+    def test_expiry_slides_after_interval(self):
+        session = self.refresh_later()
+        self.assertGreater(Session.objects.get(pk=session.pk).expire_date, session.expire_date)
+        # cleanup is left to the scheduled clearsessions job
+        self.assertTrue(Session.objects.filter(session_key="expired").exists())
+
+    @override_settings(SESSION_CLEANUP_INTERVAL=3600)
+    def test_opt_in_cleanup_on_refresh(self):
+        self.refresh_later()
+        self.assertFalse(Session.objects.filter(session_key="expired").exists())
+
+
+class TestCacheTest(SimpleTestCase):
+    def test_tests_never_clear_the_shared_cache(self):
+        # setUps call cache.clear(), the file or Redis cache of a deployed checkout must stay untouched
+        self.assertIsInstance(caches["default"], LocMemCache)
+
+
+class MediaServingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        AcademicSession.objects.create(name="2024", current=True)
+        AcademicTerm.objects.create(name="First", current=True)
+        self.media_root = tempfile.mkdtemp()
+        for path in ("students/passports/asha.png", "staff/certificates/resume.png"):
+            os.makedirs(os.path.join(self.media_root, os.path.dirname(path)), exist_ok=True)
+            with open(os.path.join(self.media_root, path), "wb") as image:
+                image.write(b"png")
+        self.staff = User.objects.create_user("staff", "staff@example.com", "secret", is_staff=True)
+        self.student = User.objects.create_user("student", "student@example.com", "secret")
+
+    def test_public_media_cached(self):
+        with self.settings(MEDIA_ROOT=self.media_root, MEDIA_SERVING="django"):
+            response = self.client.get("/media/students/passports/asha.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+
+    def test_protected_media_needs_staff(self):
+        with self.settings(MEDIA_ROOT=self.media_root, MEDIA_SERVING="x-accel"):
+            self.assertEqual(self.client.get("/media/staff/certificates/resume.png").status_code, 403)
+            self.client.force_login(self.student)
+            self.assertEqual(self.client.get("/media/staff/certificates/resume.png").status_code, 403)
+            self.client.force_login(self.staff)
+            response = self.client.get("/media/staff/certificates/resume.png")
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/staff/certificates/resume.png")
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Cache-Control"], "private, max-age=3600")
+
+    def test_sendfile_missing_and_traversal(self):
+        with self.settings(MEDIA_ROOT=self.media_root, MEDIA_SERVING="x-sendfile"):
+            response = self.client.get("/media/students/passports/asha.png")
+            self.assertEqual(response["X-Sendfile"], os.path.join(self.media_root, "students/passports/asha.png"))
+            self.assertEqual(self.client.get("/media/students/passports/ravi.png").status_code, 404)
+            self.assertEqual(self.client.get("/media/../csc_app/settings.py").status_code, 404)
+
+    def test_unnormalised_paths_stay_protected(self):
+        paths = [
+            "/media/staff//certificates/resume.png",
+            "/media/./staff/certificates/resume.png",
+            "/media/staff/./certificates/resume.png",
+        ]
+        for mode in ("django", "x-sendfile"):
+            with self.settings(MEDIA_ROOT=self.media_root, MEDIA_SERVING=mode):
+                self.client.logout()
+                for path in paths:
+                    self.assertEqual(self.client.get(path).status_code, 403)
+                self.client.force_login(self.student)
+                for path in paths:
+                    self.assertEqual(self.client.get(path).status_code, 403)
+                self.client.force_login(self.staff)
+                response = self.client.get(paths[0])
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Cache-Control"], "private, max-age=3600")
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.media_root, "staff/certificates/resume.png"))
+
+        with self.settings(MEDIA_ROOT=self.media_root, MEDIA_SERVING="x-accel"):
+            response = self.client.get(paths[1])
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/staff/certificates/resume.png")
+
+
+class ServerSideTableTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+        # bulk, Student.save would hash a login password for each
+        Student.objects.bulk_create(
+            Student(
+                student_name=f"Student {enrol_no:03d}", enrol_no=enrol_no, rel_name="Ravi", rel_occupation="Farmer",
+                address="", remark="", course=course,
+            )
+            for enrol_no in range(1, 121)
+        )
+        Invoice.objects.bulk_create(Invoice(student=student) for student in Student.objects.all())
+        counsellor = Staff.objects.create(name="Counsellor", username="counsellor", password="secret", address="", pincode=606001)
+        Enquiry.objects.create(name="Kavi", address="", counsellor=counsellor, enquiry_status="Admitted")
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+
+    def draw(self, path, **params):
+        params.setdefault("draw", 1)
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(path, params).json()
+        student_queries = [query for query in queries if '"students_student"' in query["sql"]]
+        return data, student_queries
+
+    def test_page_sort_and_search(self):
+        data, queries = self.draw("/student/list", start=50, length=50, **{"order[0][column]": 2, "order[0][dir]": "desc"})
+        self.assertEqual((data["recordsTotal"], data["recordsFiltered"]), (120, 120))
+        self.assertEqual(len(data["data"]), 50)
+        self.assertEqual(data["data"][0]["0"], "51")
+        self.assertEqual(data["data"][0]["2"], "70")
+        self.assertEqual(data["data"][0]["DT_RowAttr"]["data-href"], f"/student/{Student.objects.get(enrol_no=70).pk}/")
+        self.assertEqual(len(queries), 2)
+
+        data, _ = self.draw("/student/list", **{"search[value]": "student 11"})
+        self.assertEqual(data["recordsFiltered"], 10)
+        data, _ = self.draw("/student/list", **{"search[value]": "7"})
+        self.assertEqual([row["2"] for row in data["data"]], ["7"])
+
+    def test_lists_render_empty_table_and_rows(self):
+        for path in ("/student/list", "/enquiry/list", "/finance/list/", "/batches/"):
+            response = self.client.get(path)
+            self.assertContains(response, 'id="table-options"')
+        data, _ = self.draw("/finance/list/", length=10, **{"search[value]": "Student 00"})
+        self.assertEqual(data["recordsFiltered"], 9)
+        self.assertIn("Add new receipt", data["data"][0]["5"])
+        data, _ = self.draw("/enquiry/list")
+        self.assertEqual(data["data"][0]["1"], "Kavi")
+        self.assertIn("green", data["data"][0]["DT_RowAttr"]["style"])
+        data, _ = self.draw("/batches/")
+        self.assertEqual(data["recordsTotal"], 0)
@@ -38,10 +38,16 @@ from .views import (
     BillUpdateView,
     save_gst_percent,
     save_gst_number,
+    dashboard_cache_stats,
+    metrics,
+    global_search,
 )
 
 urlpatterns = [
     path("", IndexView.index, name="home"),
+    path("dashboard/cache-stats", dashboard_cache_stats, name="dashboard-cache-stats"),
+    path("metrics", metrics, name="metrics"),
+    path("search/", global_search, name="global-search"),
     path("site-config", SiteConfigView.as_view(), name="configs"),
     path(
         "current-session/", CurrentSessionAndTermView.as_view(), name="current-session"
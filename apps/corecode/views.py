@@ -32,6 +32,10 @@ from .models import (
     Book,Exam,Time,Bill
 )
 from apps.revenue.models import GST
+from .billing import get_billing_config
+from .site_config import invalidate_site_config_on_commit
+from . import search, telemetry
+from .dashboard import cache_stats, get_dashboard_metrics, student_rows
 
 #---dashboard--
 from django.utils import timezone
@@ -41,6 +45,7 @@ from apps.enquiry.models import Enquiry
 from apps.batch.models import BatchModel
 from django.db.models import Sum,Count 
 import datetime
+import time
 
 def get_month_start_end(date=None):
     """Gets the start and end date of the month for the given date. 
@@ -64,7 +69,7 @@ def get_month_start_end(date=None):
 decorators and page access functions
 """
 from django.contrib.auth import authenticate, login
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 import base64
 
 def login_url(request, username, password:str):
@@ -139,59 +144,13 @@ class IndexView(LoginRequiredMixin, TemplateView):
             start_date,end_date = get_month_start_end()
             
         if start_date and end_date:
-            students = Student.objects.filter(date_of_admission__range=[start_date, end_date])
-            invoices = Invoice.objects.filter(student__in=students)
-            enquiries = Enquiry.objects.filter(enquiry_date__range=[start_date,end_date])
-            if enquiries:
-                enquiry_data = {
-                    'total': enquiries.count(),
-                    'admitted': enquiries.filter(enquiry_status='Admitted').count(),
-                    'following': enquiries.filter(enquiry_status='Following').count(),
-                    'dropped': enquiries.filter(enquiry_status='Rejected').count()
-                }
-            else:
-                enquiry_data = {}
-                
-            batches = BatchModel.objects.filter(batch_status = "Active")
-            batch_count = batches.count()
-            #print(batch_count)
-            completed = 0
-            for batch in batches:
-                if batch.get_attendance_data(today):
-                    completed += 1
-            batch_data = {
-                'total':batch_count,
-                'completed':completed,
-                'not_completed':(batch_count-completed)
-            }
-            
-
-            total_invoice_amount = sum(invoice.total_amount_payable() for invoice in invoices)
-            
-            total_collected_amount = invoices.aggregate(Sum('receipt__amount_paid'))['receipt__amount_paid__sum'] or 0
-            
-            total_admissions = students.count()
-            
-            avg_invoice_amount = total_invoice_amount / total_admissions if total_admissions > 0 else 0
-            if  total_invoice_amount != 0:
-                cr_percent = round((total_collected_amount/total_invoice_amount) * 100,2)
-            else:
-                cr_percent = 0
-
-            course_admissions = students.values('course__course_name').annotate(admission_count=Count('course')).order_by('-admission_count')
-            
-            context = {
+            context = get_dashboard_metrics(start_date, end_date, today)
+            page_obj = student_rows(start_date, end_date, request.GET.get('page'))
+            context.update({
                 'dashboard':True,
-                'total_invoices':total_admissions,
-                'total_invoice_amount': total_invoice_amount,
-                'total_collected_amount': total_collected_amount,
-                'average_per_admission': round(avg_invoice_amount,2),
-                'cr_percent':cr_percent,
-                'course_admissions': course_admissions,
-                'students':students,
-                'enquiry_data':enquiry_data,
-                'batch_data':batch_data
-            }
+                'students':page_obj,
+                'page_obj':page_obj,
+            })
 
 
             return render(request, 'index.html', context)
@@ -205,6 +164,40 @@ class IndexView(LoginRequiredMixin, TemplateView):
         })
 
 
+@login_required
+@staff_student_entry_restricted()
+def dashboard_cache_stats(request):
+    return JsonResponse(cache_stats())
+
+
+@login_required
+@student_entry_resricted()
+def metrics(request):
+    """Request telemetry and dashboard cache counters in Prometheus text format"""
+    stats = cache_stats()
+    lines = [
+        "# HELP dashboard_cache_requests_total Dashboard metric lookups by cache result",
+        "# TYPE dashboard_cache_requests_total counter",
+        f'dashboard_cache_requests_total{{result="hit"}} {stats["hits"]}',
+        f'dashboard_cache_requests_total{{result="miss"}} {stats["misses"]}',
+    ]
+    body = telemetry.registry.render() + "\n".join(lines) + "\n"
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@login_required
+@student_entry_resricted()
+def global_search(request):
+    """Students, enquiries, staff and receipts matching the search box, best first"""
+    query = request.GET.get("q", "").strip()
+    started = time.perf_counter()
+    results = search.search(query, limit=10 if request.GET.get("format") == "json" else 50)
+    took = (time.perf_counter() - started) * 1000
+    if request.GET.get("format") == "json":
+        return JsonResponse({"query": query, "results": results, "took_ms": round(took, 2)})
+    return render(request, "corecode/search.html", {"query": query, "results": results, "took_ms": took})
+
+
 class SiteConfigView(LoginRequiredMixin, View):
     """Site Config View"""
 
@@ -540,13 +533,15 @@ class CurrentSessionAndTermView(LoginRequiredMixin, View):
         return render(request, self.template_name, {"form": form})
 
     def post(self, request, *args, **kwargs):
-        form = self.form_Class(request.POST)
+        form = self.form_class(request.POST)
         if form.is_valid():
             session = form.cleaned_data["current_session"]
             term = form.cleaned_data["current_term"]
             AcademicSession.objects.filter(name=session).update(current=True)
             AcademicSession.objects.exclude(name=session).update(current=False)
             AcademicTerm.objects.filter(name=term).update(current=True)
+            # update() skips the post_save receivers that normally do this
+            invalidate_site_config_on_commit()
 
         return render(request, self.template_name, {"form": form})
 
@@ -564,7 +559,7 @@ class BillDetailView(DetailView):
         context = super().get_context_data(**kwargs)
         
         # Add another object, e.g., Customer, to the context
-        context['gst'] = GST.objects.first()  # Example of returning another object
+        context['gst'] = get_billing_config().gst
         return context
 
 class BillUpdateView(UpdateView):
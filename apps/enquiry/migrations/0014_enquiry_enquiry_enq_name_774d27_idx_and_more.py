@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("corecode", "0007_sequence"),
+        ("course", "0003_alter_coursemodel_course_duration"),
+        ("enquiry", "0013_alter_enquiry_counsellor"),
+        ("staffs", "0004_alter_staff_pincode"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="enquiry",
+            index=models.Index(fields=["name"], name="enquiry_enq_name_774d27_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="enquiry",
+            index=models.Index(
+                fields=["mobile_number"], name="enquiry_enq_mobile__4c455d_idx"
+            ),
+        ),
+    ]
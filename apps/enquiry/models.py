@@ -6,6 +6,23 @@ from datetime import date
 from apps.staffs.models import Staff
 from apps.corecode.models import Time
 from apps.course.models import CourseModel
+from apps.corecode.sequences import next_number
+
+
+def allocate_enquiry_no(model, counter):
+    """Allocate the next ENyy-NNNN number, continuing after any already issued this year"""
+    prefix = f"EN{str(timezone.localdate().year)[-2:]}-"
+
+    def last_issued():
+        last = (
+            model.objects.filter(enquiry_no__startswith=prefix)
+            .order_by("-auto_increment")
+            .values_list("enquiry_no", flat=True)
+            .first()
+        )
+        return int(last[len(prefix):]) if last and last[len(prefix):].isdigit() else 0
+
+    return next_number(counter, "EN{yy}-{n:04d}", per_year=True, seed=last_issued)
 
 
 class Enquiry(models.Model):
@@ -96,12 +113,13 @@ class Enquiry(models.Model):
         "Others", max_length=1024, default="",blank=True,null=True
     )
     time_to_study = models.ManyToManyField(Time,blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["name"]), models.Index(fields=["mobile_number"])]
     
     def save(self, *args, **kwargs):
         if not self.pk:
-            last_student = Enquiry.objects.order_by('-auto_increment').first()
-            last_auto_increment = last_student.auto_increment if last_student else 0
-            self.enquiry_no = f'EN24-{last_auto_increment + 1:04d}'
+            self.enquiry_no = allocate_enquiry_no(Enquiry, "enquiry")
         
         super().save(*args, **kwargs)
         return self.enquiry_no
@@ -267,9 +285,7 @@ class StudentEnquiryModel(models.Model):
         
         def save(self, *args, **kwargs):
             if not self.pk:
-                last_student = StudentEnquiryModel.objects.order_by('-auto_increment').first()
-                last_auto_increment = last_student.auto_increment if last_student else 0
-                self.enquiry_no = f'EN24-{last_auto_increment + 1:04d}'
+                self.enquiry_no = allocate_enquiry_no(StudentEnquiryModel, "web-enquiry")
             
             super().save(*args, **kwargs)
             return self.enquiry_no
@@ -0,0 +1,44 @@
+from django.db.models import Q
+from django.urls import reverse
+
+from apps.corecode.datatables import Column, ServerSideTable
+
+from .models import Enquiry
+
+STATUS_STYLES = {
+    "Admitted": "color: green;background-color: rgb(155, 178, 178);",
+    "Rejected": "color: red;",
+}
+FOLLOWING_STYLE = "color:yellow;background-color: rgb(206, 152, 152);"
+
+
+def interested_course(enquiry):
+    if enquiry.course_to_join_id:
+        return enquiry.course_to_join.course_s_name
+    return enquiry.new_course or ""
+
+
+class EnquiryTable(ServerSideTable):
+    columns = [
+        Column("Enquiry No", lambda enquiry: enquiry.enquiry_no, "enquiry_no", "enquiry_no__istartswith"),
+        Column("Fullname", lambda enquiry: enquiry.name, "name", "name__istartswith"),
+        Column("Status", lambda enquiry: enquiry.enquiry_status, "enquiry_status", "enquiry_status__iexact"),
+        Column("Mobile No", lambda enquiry: enquiry.mobile_number, "mobile_number", "mobile_number__startswith"),
+        Column("Intersted Course", interested_course, "course_to_join__course_s_name"),
+        Column("Counseller", lambda enquiry: enquiry.counsellor.name, "counsellor__name"),
+        Column("Remark", lambda enquiry: enquiry.counsellor_remark or ""),
+    ]
+    default_order = ["auto_increment"]
+    row_number = False
+
+    def get_queryset(self, request):
+        return Enquiry.objects.select_related("course_to_join", "counsellor").only(
+            "enquiry_no", "name", "enquiry_status", "mobile_number", "new_course", "counsellor_remark",
+            "course_to_join__course_s_name", "counsellor__name",
+        )
+
+    def row_attrs(self, enquiry):
+        return {
+            "data-href": reverse("enquiry-detail", args=[enquiry.auto_increment]),
+            "style": STATUS_STYLES.get(enquiry.enquiry_status, FOLLOWING_STYLE),
+        }
@@ -9,8 +9,11 @@ from django.urls import reverse_lazy
 from django.views.generic import DetailView, ListView, View
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
 
+from apps.corecode.datatables import render_table
+
 from .forms import EnquiryForm, LogForm , StudentEnquiryForm
 from .models import Enquiry, Enquirylogs , StudentEnquiryModel
+from .tables import EnquiryTable
 
 def enquiry_index(request):
     return render(request,"index_enquiry.html")
@@ -20,7 +23,7 @@ class EnquiryListView(LoginRequiredMixin, ListView):
     
     def slist(request):
         template_name = "enquiry.html"
-        return render(request, template_name , context={"Enquiry":Enquiry.objects.all()})
+        return render_table(request, EnquiryTable(), template_name)
 
 
 
@@ -0,0 +1,181 @@
+import csv
+import datetime
+import itertools
+import time
+from collections import defaultdict
+
+import pandas as pd
+from django.db import DatabaseError, transaction
+from django.db.models import Sum
+
+from apps.corecode.billing import get_billing_config
+from apps.corecode.dashboard import invalidate_dashboard
+from apps.corecode.search import index_on_commit
+from apps.staffs.models import Staff
+from apps.students.profile import invalidate_student_profiles
+
+from .models import Due, Invoice, Receipt
+
+FIELDS = ["bill_no", "enrol_no", "amount_paid", "date_paid", "received_by", "comment"]
+DATE_FORMATS = ["%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y"]
+
+
+def parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+    raise ValueError(f"invalid date '{value}'")
+
+
+class ReceiptImporter:
+    """
+    Import historical receipts from a CSV stream.
+
+    Students, invoices, staff and existing bill numbers are loaded into maps
+    once, so rows are resolved without queries. Receipts are written with
+    bulk_create one chunk per transaction, which skips the bill bookkeeping and
+    due allocation Receipt.save does per row; the dues of every invoice that
+    received money are reconciled once after the whole file is read.
+    """
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.config = get_billing_config()
+        # latest invoice of each student wins, same as the billing page
+        self.invoices = dict(
+            Invoice.objects.order_by("id").values_list("student__enrol_no", "id")
+        )
+        staff = list(Staff.objects.values_list("id", "username"))
+        self.staff = {username: pk for pk, username in staff}
+        self.staff.update({str(pk): pk for pk, _ in staff})
+        self.bill_nos = set(Receipt.objects.values_list("Bill_No", flat=True))
+        self.paid = defaultdict(int)
+        self.highest_serial = 0
+        self.errors = []
+        self.imported = 0
+        self.elapsed = 0
+
+    def run(self, stream):
+        started = time.perf_counter()
+        reader = csv.DictReader(stream)
+        line = 2  # first data row, after the header
+        while True:
+            rows = list(itertools.islice(reader, self.chunk_size))
+            if not rows:
+                break
+            self.import_chunk(rows, line)
+            line += len(rows)
+        self.reconcile_dues()
+        if self.imported:
+            # bulk_create sends no post_save, the paid totals on profiles and
+            # the collection figures on the dashboards are stale
+            invalidate_student_profiles()
+            invalidate_dashboard()
+        if self.highest_serial:
+            self.config.bill.claim(f"{self.config.prefix}{self.highest_serial}")
+        self.elapsed = time.perf_counter() - started
+        return self
+
+    def parse_row(self, row):
+        bill_no = (row.get("bill_no") or "").strip()
+        if not bill_no:
+            raise ValueError("missing bill number")
+        if bill_no in self.bill_nos:
+            raise ValueError(f"bill number {bill_no} already exists")
+        try:
+            invoice_id = self.invoices[int(row.get("enrol_no") or "")]
+        except (KeyError, ValueError):
+            raise ValueError(f"no invoice for enrolment number '{row.get('enrol_no')}'")
+        try:
+            amount = int(float(row.get("amount_paid") or ""))
+        except ValueError:
+            raise ValueError(f"invalid amount '{row.get('amount_paid')}'")
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        staff_id = self.staff.get((row.get("received_by") or "").strip())
+        if staff_id is None:
+            raise ValueError(f"unknown staff '{row.get('received_by')}'")
+        receipt = Receipt(
+            Bill_No=bill_no,
+            invoice_id=invoice_id,
+            amount_paid=amount,
+            date_paid=parse_date((row.get("date_paid") or "").strip()),
+            comment=(row.get("comment") or "")[:200],
+            received_by_id=staff_id,
+        )
+
+        # only an accepted row holds its bill number against later rows
+        self.bill_nos.add(bill_no)
+        return receipt
+
+    def import_chunk(self, rows, first_line):
+        accepted = []
+        for line, row in enumerate(rows, first_line):
+            try:
+                accepted.append((line, row, self.parse_row(row)))
+            except ValueError as exc:
+                self.reject(line, row, exc)
+        if not accepted:
+            return
+        receipts = [receipt for _, _, receipt in accepted]
+
+        if self.config.gst_number:
+            # GST.calculate_gst only uses arithmetic and round(), so it runs
+            # over the whole column at once
+            amounts = pd.Series([receipt.amount_paid for receipt in receipts], dtype=float)
+            org_amounts, gst_amounts = self.config.calculate_gst(amounts)
+            for receipt, org_amount, gst_amount in zip(receipts, org_amounts, gst_amounts):
+                receipt.org_amount = float(org_amount)
+                receipt.gst_amount = float(gst_amount)
+
+        try:
+            with transaction.atomic():
+                Receipt.objects.bulk_create(receipts, batch_size=self.chunk_size)
+                # bulk_create skips the receivers that keep the search index in sync
+                index_on_commit(queryset=Receipt.objects.filter(Bill_No__in=[receipt.Bill_No for receipt in receipts]))
+        except DatabaseError as exc:
+            # the chunk was rolled back, report its rows and go on with the
+            # next one so the committed chunks are still reconciled
+            for line, row, receipt in accepted:
+                self.bill_nos.discard(receipt.Bill_No)
+                self.reject(line, row, f"not saved: {exc}")
+            return
+        for receipt in receipts:
+            self.paid[receipt.invoice_id] += receipt.amount_paid
+            serial = receipt.Bill_No[len(self.config.prefix):]
+            if receipt.Bill_No.startswith(self.config.prefix) and serial.isdigit():
+                self.highest_serial = max(self.highest_serial, int(serial))
+        self.imported += len(receipts)
+
+    def reject(self, line, row, error):
+        self.errors.append([line] + [row.get(field) for field in FIELDS] + [str(error)])
+
+    def reconcile_dues(self):
+        invoice_ids = list(self.paid)
+        for start in range(0, len(invoice_ids), self.chunk_size):
+            chunk = invoice_ids[start:start + self.chunk_size]
+            with transaction.atomic():
+                outstanding = dict(
+                    Due.objects.filter(invoice_id__in=chunk)
+                    .values("invoice_id")
+                    .annotate(total=Sum("amount"))
+                    .values_list("invoice_id", "total")
+                )
+                for invoice in Invoice.objects.filter(id__in=outstanding):
+                    # never pay past the open dues, there is no date for a new one
+                    amount = min(self.paid[invoice.id], outstanding[invoice.id])
+                    invoice.update_dues_based_on_receipt(amount)
+
+    def write_errors(self, stream):
+        writer = csv.writer(stream)
+        writer.writerow(["line"] + FIELDS + ["error"])
+        writer.writerows(self.errors)
+
+    def summary(self):
+        rate = self.imported / self.elapsed if self.elapsed else 0
+        return (
+            f"{self.imported} receipts imported, {len(self.errors)} rows rejected, "
+            f"{len(self.paid)} invoices reconciled in {self.elapsed:.1f}s ({rate:.0f} rows/s)"
+        )
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0006_remove_due_extended"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="due",
+            name="due_status",
+            field=models.CharField(
+                choices=[("Paid", "Paid"), ("Pending", "Pending")],
+                default="Pending",
+                max_length=255,
+                verbose_name="Due Status",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="due",
+            index=models.Index(
+                fields=["due_date"], name="finance_due_due_dat_b37975_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="due",
+            index=models.Index(
+                fields=["due_status", "due_date"], name="finance_due_due_sta_35aa7c_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="due",
+            index=models.Index(
+                fields=["invoice", "due_date"], name="finance_due_invoice_f14b09_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0007_alter_due_due_status_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="receipt",
+            index=models.Index(
+                fields=["date_paid"], name="finance_rec_date_pa_4fbdae_idx"
+            ),
+        ),
+    ]
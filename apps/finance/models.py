@@ -1,12 +1,15 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from django.utils import timezone
 from apps.staffs.models import Staff
 from apps.corecode.models import AcademicSession, AcademicTerm, StudentClass,Bill
 from apps.students.models import Student
 import json
-from datetime import date
+from datetime import date, timedelta
 from apps.revenue.models import GST
+from apps.corecode.billing import get_billing_config
 
 class Invoice(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, default=None)
@@ -38,6 +41,22 @@ class Invoice(models.Model):
     def get_absolute_url(self):
         return reverse("invoice-detail", kwargs={"pk": self.pk})
 
+    @staticmethod
+    def with_totals(invoices):
+        """Annotate payable and paid totals, one correlated subquery each"""
+        items = (
+            InvoiceItem.objects.filter(invoice=OuterRef("pk")).order_by()
+            .values("invoice").annotate(total=Sum("amount")).values("total")
+        )
+        receipts = (
+            Receipt.objects.filter(invoice=OuterRef("pk")).order_by()
+            .values("invoice").annotate(total=Sum("amount_paid")).values("total")
+        )
+        return invoices.annotate(
+            payable=Coalesce(Subquery(items), 0),
+            paid=Coalesce(Subquery(receipts), 0),
+        )
+
     def add_past_due(self, due):
         past_dues = self._past_dues
         if isinstance(past_dues, str):
@@ -109,15 +128,22 @@ class Receipt(models.Model):
     received_by = models.ForeignKey(Staff, verbose_name="Billing Staff", on_delete=models.DO_NOTHING)
     org_amount = models.FloatField(null=True)
     gst_amount = models.FloatField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date_paid"]),
+        ]
+
     def __str__(self):
         return f"Receipt on {self.date_paid}"
 
     
     def save(self, *args, **kwargs):
-        bill = Bill.objects.filter().first()
-        if self.Bill_No.startswith(bill.prefix):
-            bill.last_bill = self.Bill_No[len(bill.prefix):]
-            bill.save()
+        config = get_billing_config()
+        if not self.Bill_No:
+            self.Bill_No = config.bill.allocate()
+        else:
+            config.bill.claim(self.Bill_No)
 
         # Cast amount_paid to integer
         self.amount_paid = int(float(self.amount_paid))
@@ -125,11 +151,10 @@ class Receipt(models.Model):
         next_due_date = kwargs.pop('next_due_date')
         next_due_amount = kwargs.pop('next_due_amount')
         
-        gst_obj = GST.objects.first()
         amt,gst = None,None
-        if gst_obj.gst_number:
+        if config.gst_number:
             paid = float(self.amount_paid)
-            amt, gst = gst_obj.calculate_gst(paid)
+            amt, gst = config.calculate_gst(paid)
         
         self.org_amount = amt
         self.gst_amount = gst
@@ -144,13 +169,20 @@ class Receipt(models.Model):
 
 class Due(models.Model):
     due_choice = [("Paid","Paid"),("Pending","Pending")]
-    due_status = models.TextField("Due Status",choices=due_choice,default="Pending",max_length=255)
+    due_status = models.CharField("Due Status",choices=due_choice,default="Pending",max_length=255)
     invoice = models.ForeignKey(Invoice, related_name='dues', on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     due_date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["due_date"]),
+            models.Index(fields=["due_status", "due_date"]),
+            models.Index(fields=["invoice", "due_date"]),
+        ]
+
 
     def extend_due(self, new_due_date):
         self.due_date = new_due_date
@@ -164,3 +196,35 @@ class Due(models.Model):
     @staticmethod
     def dues_for_student(student):
         return Due.objects.filter(invoice__student=student)
+
+    AGING_BUCKETS = [("1-30 days", 1, 30), ("31-60 days", 31, 60), ("61-90 days", 61, 90), ("90+ days", 91, None)]
+
+    @staticmethod
+    def overdue(today=None):
+        """Dues past their date, a due falling due today is not overdue yet"""
+        return Q(due_date__lt=today or timezone.localdate())
+
+    @staticmethod
+    def aging_buckets(dues, today=None):
+        """Count and total of overdue dues by days past due, in one aggregate query"""
+        today = today or timezone.localdate()
+        conditions = {"upcoming": ~Due.overdue(today)}
+        for index, (label, first_day, last_day) in enumerate(Due.AGING_BUCKETS):
+            condition = Q(due_date__lte=today - timedelta(days=first_day))
+            if last_day is not None:
+                condition &= Q(due_date__gte=today - timedelta(days=last_day))
+            conditions[f"bucket{index}"] = condition
+        aggregates = {}
+        for key, condition in conditions.items():
+            aggregates[f"{key}_count"] = Count("id", filter=condition)
+            aggregates[f"{key}_amount"] = Sum("amount", filter=condition)
+        totals = dues.order_by().aggregate(**aggregates)
+
+        buckets = [{"label": "Not yet due", "count": totals["upcoming_count"], "amount": totals["upcoming_amount"] or 0}]
+        for index, (label, first_day, last_day) in enumerate(Due.AGING_BUCKETS):
+            buckets.append({
+                "label": label,
+                "count": totals[f"bucket{index}_count"],
+                "amount": totals[f"bucket{index}_amount"] or 0,
+            })
+        return buckets
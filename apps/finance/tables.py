@@ -0,0 +1,41 @@
+from django.contrib.humanize.templatetags.humanize import intcomma
+from django.db.models import F, Q
+from django.urls import reverse
+from django.utils.html import format_html
+
+from apps.corecode.datatables import Column, ServerSideTable
+
+from .models import Invoice
+
+
+def student_search(term):
+    if term.isdigit():
+        return Q(student__enrol_no=int(term))
+    return Q(student__student_name__istartswith=term)
+
+
+def receipt_button(invoice):
+    return format_html(
+        '<a class="btn btn-success btn-sm" href="{}?invoice={}">Add new receipt</a>',
+        reverse("receipt-create"), invoice.pk,
+    )
+
+
+class InvoiceTable(ServerSideTable):
+    columns = [
+        Column("invoice", str, "student__student_name", student_search),
+        Column("Total Payable", lambda invoice: intcomma(invoice.payable), "payable"),
+        Column("Total Paid", lambda invoice: intcomma(invoice.paid), "paid"),
+        Column("Balance", lambda invoice: intcomma(invoice.balance_due), "balance_due"),
+        Column("", receipt_button),
+    ]
+    default_order = ["student__enrol_no"]
+
+    def get_queryset(self, request):
+        invoices = Invoice.objects.select_related("student").only(
+            "student__student_name", "student__enrol_no"
+        )
+        return Invoice.with_totals(invoices).annotate(balance_due=F("payable") - F("paid"))
+
+    def row_attrs(self, invoice):
+        return {"data-href": reverse("invoice-detail", args=[invoice.pk])}
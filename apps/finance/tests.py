@@ -1,8 +1,16 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import IntegrityError
 from django.test import TestCase
 from django.utils import timezone
 from apps.staffs.models import Staff
 from apps.corecode.models import AcademicSession, AcademicTerm, StudentClass
 from apps.students.models import Student
+from apps.corecode.models import Bill, User
+from apps.course.models import CourseModel
+from .importer import ReceiptImporter
 from .models import Invoice, InvoiceItem, Receipt, Due
 
 class InvoiceTestCase(TestCase):
@@ -49,6 +57,128 @@ class InvoiceTestCase(TestCase):
         self.assertTrue(self.due.extended)
         self.assertEqual(self.due.due_date, new_due_date)
 
+class FinanceFixtureMixin:
+    def setUp(self):
+        cache.clear()
+        self.staff = Staff.objects.create(name="Billing", username="billing", password="secret", address="", pincode=606001)
+        course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+        self.student = Student.objects.create(student_name="Asha", enrol_no=24010001, rel_name="Ravi", rel_occupation="Farmer", address="", remark="", course=course)
+        self.invoice = Invoice.objects.create(student=self.student)
+        InvoiceItem.objects.create(invoice=self.invoice, description="Total Fee", amount=5000)
+        Due.objects.create(invoice=self.invoice, amount=3000, due_date=timezone.localdate())
+
+
+class ReceiptImportTestCase(FinanceFixtureMixin, TestCase):
+    def test_import_and_reconcile(self):
+        csv_data = StringIO(
+            "bill_no,enrol_no,amount_paid,date_paid,received_by,comment\n"
+            "BN7,24010001,1000,2024-01-05,billing,\n"
+            "BN8,24010001,500,05-02-2024,billing,second\n"
+            "BN8,24010001,500,2024-02-05,billing,duplicate\n"
+            "BN9,99999999,500,2024-02-05,billing,unknown student\n"
+        )
+        with mock.patch("apps.finance.importer.invalidate_dashboard") as invalidate_dashboard:
+            importer = ReceiptImporter(chunk_size=2).run(csv_data)
+        invalidate_dashboard.assert_called_once_with()
+        self.assertEqual(importer.imported, 2)
+        self.assertEqual([error[0] for error in importer.errors], [4, 5])
+        self.assertEqual(self.invoice.total_amount_paid(), 1500)
+        self.assertEqual(Due.objects.get(invoice=self.invoice).amount, 1500)
+        self.assertEqual(Bill.objects.first().last_bill, 8)
+
+    def test_rejected_row_keeps_bill_number_free(self):
+        csv_data = StringIO(
+            "bill_no,enrol_no,amount_paid,date_paid,received_by,comment\n"
+            "BN20,24010001,1000,not a date,billing,\n"
+            "BN20,24010001,1000,2024-01-05,billing,corrected\n"
+            "BN30,24010001,500,,billing,no date\n"
+        )
+        importer = ReceiptImporter(chunk_size=10).run(csv_data)
+        self.assertEqual(importer.imported, 1)
+        self.assertEqual([error[0] for error in importer.errors], [2, 4])
+        self.assertEqual(Receipt.objects.get().comment, "corrected")
+        self.assertEqual(Bill.objects.first().last_bill, 20)
+
+    def test_failed_chunk_is_reported_and_others_reconciled(self):
+        bulk_create = Receipt.objects.bulk_create
+
+        def failing_bulk_create(receipts, **kwargs):
+            if any(receipt.Bill_No == "BN9" for receipt in receipts):
+                raise IntegrityError("duplicate entry")
+            return bulk_create(receipts, **kwargs)
+
+        csv_data = StringIO(
+            "bill_no,enrol_no,amount_paid,date_paid,received_by,comment\n"
+            "BN7,24010001,1000,2024-01-05,billing,\n"
+            "BN8,24010001,500,2024-02-05,billing,\n"
+            "BN9,24010001,500,2024-03-05,billing,\n"
+            "BN10,24010001,500,2024-04-05,billing,\n"
+        )
+        with mock.patch.object(Receipt.objects, "bulk_create", side_effect=failing_bulk_create):
+            importer = ReceiptImporter(chunk_size=2).run(csv_data)
+        self.assertEqual(importer.imported, 2)
+        self.assertEqual([error[0] for error in importer.errors], [4, 5])
+        self.assertIn("not saved: duplicate entry", importer.errors[0][-1])
+        self.assertEqual(Due.objects.get(invoice=self.invoice).amount, 1500)
+        self.assertEqual(Bill.objects.first().last_bill, 8)
+
+
+class DueAgingTestCase(FinanceFixtureMixin, TestCase):
+    def test_aging_buckets(self):
+        today = timezone.localdate()
+        for days, amount in [(-5, 100), (10, 200), (45, 300), (75, 400), (200, 500)]:
+            Due.objects.create(invoice=self.invoice, amount=amount, due_date=today - timezone.timedelta(days=days))
+        with self.assertNumQueries(1):
+            buckets = Due.aging_buckets(Due.objects.exclude(amount=3000), today)
+        self.assertEqual([bucket["amount"] for bucket in buckets], [100, 200, 300, 400, 500])
+        self.assertEqual([bucket["count"] for bucket in buckets], [1, 1, 1, 1, 1])
+
+
+    def test_due_today_is_not_overdue(self):
+        today = timezone.localdate()
+        Due.objects.create(invoice=self.invoice, amount=700, due_date=today - timezone.timedelta(days=1))
+        buckets = Due.aging_buckets(Due.objects.all(), today)
+        # the fixture's due falls due today
+        self.assertEqual((buckets[0]["count"], buckets[0]["amount"]), (1, 3000))
+        self.assertEqual((buckets[1]["count"], buckets[1]["amount"]), (1, 700))
+        self.assertEqual(list(Due.objects.filter(Due.overdue(today)).values_list("amount", flat=True)), [700])
+
+
+class StudentDuesViewTestCase(FinanceFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        AcademicSession.objects.create(name="2024", current=True)
+        AcademicTerm.objects.create(name="First", current=True)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+
+    def test_totals_and_not_modified(self):
+        url = f"/finance/student-dues/{self.student.id}/"
+        response = self.client.get(url)
+        data = response.json()
+        self.assertEqual((data["total_amount"], data["paid"], data["balance"]), (5000, 0, 5000))
+        self.assertEqual(len(data["dues"]), 1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        Due.objects.create(invoice=self.invoice, amount=500, due_date=timezone.localdate())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_dues_list_filters_and_pages(self):
+        today = timezone.localdate()
+        Due.objects.bulk_create([Due(invoice=self.invoice, amount=100, due_date=today) for _ in range(30)])
+        response = self.client.get("/finance/dues", {"student_name": "Asha", "start_date": "2024-02-30", "end_date": "soon"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["page_obj"].paginator.count, 31)
+        self.assertContains(response, 'href="?student_name=Asha&amp;start_date=2024-02-30&amp;end_date=soon&amp;page=2"')
+
+        response = self.client.get("/finance/dues", {"start_date": (today + timezone.timedelta(days=1)).isoformat()})
+        self.assertEqual(response.context["page_obj"].paginator.count, 0)
+
+        # dues falling due today are neither listed nor counted as overdue
+        response = self.client.get("/finance/dues", {"show": "overdue"})
+        self.assertEqual(response.context["page_obj"].paginator.count, 0)
+        self.assertEqual(sum(bucket["count"] for bucket in response.context["aging"][1:]), 0)
+
+
 # Log all actions and account for amount flow
 import logging
 
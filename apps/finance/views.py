@@ -7,23 +7,33 @@ from django.views.generic import DetailView, ListView
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
 from apps.staffs.models import Staff
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, HttpResponseNotModified, JsonResponse
 from apps.students.models import Student
 from .models import Due
 from .forms import DueForm
 from .forms import InvoiceItemFormset, InvoiceReceiptFormSet, Invoices
 from .models import Invoice, InvoiceItem, Receipt, Due
+from .tables import InvoiceTable
 from apps.staffs.models import Staff
 from apps.enquiry.models import Enquiry
 from apps.corecode.views import staff_student_entry_restricted
-from apps.corecode.models import Bill
-from django.db.models import Count, Sum
+from apps.corecode.billing import get_billing_config
+from apps.corecode.dashboard import get_dashboard_metrics, student_rows
+from apps.corecode.datatables import render_table
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.core.paginator import Paginator
+import datetime
+import hashlib
 from apps.batch.models import BatchModel
 
 class InvoiceListView(LoginRequiredMixin, ListView):
     model = Invoice
 
+    def get(self, request, *args, **kwargs):
+        return render_table(request, InvoiceTable(), "finance/invoice_list.html")
+
 
 class InvoiceCreateView(LoginRequiredMixin, CreateView):
     model = Invoice
@@ -51,13 +61,17 @@ class InvoiceCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 def save_bill_details(request):
-    bill = Bill.objects.get(id=1)
+    bill = get_billing_config()
     last_receipt = Receipt.objects.last()
     #print(last_receipt.Bill_No)
     if request.method == 'POST':
         due = None
         student = request.POST.get('student')
         bill_number = request.POST.get('bill_number')
+        if bill_number == request.POST.get('suggested_bill_number'):
+            # the suggested number may have been taken by another counter,
+            # let Receipt.save reserve a fresh one
+            bill_number = ""
         bill_date = request.POST.get('bill_date')
         amount = request.POST.get('amount')
         if request.user.is_superuser:
@@ -112,9 +126,9 @@ def save_bill_details(request):
 
     try:
         due = Due.objects.get(id = request.GET.get('due',None))
-        return render(request, 'finance/bill.html',context={'stu':Student.objects.all(),'last_receipt':last_receipt,"bill":bill,"next_no":bill.last_bill+1,"due":due})
+        return render(request, 'finance/bill.html',context={'stu':Student.objects.all(),'last_receipt':last_receipt,"bill":bill,"next_no":bill.next_bill_no(),"due":due})
     except:
-        return render(request, 'finance/bill.html',context={'stu':Student.objects.all(),'last_receipt':last_receipt,"bill":bill,"next_no":bill.last_bill+1,"due":"None"})
+        return render(request, 'finance/bill.html',context={'stu':Student.objects.all(),'last_receipt':last_receipt,"bill":bill,"next_no":bill.next_bill_no(),"due":"None"})
 
 class InvoiceDetailView(LoginRequiredMixin, DetailView):
     model = Invoice
@@ -198,24 +212,90 @@ def bulk_invoice(request):
 
 
 def get_student_dues(request, student_id):
-    student = get_object_or_404(Student, id=student_id)
-    dues = Due.dues_for_student(student)
-    invoice = Invoice.objects.get(student=student)
-    if dues:
-        dues_list = [{'amount': due.amount, 'due_date': due.due_date, 'id':due.id, "total_amount":due.invoice.total_amount_payable(),"balance":due.invoice.balance(),"paid":due.invoice.total_amount_paid()} for due in dues]
+    # one query for the totals plus what the ETag is built from
+    receipts = Receipt.objects.filter(invoice=OuterRef("pk")).order_by().values("invoice")
+    dues = Due.objects.filter(invoice=OuterRef("pk")).order_by().values("invoice")
+    invoices = list(
+        Invoice.with_totals(Invoice.objects.filter(student_id=student_id)).annotate(
+            last_receipt=Subquery(receipts.annotate(last=Max("id")).values("last")),
+            receipt_count=Subquery(receipts.annotate(count=Count("id")).values("count")),
+            dues_updated=Subquery(dues.annotate(last=Max("updated_at")).values("last")),
+            due_count=Subquery(dues.annotate(count=Count("id")).values("count")),
+        ).order_by("id").values(
+            "id", "payable", "paid", "last_receipt", "receipt_count", "dues_updated", "due_count"
+        )
+    )
+    if not invoices and not Student.objects.filter(id=student_id).exists():
+        raise Http404("Student does not exist")
+
+    etag = '"%s"' % hashlib.md5(repr(invoices).encode()).hexdigest()
+    if etag in request.META.get("HTTP_IF_NONE_MATCH", ""):
+        response = HttpResponseNotModified()
     else:
-        dues_list = [{"total_amount":invoice.total_amount_payable(),"balance":invoice.balance(),"paid":invoice.total_amount_paid()}]
-    return JsonResponse(dues_list, safe=False)
-
-
+        total_amount = sum(invoice["payable"] for invoice in invoices)
+        paid = sum(invoice["paid"] for invoice in invoices)
+        response = JsonResponse({
+            "total_amount": total_amount,
+            "paid": paid,
+            "balance": total_amount - paid,
+            "dues": list(
+                Due.objects.filter(invoice__student_id=student_id)
+                .order_by("due_date")
+                .values("id", "amount", "due_date")
+            ),
+        })
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+
+
+def _date_param(request, name):
+    """A YYYY-MM-DD query parameter as a date, None when missing or not a date"""
+    try:
+        return parse_date(request.GET.get(name) or "")
+    except ValueError:
+        return None
 
 
 def dues_list(request):
-    if request.method == "POST":
-        dues = Due.objects.filter(invoice__student__student_name__icontains = request.POST.get("student_name"))
-        return render(request,"finance/dues.html",{"dues":dues})
-    dues = Due.objects.all()
-    return render(request,"finance/dues.html",{"dues":dues})
+    today = timezone.localdate()
+    dues = Due.objects.select_related("invoice__student").order_by("due_date", "id")
+
+    student = request.GET.get("student_name", "").strip()
+    if student.isdigit():
+        dues = dues.filter(invoice__student__enrol_no=student)
+    elif student:
+        # prefix match so the student_name index can be used
+        dues = dues.filter(invoice__student__student_name__istartswith=student)
+
+    status = request.GET.get("status")
+    if status:
+        dues = dues.filter(due_status=status)
+
+    show = request.GET.get("show")
+    if show == "overdue":
+        dues = dues.filter(Due.overdue(today))
+    elif show == "week":
+        week_start = today - datetime.timedelta(days=today.weekday())
+        dues = dues.filter(due_date__range=[week_start, week_start + datetime.timedelta(days=6)])
+
+    start_date = _date_param(request, "start_date")
+    end_date = _date_param(request, "end_date")
+    if start_date:
+        dues = dues.filter(due_date__gte=start_date)
+    if end_date:
+        dues = dues.filter(due_date__lte=end_date)
+
+    page_obj = Paginator(dues, 24).get_page(request.GET.get("page"))
+    return render(request,"finance/dues.html",{
+        "dues":page_obj,
+        "page_obj":page_obj,
+        "aging":Due.aging_buckets(dues, today),
+        "filters":request.GET,
+        "status_choices":Due.due_choice,
+    })
     
 def update_due(request, due_id):
     due = get_object_or_404(Due, id=due_id)
@@ -251,56 +331,12 @@ def dashboard_view(request):
     
 
     if start_date and end_date:
-        students = Student.objects.filter(date_of_admission__range=[start_date, end_date])
-        invoices = Invoice.objects.filter(student__in=students)
-        enquiries = Enquiry.objects.filter(enquiry_date__range=[start_date,end_date])
-        if enquiries:
-            enquiry_data = {
-                'total': enquiries.count(),
-                'admitted': enquiries.filter(enquiry_status='Admitted').count(),
-                'following': enquiries.filter(enquiry_status='Following').count(),
-                'dropped': enquiries.filter(enquiry_status='Rejected').count()
-            }
-        else:
-            enquiry_data = {}
-            
-        batches = BatchModel.objects.filter(batch_status = "Active")
-        batch_count = batches.count()
-        #print(batch_count)
-        completed = 0
-        for batch in batches:
-            if batch.get_attendance_data(today):
-                completed += 1
-        batch_data = {
-            'total':batch_count,
-            'completed':completed,
-            'not_completed':(batch_count-completed)
-        }
-        
-
-        total_invoice_amount = sum(invoice.total_amount_payable() for invoice in invoices)
-        
-        total_collected_amount = invoices.aggregate(Sum('receipt__amount_paid'))['receipt__amount_paid__sum'] or 0
-        
-        total_admissions = students.count()
-        
-        avg_invoice_amount = total_invoice_amount / total_admissions if total_admissions > 0 else 0
-        
-        cr_percent = round((total_collected_amount/total_invoice_amount) * 100,2)
-
-        course_admissions = students.values('course__course_name').annotate(admission_count=Count('course')).order_by('-admission_count')
-        
-        context = {
-            'total_invoices':total_admissions,
-            'total_invoice_amount': total_invoice_amount,
-            'total_collected_amount': total_collected_amount,
-            'average_per_admission': round(avg_invoice_amount,2),
-            'cr_percent':cr_percent,
-            'course_admissions': course_admissions,
-            'students':students,
-            'enquiry_data':enquiry_data,
-            'batch_data':batch_data
-        }
+        context = get_dashboard_metrics(start_date, end_date, today)
+        page_obj = student_rows(start_date, end_date, request.GET.get('page'))
+        context.update({
+            'students':page_obj,
+            'page_obj':page_obj,
+        })
 
 
         return render(request, 'finance/finance_index.html', context)
@@ -1,19 +1,46 @@
 from django import forms
-from django.forms import modelformset_factory
+from django.db import transaction
+from django.forms import BaseModelFormSet, modelformset_factory
 
-from apps.corecode.models import AcademicSession, AcademicTerm, Subject
+from apps.corecode.models import AcademicSession, AcademicTerm, StudentClass, Subject
 
 from .models import Result
+from .utils import invalidate_result_sheets
 
 
 class CreateResults(forms.Form):
     session = forms.ModelChoiceField(queryset=AcademicSession.objects.all())
     term = forms.ModelChoiceField(queryset=AcademicTerm.objects.all())
+    current_class = forms.ModelChoiceField(queryset=StudentClass.objects.all(), label="Class")
     subjects = forms.ModelMultipleChoiceField(
         queryset=Subject.objects.all(), widget=forms.CheckboxSelectMultiple
     )
 
 
+class BaseEditResults(BaseModelFormSet):
+    def save_changes(self):
+        """
+        Persist only the rows whose scores were edited, with one bulk_update,
+        and the rows ticked for deletion, with one delete.
+        Returns the number of rows touched.
+        """
+        changed, deleted = [], []
+        for form in self.initial_forms:
+            if form.instance.pk is None:
+                # posted id outside the rows this formset was bound to
+                continue
+            if self._should_delete_form(form):
+                deleted.append(form.instance.pk)
+            elif form.has_changed():
+                changed.append(form.instance)
+        with transaction.atomic():
+            Result.objects.bulk_update(changed, ["test_score", "exam_score"], batch_size=500)
+            Result.objects.filter(pk__in=deleted).delete()
+        # bulk_update skips the post_save receivers
+        invalidate_result_sheets()
+        return len(changed) + len(deleted)
+
+
 EditResults = modelformset_factory(
-    Result, fields=("test_score", "exam_score"), extra=0, can_delete=True
+    Result, formset=BaseEditResults, fields=("test_score", "exam_score"), extra=0, can_delete=True
 )
@@ -0,0 +1,57 @@
+import pandas as pd
+from django.core.cache import cache
+
+from .models import Result
+from .utils import SHEET_VERSION_KEY, grade_series, invalidate_result_sheets
+
+TIMEOUT = 60 * 60 * 24
+COLUMNS = ["id", "student_id", "current_class_id", "test_score", "exam_score"]
+
+
+def build_sheet(session, term):
+    """
+    Totals, grades, class ranks and percentiles for a session and term.
+
+    All results are read in one query into a DataFrame and every figure is
+    computed column-wise. Returns plain dicts so the sheet can be cached:
+    ``results`` maps result id to its total and grade, ``students`` maps
+    student id to test/exam/grand totals, average, grade, rank within the
+    class, class size and percentile (share of the class at or below them).
+    """
+    rows = Result.objects.filter(session=session, term=term).order_by().values_list(*COLUMNS)
+    frame = pd.DataFrame(list(rows), columns=COLUMNS)
+    if frame.empty:
+        return {"results": {}, "students": {}}
+
+    frame["total"] = frame["test_score"] + frame["exam_score"]
+    frame["grade"] = grade_series(frame["total"])
+
+    students = frame.groupby("student_id").agg(
+        current_class_id=("current_class_id", "first"),
+        test_total=("test_score", "sum"),
+        exam_total=("exam_score", "sum"),
+        total_total=("total", "sum"),
+        average=("total", "mean"),
+    )
+    students["average"] = students["average"].round(2)
+    students["grade"] = grade_series(students["average"])
+    by_class = students.groupby("current_class_id")["total_total"]
+    students["rank"] = by_class.rank(method="min", ascending=False).astype(int)
+    students["class_size"] = by_class.transform("count")
+    students["percentile"] = (by_class.rank(method="max", pct=True) * 100).round(1)
+
+    return {
+        "results": frame.set_index("id")[["total", "grade"]].to_dict("index"),
+        "students": students.to_dict("index"),
+    }
+
+
+def get_result_sheet(session, term):
+    """build_sheet() through the cache, rebuilt whenever a result changes"""
+    version = cache.get(SHEET_VERSION_KEY) or invalidate_result_sheets()
+    key = f"result-sheet:{session.pk}:{term.pk}"
+    sheet = cache.get(key, version=version)
+    if sheet is None:
+        sheet = build_sheet(session, term)
+        cache.set(key, sheet, TIMEOUT, version=version)
+    return sheet
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:29
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_results(apps, schema_editor):
+    """Keep the first row of every (student, session, term, subject)"""
+    Result = apps.get_model("result", "Result")
+    keep = (
+        Result.objects.values("student", "session", "term", "subject")
+        .annotate(first=Min("id"))
+        .values_list("first", flat=True)
+    )
+    Result.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("result", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_results, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="result",
+            constraint=models.UniqueConstraint(
+                fields=("student", "session", "term", "subject"),
+                name="unique_result_per_subject",
+            ),
+        ),
+    ]
@@ -8,7 +8,7 @@ from apps.corecode.models import (
 )
 from apps.students.models import Student
 
-from .utils import score_grade
+from .utils import invalidate_result_sheets, score_grade
 
 
 # Create your models here.
@@ -23,6 +23,12 @@ class Result(models.Model):
 
     class Meta:
         ordering = ["subject"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["student", "session", "term", "subject"],
+                name="unique_result_per_subject",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student} {self.session} {self.term} {self.subject}"
@@ -32,3 +38,34 @@ class Result(models.Model):
 
     def grade(self):
         return score_grade(self.total_score())
+
+    @staticmethod
+    def create_missing(student_ids, subjects, session, term, current_class, batch_size=500):
+        """
+        Add an empty result for every student and subject that has none yet.
+
+        Existing keys are read in one query and the rest inserted in batches;
+        ignore_conflicts leaves rows a concurrent request added in place.
+        """
+        subjects = list(subjects)
+        student_ids = list(Student.objects.filter(pk__in=student_ids).values_list("pk", flat=True))
+        existing = set(
+            Result.objects.filter(session=session, term=term, student__in=student_ids, subject__in=subjects)
+            .values_list("student_id", "subject_id")
+        )
+        results = [
+            Result(
+                student_id=student_id,
+                session=session,
+                term=term,
+                current_class=current_class,
+                subject=subject,
+            )
+            for student_id in student_ids
+            for subject in subjects
+            if (student_id, subject.pk) not in existing
+        ]
+        Result.objects.bulk_create(results, batch_size=batch_size, ignore_conflicts=True)
+        # bulk_create skips the post_save receivers
+        invalidate_result_sheets()
+        return len(results)
@@ -1,3 +1,177 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from apps.corecode.models import AcademicSession, AcademicTerm, StudentClass, Subject, User
+from apps.course.models import CourseModel
+from apps.students.models import Student
+
+from .grading import build_sheet, get_result_sheet
+from .models import Result
+from .utils import score_grade
+
+
+class ResultListViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.session = AcademicSession.objects.create(name="2024", current=True)
+        self.term = AcademicTerm.objects.create(name="First", current=True)
+        course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+        student_class = StudentClass.objects.create(name="Morning")
+        subjects = [Subject.objects.create(name=name) for name in ("Accounts", "GST", "Payroll")]
+        self.students = [
+            Student.objects.create(student_name=name, enrol_no=enrol_no, rel_name="Ravi", rel_occupation="Farmer", address="", remark="", course=course)
+            for enrol_no, name in ((1, "Bala"), (2, "Asha"))
+        ]
+        for index, student in enumerate(self.students):
+            for subject in subjects:
+                Result.objects.create(
+                    student=student, session=self.session, term=self.term, current_class=student_class,
+                    subject=subject, test_score=10 + index, exam_score=50,
+                )
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+
+    def test_view_groups_in_two_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/result/view/all")
+        self.assertEqual(sum("result_result" in query["sql"] for query in queries), 2)
+        results = response.context["results"]
+        self.assertEqual([entry["student"].student_name for entry in results.values()], ["Asha", "Bala"])
+        self.assertEqual(len(results[self.students[0].id]["subjects"]), 3)
+        self.assertEqual(results[self.students[1].id]["test_total"], 33)
+        self.assertEqual(results[self.students[1].id]["rank"], 1)
+        self.assertContains(response, "Rank 2 of 2")
+
+
+class ResultSheetMixin:
+    def setUp(self):
+        cache.clear()
+        self.session = AcademicSession.objects.create(name="2024", current=True)
+        self.term = AcademicTerm.objects.create(name="First", current=True)
+        self.student_class = StudentClass.objects.create(name="Morning")
+        self.subjects = [Subject.objects.create(name=f"Subject {n}") for n in range(8)]
+        course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+        Student.objects.bulk_create([
+            Student(student_name=f"Student {n}", enrol_no=n, rel_name="Ravi", rel_occupation="Farmer", address="", remark="", course=course)
+            for n in range(300)
+        ])
+        self.student_ids = list(Student.objects.values_list("pk", flat=True))
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+
+
+class CreateResultTestCase(ResultSheetMixin, TestCase):
+    def test_creates_only_missing_rows(self):
+        Result.objects.create(
+            student_id=self.student_ids[0], session=self.session, term=self.term,
+            current_class=self.student_class, subject=self.subjects[0], test_score=15,
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/result/create/", {
+                "finish": "True",
+                "students": ",".join(map(str, self.student_ids)),
+                "session": self.session.pk,
+                "term": self.term.pk,
+                "current_class": self.student_class.pk,
+                "subjects": [subject.pk for subject in self.subjects],
+            })
+        self.assertRedirects(response, "/result/edit-results/", fetch_redirect_response=False)
+        self.assertEqual(Result.objects.count(), 2400)
+        self.assertEqual(Result.objects.get(student_id=self.student_ids[0], subject=self.subjects[0]).test_score, 15)
+        # students and existing keys once, then batched inserts (SQLite caps a batch at 166 rows)
+        reads = [query for query in queries if query["sql"].startswith("SELECT") and ('FROM "students_student"' in query["sql"] or 'FROM "result_result"' in query["sql"])]
+        inserts = [query for query in queries if query["sql"].startswith('INSERT INTO "result_result"')]
+        self.assertEqual(len(reads), 2)
+        self.assertLessEqual(len(inserts), 15)
+
+    def test_rerun_is_a_no_op(self):
+        args = (self.student_ids, self.subjects, self.session, self.term, self.student_class)
+        self.assertEqual(Result.create_missing(*args), 2400)
+        self.assertEqual(Result.create_missing(*args), 0)
+        self.assertEqual(Result.objects.count(), 2400)
+
+
+class EditResultsTestCase(ResultSheetMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        Result.create_missing(self.student_ids[:30], self.subjects, self.session, self.term, self.student_class)
+
+    def test_only_one_page_loaded(self):
+        response = self.client.get("/result/edit-results/", {"page": 2})
+        formset = response.context["formset"]
+        self.assertEqual(len(formset.forms), 100)
+        self.assertEqual(response.context["page_obj"].paginator.count, 240)
+
+    def test_class_filter(self):
+        response = self.client.get("/result/edit-results/", {"class": self.student_class.pk})
+        self.assertEqual(response.context["page_obj"].paginator.count, 240)
+        self.assertEqual(self.client.get("/result/edit-results/", {"class": self.student_class.pk + 1}).context["page_obj"].paginator.count, 0)
+        response = self.client.get("/result/edit-results/", {"class": "abc"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["page_obj"].paginator.count, 240)
+        self.assertIsNone(response.context["current_class"])
+
+    def test_changed_rows_bulk_updated(self):
+        formset = self.client.get("/result/edit-results/").context["formset"]
+        data = {f"form-{key}": value for key, value in formset.management_form.initial.items()}
+        for index, form in enumerate(formset.forms):
+            data[f"form-{index}-id"] = form.instance.pk
+            data[f"form-{index}-test_score"] = form.instance.test_score
+            data[f"form-{index}-exam_score"] = form.instance.exam_score
+        data["form-0-test_score"] = 18
+        data["form-1-exam_score"] = 72
+        data["form-2-DELETE"] = "on"
+        edited, deleted = formset.forms[0].instance.pk, formset.forms[2].instance.pk
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/result/edit-results/?page=1", data)
+        self.assertRedirects(response, "/result/edit-results/?page=1", fetch_redirect_response=False)
+        writes = [query["sql"] for query in queries if query["sql"].startswith(("UPDATE \"result_result\"", "DELETE FROM \"result_result\""))]
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(Result.objects.get(pk=edited).test_score, 18)
+        self.assertFalse(Result.objects.filter(pk=deleted).exists())
+        self.assertEqual(Result.objects.count(), 239)
+
+
+class GradingTestCase(ResultSheetMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_class = StudentClass.objects.create(name="Evening")
+        scores = [(20, 75), (20, 75), (10, 50), (5, 20)]
+        for student_id, (test_score, exam_score) in zip(self.student_ids, scores):
+            for subject in self.subjects[:2]:
+                Result.objects.create(
+                    student_id=student_id, session=self.session, term=self.term, current_class=self.student_class,
+                    subject=subject, test_score=test_score, exam_score=exam_score,
+                )
+        Result.objects.create(
+            student_id=self.student_ids[4], session=self.session, term=self.term, current_class=self.other_class,
+            subject=self.subjects[0], test_score=1, exam_score=1,
+        )
+
+    def test_score_grade_bands(self):
+        self.assertEqual([score_grade(score) for score in (100, 90, 89, 50, 49, 0)], ["A+", "A+", "A", "D", "F", "F"])
+        with self.settings(RESULT_GRADE_BANDS=[(40, "Pass"), (0, "Fail")]):
+            self.assertEqual(score_grade(40), "Pass")
+            self.assertEqual(score_grade(39), "Fail")
+
+    def test_ranks_and_percentiles_per_class(self):
+        with self.assertNumQueries(1):
+            students = build_sheet(self.session, self.term)["students"]
+        first, tied, third, last, alone = (students[pk] for pk in self.student_ids[:5])
+        self.assertEqual((first["total_total"], first["average"], first["grade"]), (190, 95, "A+"))
+        self.assertEqual((first["rank"], tied["rank"], third["rank"], last["rank"]), (1, 1, 3, 4))
+        self.assertEqual((first["percentile"], third["percentile"], last["percentile"]), (100, 50, 25))
+        self.assertEqual((last["grade"], last["class_size"]), ("F", 4))
+        self.assertEqual((alone["rank"], alone["class_size"]), (1, 1))
+
+    def test_sheet_cached_until_results_change(self):
+        get_result_sheet(self.session, self.term)
+        with self.assertNumQueries(0):
+            get_result_sheet(self.session, self.term)
+        result = Result.objects.filter(student_id=self.student_ids[3]).first()
+        result.exam_score = 80
+        result.save()
+        self.assertEqual(get_result_sheet(self.session, self.term)["results"][result.pk]["grade"], "A")
+        Result.create_missing(self.student_ids[5:6], self.subjects[:1], self.session, self.term, self.student_class)
+        self.assertIn(self.student_ids[5], get_result_sheet(self.session, self.term)["students"])
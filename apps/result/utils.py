@@ -1,3 +1,38 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+
+# (minimum score, grade), highest band first; override with RESULT_GRADE_BANDS
+GRADE_BANDS = [(90, "A+"), (80, "A"), (70, "B"), (60, "C"), (50, "D"), (0, "F")]
+
+SHEET_VERSION_KEY = "result-sheet:version"
+
+
+def grade_bands():
+    return sorted(getattr(settings, "RESULT_GRADE_BANDS", GRADE_BANDS), reverse=True)
+
+
 def score_grade(score):
-    if score <= 10:
-        return "A"
+    bands = grade_bands()
+    for minimum, grade in bands:
+        if score >= minimum:
+            return grade
+    return bands[-1][1]
+
+
+def grade_series(scores):
+    """score_grade() over a whole pandas Series at once"""
+    bands = grade_bands()[::-1]
+    minimums = np.array([minimum for minimum, _ in bands[1:]])
+    grades = np.array([grade for _, grade in bands], dtype=object)
+    return pd.Series(grades[np.searchsorted(minimums, scores.to_numpy(), side="right")], index=scores.index)
+
+
+def invalidate_result_sheets():
+    """Start a new version so every cached result sheet is rebuilt"""
+    version = uuid.uuid4().int
+    cache.set(SHEET_VERSION_KEY, version, None)
+    return version
@@ -1,14 +1,20 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.paginator import Paginator
 from django.shortcuts import redirect, render
+from django.urls import reverse
 from django.views.generic import DetailView, ListView, View
 
+from apps.corecode.models import StudentClass
 from apps.students.models import Student
 
 from .forms import CreateResults, EditResults
+from .grading import get_result_sheet
 from .models import Result
 
+RESULTS_PER_PAGE = 100
+
 
 @login_required
 def create_result(request):
@@ -22,31 +28,10 @@ def create_result(request):
                 subjects = form.cleaned_data["subjects"]
                 session = form.cleaned_data["session"]
                 term = form.cleaned_data["term"]
-                students = request.POST["students"]
-                results = []
-                for student in students.split(","):
-                    stu = Student.objects.get(pk=student)
-                    if stu.current_class:
-                        for subject in subjects:
-                            check = Result.objects.filter(
-                                session=session,
-                                term=term,
-                                current_class=stu.current_class,
-                                subject=subject,
-                                student=stu,
-                            ).first()
-                            if not check:
-                                results.append(
-                                    Result(
-                                        session=session,
-                                        term=term,
-                                        current_class=stu.current_class,
-                                        subject=subject,
-                                        student=stu,
-                                    )
-                                )
-
-                Result.objects.bulk_create(results)
+                current_class = form.cleaned_data["current_class"]
+                student_ids = [pk for pk in request.POST["students"].split(",") if pk.isdigit()]
+                created = Result.create_missing(student_ids, subjects, session, term, current_class)
+                messages.success(request, f"{created} results created")
                 return redirect("edit-results")
 
         # after choosing students
@@ -71,44 +56,62 @@ def create_result(request):
 
 @login_required
 def edit_results(request):
+    results = (
+        Result.objects.filter(session=request.current_session, term=request.current_term)
+        .select_related("student", "subject", "current_class")
+        .order_by("student__student_name", "student", "subject__name")
+    )
+    current_class = request.GET.get("class")
+    try:
+        results = results.filter(current_class=int(current_class))
+    except (TypeError, ValueError):
+        # no class chosen, or not a class id, lists them all
+        current_class = None
+
     if request.method == "POST":
-        form = EditResults(request.POST)
+        # bind to just the posted rows, the page may have shifted since it was rendered
+        posted = [pk for key, pk in request.POST.items() if key.endswith("-id") and pk.isdigit()]
+        form = EditResults(request.POST, queryset=results.filter(pk__in=posted))
         if form.is_valid():
-            form.save()
-            messages.success(request, "Results successfully updated")
-            return redirect("edit-results")
+            saved = form.save_changes()
+            messages.success(request, f"{saved} results successfully updated")
+            return redirect(f"{reverse('edit-results')}?{request.GET.urlencode()}")
+        page_obj = None
     else:
-        results = Result.objects.filter(
-            session=request.current_session, term=request.current_term
-        )
-        form = EditResults(queryset=results)
-    return render(request, "result/edit_results.html", {"formset": form})
+        page_obj = Paginator(results, RESULTS_PER_PAGE).get_page(request.GET.get("page"))
+        form = EditResults(queryset=page_obj.object_list)
+
+    return render(request, "result/edit_results.html", {
+        "formset": form,
+        "page_obj": page_obj,
+        "classes": StudentClass.objects.all(),
+        "current_class": current_class,
+    })
 
 
 class ResultListView(LoginRequiredMixin, View):
     def get(self, request, *args, **kwargs):
-        results = Result.objects.filter(
-            session=request.current_session, term=request.current_term
+        session, term = request.current_session, request.current_term
+        sheet = get_result_sheet(session, term)
+        results = (
+            Result.objects.filter(session=session, term=term)
+            .select_related("student", "subject")
+            .order_by("student__student_name", "student", "subject__name")
         )
-        bulk = {}
 
+        # one pass over the rows, grouped by student in name order
+        bulk = {}
         for result in results:
-            test_total = 0
-            exam_total = 0
-            subjects = []
-            for subject in results:
-                if subject.student == result.student:
-                    subjects.append(subject)
-                    test_total += subject.test_score
-                    exam_total += subject.exam_score
-
-            bulk[result.student.id] = {
-                "student": result.student,
-                "subjects": subjects,
-                "test_total": test_total,
-                "exam_total": exam_total,
-                "total_total": test_total + exam_total,
-            }
+            standing = sheet["students"].get(result.student_id)
+            graded = sheet["results"].get(result.pk)
+            if standing is None or graded is None:
+                # saved after the sheet was built
+                continue
+            if result.student_id not in bulk:
+                bulk[result.student_id] = {**standing, "student": result.student, "subjects": []}
+            result.sheet_total = graded["total"]
+            result.sheet_grade = graded["grade"]
+            bulk[result.student_id]["subjects"].append(result)
 
         context = {"results": bulk}
         return render(request, "result/all_results.html", context)
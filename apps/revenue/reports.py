@@ -0,0 +1,113 @@
+import calendar
+import csv
+import datetime
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from apps.finance.models import Receipt
+
+TOTALS = {
+    "total": Sum("amount_paid"),
+    "net": Sum("org_amount"),
+    "gst": Sum("gst_amount"),
+    "receipts": Count("id"),
+}
+
+
+def month_range(year, month):
+    return datetime.date(year, month, 1), datetime.date(year, month, calendar.monthrange(year, month)[1])
+
+
+def year_range(year):
+    return datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+
+
+def receipts_between(start_date, end_date):
+    """Receipts paid in the range, newest first, with the student for listing"""
+    receipts = Receipt.objects.select_related("invoice__student__course").order_by("-date_paid", "-id")
+    if start_date and end_date:
+        receipts = receipts.filter(date_paid__range=[start_date, end_date])
+    return receipts
+
+
+def revenue_totals(receipts):
+    """Collected amount, GST split and receipt count of a receipt queryset in one query"""
+    totals = receipts.order_by().aggregate(**TOTALS)
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def daily_revenue(receipts):
+    """One row per day with receipts: period, total, net, gst and receipt count"""
+    return list(
+        receipts.order_by()
+        .annotate(period=F("date_paid"))
+        .values("period")
+        .annotate(**TOTALS)
+        .order_by("period")
+    )
+
+
+def monthly_revenue(receipts):
+    """Same as daily_revenue() with days truncated to the first of their month"""
+    return list(
+        receipts.order_by()
+        .annotate(period=TruncMonth("date_paid"))
+        .values("period")
+        .annotate(**TOTALS)
+        .order_by("period")
+    )
+
+
+STATEMENT_HEADER = ["Date", "Bill No", "Registration Number", "Name", "Course", "Amount", "GST", "Total Amount"]
+STATEMENT_FIELDS = [
+    "date_paid",
+    "Bill_No",
+    "invoice__student__enrol_no",
+    "invoice__student__student_name",
+    "invoice__student__course__course_s_name",
+    "org_amount",
+    "gst_amount",
+    "amount_paid",
+]
+
+
+# leading characters spreadsheets read as the start of a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the csv writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def spreadsheet_safe(value):
+    """Text cells starting like a formula are prefixed with ' so spreadsheets show them as text"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def statement_csv(receipts, chunk_size=2000):
+    """
+    Yield the bill statement as CSV lines, oldest receipt first.
+
+    Rows are read as tuples one page of chunk_size at a time, each page
+    starting after the (date_paid, id) of the last row written. MySQL
+    drivers buffer a whole result set on the client, so this keeps the
+    memory used flat however long the range is.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(STATEMENT_HEADER)
+    rows = receipts.order_by("date_paid", "id").values_list("id", *STATEMENT_FIELDS)
+    page = rows
+    while True:
+        batch = list(page[:chunk_size])
+        for row in batch:
+            yield writer.writerow([spreadsheet_safe(value) for value in row[1:]])
+        if len(batch) < chunk_size:
+            break
+        last_id, last_date = batch[-1][0], batch[-1][1]
+        page = rows.filter(Q(date_paid__gt=last_date) | Q(date_paid=last_date, id__gt=last_id))
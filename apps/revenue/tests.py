@@ -1,3 +1,104 @@
+import datetime
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.corecode.models import User
+from apps.course.models import CourseModel
+from apps.finance.models import Invoice, Receipt
+from apps.staffs.models import Staff
+from apps.students.models import Student
+
+from .reports import daily_revenue, month_range, monthly_revenue, receipts_between, revenue_totals, statement_csv
+
+
+class RevenueReportTestCase(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+        staff = Staff.objects.create(name="Billing", username="billing", password="secret", address="", pincode=606001)
+        course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+        student = Student.objects.create(student_name="Asha", enrol_no=24010001, rel_name="Ravi", rel_occupation="Farmer", address="", remark="", course=course)
+        invoice = Invoice.objects.create(student=student)
+        # same month in two years, two receipts on one day
+        Receipt.objects.bulk_create([
+            Receipt(Bill_No=f"CSC{n}", invoice=invoice, received_by=staff, amount_paid=amount, date_paid=date,
+                    org_amount=round(amount / 1.18, 2), gst_amount=round(amount - amount / 1.18, 2))
+            for n, (amount, date) in enumerate([
+                (1180, datetime.date(2023, 3, 5)),
+                (590, datetime.date(2024, 3, 5)),
+                (1180, datetime.date(2024, 3, 5)),
+                (2360, datetime.date(2024, 3, 20)),
+            ])
+        ])
+
+    def test_month_does_not_mix_years(self):
+        receipts = receipts_between(*month_range(2024, 3))
+        with self.assertNumQueries(1):
+            totals = revenue_totals(receipts)
+        self.assertEqual(totals["total"], 4130)
+        self.assertEqual(totals["receipts"], 3)
+        self.assertAlmostEqual(totals["net"] + totals["gst"], 4130, places=1)
+
+    def test_daily_and_monthly_series(self):
+        receipts = receipts_between(*month_range(2024, 3))
+        self.assertEqual(
+            [(row["period"], row["total"], row["receipts"]) for row in daily_revenue(receipts)],
+            [(datetime.date(2024, 3, 5), 1770, 2), (datetime.date(2024, 3, 20), 2360, 1)],
+        )
+        self.assertEqual(
+            [(row["period"], row["total"]) for row in monthly_revenue(receipts_between(None, None))],
+            [(datetime.date(2023, 3, 1), 1180), (datetime.date(2024, 3, 1), 4130)],
+        )
+
+    def test_month_view(self):
+        response = self.client.get("/revenue/month", {"month": 3, "year": 2024})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["today_col"], 4130)
+        self.assertEqual(len(response.context["recipt"]), 3)
+        self.assertContains(response, "Asha")
+
+    def test_bad_periods_fall_back(self):
+        today = datetime.date.today()
+        for url, params in [
+            ("/revenue/month", {"month": 13, "year": 2024}),
+            ("/revenue/month", {"month": 3, "year": 0}),
+            ("/revenue/month", {"month": "march", "year": 99999}),
+            ("/revenue/year", {"year": 10000}),
+            ("/revenue/year", {"year": "-5"}),
+        ]:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, params)
+            self.assertEqual(response.context["year"], params["year"] if params["year"] == 2024 else today.year)
+        self.assertEqual(self.client.get("/revenue/month", {"month": 13, "year": 2024}).context["month"], today.month)
+
+        response = self.client.get("/revenue/revenue", {"start_date": "2024-02-30", "end_date": "2024-03-31"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context["start_date"])
+        self.assertEqual(response.context["today_col"], 5310)
+
+    def test_bill_statement(self):
+        self.assertEqual(self.client.get("/revenue/statments").status_code, 200)
+        params = {"start_date": "2024-03-01", "end_date": "2024-03-31"}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/revenue/statments", params)
+        # totals, page count and page rows
+        self.assertEqual(sum("finance_receipt" in query["sql"] for query in queries), 3)
+        self.assertEqual(response.context["total_col"], 4130)
+        self.assertEqual(len(response.context["bills"]), 3)
+
+    def test_bill_statement_csv(self):
+        response = self.client.get("/revenue/statments", {"start_date": "2024-03-01", "end_date": "2024-03-31", "export": "csv"})
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "Date,Bill No,Registration Number,Name,Course,Amount,GST,Total Amount")
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith("2024-03-05,CSC1,24010001,Asha,TALLY,"))
 
-# Create your tests here.
+    def test_statement_csv_pages_and_escapes(self):
+        Receipt.objects.filter(Bill_No="CSC3").update(Bill_No="=HYPERLINK(1)")
+        with CaptureQueriesContext(connection) as queries:
+            lines = "".join(statement_csv(receipts_between(None, None), chunk_size=2)).splitlines()
+        # two full pages and an empty one
+        self.assertEqual(len(queries), 3)
+        self.assertEqual([line.split(",")[1] for line in lines[1:]], ["CSC0", "CSC1", "CSC2", "'=HYPERLINK(1)"])
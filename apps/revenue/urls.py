@@ -5,6 +5,7 @@ from . import views
 urlpatterns = [
     path('today',views.today_income,name="today"),
     path("month", views.month_income , name="month"),
+    path("year", views.year_income , name="year"),
     path("revenue",views.all_income,name="all"),
     path("statments",views.bill_statement,name="bill_statement")
 ]
\ No newline at end of file
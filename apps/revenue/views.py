@@ -1,11 +1,21 @@
+import calendar
 import datetime
 
+from django.core.paginator import Paginator
 from django.db.models import F, Sum
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
+from django.utils.dateparse import parse_date
 
 from ..finance import models as finmod
 from ..students import models as stumod
 from apps.finance.models import Due
+from .reports import (
+    daily_revenue, month_range, monthly_revenue, receipts_between, revenue_totals, statement_csv, year_range,
+)
+
+RECEIPTS_PER_PAGE = 50
+MONTHS = list(enumerate(calendar.month_name))[1:]
 
 def get_deadline_due():
     dues = Due.objects.filter(due_date=datetime.date.today())
@@ -44,47 +54,86 @@ def today_income(request):
         "date":date,
         "today_col":total_col,
     })
+def _revenue_context(request, receipts, series):
+    page_obj = Paginator(receipts, RECEIPTS_PER_PAGE).get_page(request.GET.get('page'))
+    return {
+        "recipt":page_obj,
+        "page_obj":page_obj,
+        "totals":revenue_totals(receipts),
+        "series":series,
+    }
+
+def _int_param(request, name, default, low, high):
+    """An integer query parameter, the default when it is missing, malformed or outside low..high"""
+    try:
+        value = int(request.GET.get(name) or default)
+    except ValueError:
+        return default
+    return value if low <= value <= high else default
+
+def _date_param(request, name):
+    """A YYYY-MM-DD query parameter as a date, None when missing or not a date"""
+    try:
+        return parse_date(request.GET.get(name) or "")
+    except ValueError:
+        return None
+
 def month_income(request):
-    month = request.GET.get('month')
-    month1 = datetime.datetime.now().month
-    rec = finmod.Receipt.objects.filter(date_paid__month = month or month1)
-    total_col = rec.aggregate(total=Sum('amount_paid'))['total']
-    return render(request ,"month.html",context={
-        "recipt":rec,
-        "today_col":total_col
-    })
+    today = datetime.date.today()
+    year = _int_param(request, 'year', today.year, datetime.MINYEAR, datetime.MAXYEAR)
+    month = _int_param(request, 'month', today.month, 1, 12)
+    receipts = receipts_between(*month_range(year, month))
+    context = _revenue_context(request, receipts, daily_revenue(receipts))
+    context.update({"year":year, "month":month, "months":MONTHS, "today_col":context["totals"]["total"]})
+    return render(request ,"month.html",context=context)
+
+def year_income(request):
+    year = _int_param(request, 'year', datetime.date.today().year, datetime.MINYEAR, datetime.MAXYEAR)
+    receipts = receipts_between(*year_range(year))
+    context = _revenue_context(request, receipts, monthly_revenue(receipts))
+    context.update({"year":year, "today_col":context["totals"]["total"]})
+    return render(request ,"year.html",context=context)
+
 def all_income(request):
-    rec = finmod.Receipt.objects.all()
-    total_col = rec.aggregate(total=Sum('amount_paid'))['total']
-    return render(request ,"revenue.html",context={
-        "recipt":rec,
-        
-        "today_col":total_col
+    # a malformed date falls back to all time
+    start_date = _date_param(request, 'start_date')
+    end_date = _date_param(request, 'end_date')
+    receipts = receipts_between(start_date, end_date)
+    # a chosen range is drawn per day, all time per month
+    series = daily_revenue(receipts) if start_date and end_date else monthly_revenue(receipts)
+    context = _revenue_context(request, receipts, series)
+    context.update({
+        "start_date":start_date and start_date.isoformat(),
+        "end_date":end_date and end_date.isoformat(),
+        "today_col":context["totals"]["total"],
     })
+    return render(request ,"revenue.html",context=context)
 
 def bill_statement(req):
-    if req.method == 'POST':
-        start_date = req.POST.get('start_date')
-        end_date = req.POST.get('end_date')
-        
-        # Check if start_date and end_date are provided
-        if start_date and end_date:
-            # Parse the start_date and end_date from string to datetime.date
-            start_date = datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
-            end_date = datetime.datetime.strptime(end_date, "%Y-%m-%d").date()
-            
-            
-            
-            # Filter receipts within the date range
-            filtered_bills = finmod.Receipt.objects.filter(date_paid__range=[start_date, end_date])
-            total_col = filtered_bills.aggregate(total=Sum('amount_paid'))['total']
-            total_gst = filtered_bills.aggregate(total=Sum('gst_amount'))['total']
-            total_amm = filtered_bills.aggregate(total=Sum('org_amount'))['total']
-           
-        else:
-            filtered_bills = []
-            
-    else:
-        filtered_bills = []
-       
-    return render(req, 'today.html', {'bills': filtered_bills,'total_col':total_col,'total_gst':total_gst,'total_amm':total_amm,'startd':start_date,'endd':end_date})
+    params = req.POST if req.method == 'POST' else req.GET
+    context = {'bills':[]}
+    try:
+        start_date = datetime.datetime.strptime(params.get('start_date', ''), "%Y-%m-%d").date()
+        end_date = datetime.datetime.strptime(params.get('end_date', ''), "%Y-%m-%d").date()
+    except ValueError:
+        return render(req, 'today.html', context)
+
+    receipts = receipts_between(start_date, end_date).order_by('date_paid', 'id')
+    if params.get('export') == 'csv':
+        response = StreamingHttpResponse(statement_csv(receipts), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="bill_statement_{start_date}_{end_date}.csv"'
+        return response
+
+    totals = revenue_totals(receipts)
+    page_obj = Paginator(receipts, RECEIPTS_PER_PAGE).get_page(params.get('page'))
+    context.update({
+        'bills':page_obj,
+        'page_obj':page_obj,
+        'page_params':{'start_date':start_date.isoformat(), 'end_date':end_date.isoformat()},
+        'total_col':totals['total'],
+        'total_gst':totals['gst'],
+        'total_amm':totals['net'],
+        'startd':start_date,
+        'endd':end_date,
+    })
+    return render(req, 'today.html', context)
@@ -0,0 +1,151 @@
+import functools
+import hashlib
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import qrcode
+from django.conf import settings
+from django.core.cache import caches
+from django.urls import reverse
+from PIL import Image, ImageDraw, ImageFont
+
+# bump when the layout changes so cached cards are drawn again
+CARD_VERSION = 1
+CACHE_ALIAS = "idcards"
+CARD_SIZE = (1000, 900)
+COMPANY = "Virudhachalam   CSC"
+FONT_PATH = os.path.join(settings.BASE_DIR, "static/dist/css/arial.ttf")
+LOGO_PATH = os.path.join(settings.BASE_DIR, "static/dist/img/logoid.jpg")
+
+
+@functools.lru_cache(maxsize=None)
+def card_font():
+    return ImageFont.truetype(FONT_PATH, size=45)
+
+
+@functools.lru_cache(maxsize=None)
+def card_logo():
+    with Image.open(LOGO_PATH) as logo:
+        return logo.convert("RGB").resize((150, 120))
+
+
+def card_data(student):
+    """Everything draw_card() needs, as plain values that can go to another process"""
+    return {
+        "enrol_no": student.enrol_no,
+        "name": student.student_name,
+        "course": str(student.course),
+        "gender": student.gender,
+        "date_of_birth": str(student.date_of_birth),
+        "mobile_number": student.mobile_number,
+        "photo": student.passport.path if student.passport else None,
+        "profile_url": settings.SITE_URL.rstrip("/") + reverse("public_student_profile", args=[student.id]),
+    }
+
+
+def card_key(student):
+    """
+    Content address of a card: the student row's last change, plus the course
+    name and site URL printed on it, which change without touching the row.
+    """
+    printed = hashlib.md5(f"{student.course}|{settings.SITE_URL}".encode()).hexdigest()
+    return f"idcard:{CARD_VERSION}:{student.pk}:{student.last_updated.timestamp()}:{printed}"
+
+
+def draw_card(data):
+    """Compose an ID card in memory and return it as PNG bytes"""
+    image = Image.new("RGB", CARD_SIZE, (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    font = card_font()
+    color = "rgb(0, 0, 0)"
+
+    draw.rectangle([(0, 0), (1000, 150)], fill="red")
+    image.paste(card_logo(), (100, 25))
+    draw.text((300, 50), COMPANY, fill="rgb(255, 255, 0)", font=font)
+
+    lines = [
+        f"Roll Number: {data['enrol_no']}",
+        f"Name: {data['name']}",
+        f"Course: {data['course']}",
+        f"Gender: {data['gender']}",
+        f"Date of Birth: {data['date_of_birth']}",
+        f"Mobile Number: {data['mobile_number']}",
+    ]
+    for row, line in enumerate(lines):
+        draw.text((50, 200 + row * 100), line, fill=color, font=font)
+
+    if data["photo"] and os.path.isfile(data["photo"]):
+        with Image.open(data["photo"]) as photo:
+            image.paste(photo.convert("RGB").resize((320, 200)), (650, 200))
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(data["profile_url"])
+    qr.make(fit=True)
+    qr_image = qr.make_image(fill_color="black", back_color="white").get_image()
+    image.paste(qr_image.convert("RGB").resize((320, 400)), (650, image.height // 2))
+
+    output = io.BytesIO()
+    image.save(output, "PNG")
+    return output.getvalue()
+
+
+def render_card(student):
+    """PNG bytes of the student's card, drawn only when the row changed since"""
+    cache = caches[CACHE_ALIAS]
+    key = card_key(student)
+    png = cache.get(key)
+    if png is None:
+        png = draw_card(card_data(student))
+        cache.set(key, png)
+    return png
+
+
+def render_cards(students, workers=None):
+    """
+    PNG bytes of the cards of many students, in the given order.
+
+    Cached cards are fetched in one get_many; the rest are drawn in a process
+    pool of ID_CARD_WORKERS processes (one per CPU by default), since drawing
+    is CPU bound Python that threads would serialise on the GIL.
+    """
+    cache = caches[CACHE_ALIAS]
+    students = list(students)
+    keys = [card_key(student) for student in students]
+    cached = cache.get_many(keys)
+    missing = [(key, card_data(student)) for key, student in zip(keys, students) if key not in cached]
+    if missing:
+        workers = workers or getattr(settings, "ID_CARD_WORKERS", None) or os.cpu_count() or 1
+        data = [card for _, card in missing]
+        if workers == 1 or len(missing) < 2:
+            drawn = [draw_card(card) for card in data]
+        else:
+            with ProcessPoolExecutor(min(workers, len(missing))) as pool:
+                drawn = list(pool.map(draw_card, data, chunksize=8))
+        fresh = {key: png for (key, _), png in zip(missing, drawn)}
+        cache.set_many(fresh)
+        cached.update(fresh)
+    return [cached[key] for key in keys]
+
+
+def cards_pdf(cards):
+    """One card per page"""
+    pages = [Image.open(io.BytesIO(png)) for png in cards]
+    output = io.BytesIO()
+    pages[0].save(output, "PDF", resolution=150, save_all=True, append_images=pages[1:])
+    return output.getvalue()
+
+
+def cards_zip(cards, names):
+    output = io.BytesIO()
+    # PNG is already compressed, storing saves the CPU
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as archive:
+        for name, png in zip(names, cards):
+            archive.writestr(name, png)
+    return output.getvalue()
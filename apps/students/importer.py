@@ -0,0 +1,247 @@
+import csv
+import datetime
+import itertools
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from apps.corecode.dashboard import invalidate_dashboard
+from apps.corecode.models import Time, User
+from apps.corecode.passwords import hash_passwords
+from apps.corecode.search import index_on_commit
+from apps.course.models import CourseModel
+from apps.finance.models import Invoice, InvoiceItem
+
+from .models import Student
+
+FIELDS = [
+    "enrol_no",
+    "student_name",
+    "rel_name",
+    "rel_occupation",
+    "m_name",
+    "date_of_birth",
+    "gender",
+    "mobile_number",
+    "email",
+    "address",
+    "pincode",
+    "course",
+    "class_time",
+    "date_of_admission",
+    "total_fee",
+    "remark",
+]
+DATE_FORMATS = ["%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y"]
+OPTIONAL_FIELDS = ["m_name", "email"]
+GENDERS = {value for value, _ in Student.GENDER_CHOICES}
+
+
+def parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+    raise ValueError(f"invalid date '{value}'")
+
+
+class StudentImporter:
+    """
+    Import students from a CSV stream.
+
+    Existing enrolment numbers and usernames, courses and class timings are
+    loaded into sets and maps once, so rows are validated without queries.
+    Each chunk is written in one transaction: the login accounts, the students
+    and their timings, invoices and fee items are all bulk created, which skips
+    the per row user creation and password hashing Student.save does.
+    """
+
+    def __init__(self, chunk_size=500, workers=None):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.enrol_nos = set(Student.objects.values_list("enrol_no", flat=True))
+        self.usernames = set(User.objects.values_list("username", flat=True))
+        courses = list(CourseModel.objects.values_list("id", "course_s_name", "course_name"))
+        self.courses = {name.strip().lower(): pk for pk, _, name in courses}
+        self.courses.update({short.strip().lower(): pk for pk, short, _ in courses})
+        self.courses.update({str(pk): pk for pk, _, _ in courses})
+        self.timings = {label.strip().lower(): pk for pk, label in Time.objects.values_list("id", "time")}
+        self.errors = []
+        self.imported = 0
+        self.elapsed = 0
+
+    def run(self, stream):
+        started = time.perf_counter()
+        reader = csv.DictReader(stream)
+        line = 2  # first data row, after the header
+        while True:
+            rows = list(itertools.islice(reader, self.chunk_size))
+            if not rows:
+                break
+            self.import_chunk(rows, line)
+            line += len(rows)
+        if self.imported:
+            # bulk_create sends no post_save, so the admissions figures are stale
+            invalidate_dashboard()
+        self.elapsed = time.perf_counter() - started
+        return self
+
+    def parse_row(self, row):
+        try:
+            enrol_no = int(row.get("enrol_no") or "")
+        except ValueError:
+            raise ValueError(f"invalid enrolment number '{row.get('enrol_no')}'")
+        if enrol_no in self.enrol_nos:
+            raise ValueError(f"enrolment number {enrol_no} already exists")
+        if str(enrol_no) in self.usernames:
+            raise ValueError(f"username {enrol_no} is already taken")
+        student_name = (row.get("student_name") or "").strip()
+        if not student_name:
+            raise ValueError("missing student name")
+        course_id = self.courses.get((row.get("course") or "").strip().lower())
+        if course_id is None:
+            raise ValueError(f"unknown course '{row.get('course')}'")
+        timing_ids = []
+        for timing in (row.get("class_time") or "").split(";"):
+            if not timing.strip():
+                continue
+            try:
+                timing_ids.append(self.timings[timing.strip().lower()])
+            except KeyError:
+                raise ValueError(f"unknown class timing '{timing.strip()}'")
+        gender = (row.get("gender") or "male").strip().lower()
+        if gender not in GENDERS:
+            raise ValueError(f"invalid gender '{row.get('gender')}'")
+        try:
+            total_fee = int(float(row.get("total_fee") or 0))
+            pincode = int(row["pincode"]) if (row.get("pincode") or "").strip() else None
+        except ValueError:
+            raise ValueError("fee and pincode must be numbers")
+
+        student = Student(
+            enrol_no=enrol_no,
+            student_name=student_name,
+            rel_name=(row.get("rel_name") or "").strip(),
+            rel_occupation=(row.get("rel_occupation") or "").strip(),
+            m_name=(row.get("m_name") or "").strip(),
+            date_of_birth=parse_date((row.get("date_of_birth") or "").strip()),
+            gender=gender,
+            mobile_number=(row.get("mobile_number") or "").strip(),
+            email=(row.get("email") or "").strip(),
+            address=(row.get("address") or "").strip(),
+            pincode=pincode,
+            course_id=course_id,
+            total_fee=total_fee,
+            remark=(row.get("remark") or "").strip()[:500],
+        )
+        admitted = (row.get("date_of_admission") or "").strip()
+        if admitted:
+            student.date_of_admission = parse_date(admitted)
+        student.username = str(enrol_no)
+        student.password = student.formatted_date_of_birth()
+        # field checks only, the unique and foreign key lookups were done above
+        exclude = ["passport", "user", "if_enq", "course"]
+        # older records often have none, the admission form asks for them later
+        exclude += [field for field in OPTIONAL_FIELDS if not getattr(student, field)]
+        try:
+            student.clean_fields(exclude=exclude)
+        except ValidationError as exc:
+            raise ValueError("; ".join(
+                f"{field}: {' '.join(messages)}" for field, messages in exc.message_dict.items()
+            ))
+
+        self.enrol_nos.add(enrol_no)
+        self.usernames.add(student.username)
+        return student, timing_ids
+
+    def import_chunk(self, rows, first_line):
+        accepted = []
+        for line, row in enumerate(rows, first_line):
+            try:
+                accepted.append((line, row, self.parse_row(row)))
+            except ValueError as exc:
+                self.reject(line, row, exc)
+        if not accepted:
+            return
+        parsed = [student_and_timings for _, _, student_and_timings in accepted]
+
+        students = [student for student, _ in parsed]
+        hashes = hash_passwords([student.password for student in students], self.workers)
+        users = [
+            User(username=student.username, password=password, is_staff=False)
+            for student, password in zip(students, hashes)
+        ]
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users, batch_size=self.chunk_size)
+                # ids are read back by natural key, MySQL does not return them from bulk inserts
+                user_ids = dict(
+                    User.objects.filter(username__in=[user.username for user in users])
+                    .values_list("username", "id")
+                )
+                for student in students:
+                    student.user_id = user_ids[student.username]
+                Student.objects.bulk_create(students, batch_size=self.chunk_size)
+                student_ids = dict(
+                    Student.objects.filter(enrol_no__in=[student.enrol_no for student in students])
+                    .values_list("enrol_no", "id")
+                )
+
+                Timing = Student.class_time.through
+                Timing.objects.bulk_create(
+                    [
+                        Timing(student_id=student_ids[student.enrol_no], time_id=time_id)
+                        for student, timing_ids in parsed
+                        for time_id in timing_ids
+                    ],
+                    batch_size=self.chunk_size,
+                )
+
+                # every admitted student gets an invoice for the course fee, as in
+                # StudentCreateView
+                Invoice.objects.bulk_create(
+                    [Invoice(student_id=pk) for pk in student_ids.values()],
+                    batch_size=self.chunk_size,
+                )
+                invoice_ids = (
+                    Invoice.objects.filter(student_id__in=student_ids.values())
+                    .order_by()
+                    .values_list("student_id", "id")
+                )
+                fees = {student_ids[student.enrol_no]: student.total_fee for student in students}
+                InvoiceItem.objects.bulk_create(
+                    [
+                        InvoiceItem(invoice_id=invoice_id, description="Total Fee", amount=fees[student_id])
+                        for student_id, invoice_id in invoice_ids
+                    ],
+                    batch_size=self.chunk_size,
+                )
+                # bulk_create skips the receivers that keep the search index in sync
+                index_on_commit(queryset=Student.objects.filter(pk__in=list(student_ids.values())))
+        except DatabaseError as exc:
+            # the chunk was rolled back, e.g. a student enrolled meanwhile with
+            # the same number; report its rows and go on with the next one
+            for line, row, (student, _) in accepted:
+                self.enrol_nos.discard(student.enrol_no)
+                self.usernames.discard(student.username)
+                self.reject(line, row, f"not saved: {exc}")
+            return
+        self.imported += len(students)
+
+    def reject(self, line, row, error):
+        self.errors.append([line] + [row.get(field) for field in FIELDS] + [str(error)])
+
+    def write_errors(self, stream):
+        writer = csv.writer(stream)
+        writer.writerow(["line"] + FIELDS + ["error"])
+        writer.writerows(self.errors)
+
+    def summary(self):
+        rate = self.imported / self.elapsed if self.elapsed else 0
+        return (
+            f"{self.imported} students imported, {len(self.errors)} rows rejected "
+            f"in {self.elapsed:.1f}s ({rate:.0f} rows/s)"
+        )
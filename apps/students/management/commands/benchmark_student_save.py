@@ -0,0 +1,50 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.course.models import CourseModel
+from apps.students.models import Student
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Time Student.save with and without a change to the login, nothing is kept"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=20, help="saves per case")
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        try:
+            with transaction.atomic():
+                course = CourseModel.objects.first() or CourseModel.objects.create(
+                    course_name="Benchmark", course_s_name="BENCH", course_duration="1", course_fee=0
+                )
+                student = Student.objects.create(
+                    student_name="Benchmark", enrol_no=-1, rel_name="", rel_occupation="",
+                    address="", remark="", course=course, date_of_birth=datetime.date(2000, 1, 1),
+                )
+                student = Student.objects.get(pk=student.pk)
+
+                def unchanged(i):
+                    student.remark = str(i)
+
+                def new_birth_date(i):
+                    # what every save cost before the change detection
+                    student.date_of_birth = datetime.date(2000, 1, 1) + datetime.timedelta(days=i + 1)
+
+                for label, change in (("login unchanged", unchanged), ("login changed", new_birth_date)):
+                    started = time.perf_counter()
+                    for i in range(count):
+                        change(i)
+                        student.save()
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(f"{label}: {count} saves, {elapsed / count * 1000:.1f}ms per save")
+                raise Rollback
+        except Rollback:
+            pass
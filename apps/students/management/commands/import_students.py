@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.students.importer import FIELDS, StudentImporter
+
+
+class Command(BaseCommand):
+    help = f"Import students from a CSV file with columns: {', '.join(FIELDS)}"
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_file")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--errors", help="where to write rejected rows (default: <csv_file>.errors.csv)"
+        )
+
+    def handle(self, *args, **options):
+        importer = StudentImporter(chunk_size=options["chunk_size"])
+        with open(options["csv_file"], newline="", encoding="utf-8-sig") as stream:
+            importer.run(stream)
+
+        self.stdout.write(importer.summary())
+        if importer.errors:
+            errors_path = options["errors"] or f"{options['csv_file']}.errors.csv"
+            with open(errors_path, "w", newline="") as stream:
+                importer.write_errors(stream)
+            self.stdout.write(f"Rejected rows written to {errors_path}")
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0007_alter_student_password_alter_student_username"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["student_name"], name="students_st_student_17bfc4_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0008_student_students_st_student_17bfc4_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="studentbulkupload",
+            name="error_report",
+            field=models.FileField(blank=True, upload_to="students/bulkupload/errors/"),
+        ),
+        migrations.AddField(
+            model_name="studentbulkupload",
+            name="summary",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("corecode", "0007_sequence"),
+        ("course", "0003_alter_coursemodel_course_duration"),
+        ("enquiry", "0014_enquiry_enquiry_enq_name_774d27_idx_and_more"),
+        ("students", "0009_studentbulkupload_error_report_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["mobile_number"], name="students_st_mobile__e128af_idx"
+            ),
+        ),
+    ]
@@ -107,6 +107,7 @@ class Student(models.Model):
     
     class Meta:
         ordering = ["enrol_no"]
+        indexes = [models.Index(fields=["student_name"]), models.Index(fields=["mobile_number"])]
 
     def __str__(self):
         return f"{self.student_name}({self.enrol_no})"
@@ -116,17 +117,31 @@ class Student(models.Model):
     
 
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # login as loaded, deferred fields count as changed
+        instance._saved_login = (instance.__dict__.get("enrol_no"), instance.__dict__.get("date_of_birth"))
+        return instance
+
+    def login_changed(self):
+        """Whether enrol_no or date_of_birth moved since the row was loaded or saved"""
+        return getattr(self, "_saved_login", None) != (self.enrol_no, self.date_of_birth)
+
     def save(self, *args,from_save_update = True, **kwargs):
         if from_save_update:
             self.username = self.enrol_no
             self.password = self.formatted_date_of_birth()
-            if not self.user:
+            if not self.user_id:
                 self.user = User.objects.create_user(username=self.enrol_no,password=self.formatted_date_of_birth(),is_staff=False)
-            else:
+            elif self.login_changed():
+                # hashing the password costs a full PBKDF2 run, only redo it
+                # when the login the user is derived from changed
                 self.user.username = self.enrol_no
                 self.user.set_password(self.formatted_date_of_birth())
-                self.user.save()
+                self.user.save(update_fields=["username", "password"])
             super().save(*args, **kwargs)
+            self._saved_login = (self.enrol_no, self.date_of_birth)
         elif from_save_update == False:
             self.user.delete()
             self.user = None
@@ -252,3 +267,5 @@ class Certificatemodel(models.Model):
 class StudentBulkUpload(models.Model):
     date_uploaded = models.DateTimeField(auto_now=True)
     csv_file = models.FileField(upload_to="students/bulkupload/")
+    summary = models.CharField(max_length=255, blank=True)
+    error_report = models.FileField(blank=True, upload_to="students/bulkupload/errors/")
@@ -0,0 +1,57 @@
+import uuid
+
+from django.core.cache import cache
+from django.db.models import F
+
+from apps.finance.models import Due, Invoice
+
+from .models import Bookmodel, Certificatemodel, Classmodel, Exammodel
+
+VERSION_KEY = "student-profile:version"
+TIMEOUT = 60 * 60
+
+
+def load_profile(student):
+    """
+    Everything the student pages list besides the student row itself.
+
+    Seven queries whatever the history: the invoices with their payable,
+    paid and balance totals annotated, the dues of those invoices, the four
+    logs with the rows they show joined in, and the class timings.
+    """
+    invoices = Invoice.with_totals(Invoice.objects.filter(student=student)).annotate(
+        balance_due=F("payable") - F("paid")
+    )
+    return {
+        "payments": list(invoices.order_by("id")),
+        "dues": list(Due.objects.filter(invoice__student=student).select_related("invoice__student")),
+        "booklog": list(Bookmodel.objects.filter(student=student).select_related("received_book", "handled_by")),
+        "classlog": list(Classmodel.objects.filter(student=student).select_related("class_time", "faculty")),
+        "examlog": list(Exammodel.objects.filter(student=student).select_related("subject")),
+        "certilog": list(Certificatemodel.objects.filter(student=student).select_related("course", "issued_by")),
+        "class_times": list(student.class_time.all()),
+    }
+
+
+def get_profile(student):
+    """load_profile() through the cache, until a write to the student's rows"""
+    version = cache.get(VERSION_KEY) or invalidate_student_profiles()
+    key = f"student-profile:{student.pk}"
+    profile = cache.get(key, version=version)
+    if profile is None:
+        profile = load_profile(student)
+        cache.set(key, profile, TIMEOUT, version=version)
+    return profile
+
+
+def invalidate_student_profile(student_id):
+    version = cache.get(VERSION_KEY)
+    if version is not None:
+        cache.delete(f"student-profile:{student_id}", version=version)
+
+
+def invalidate_student_profiles():
+    """Start a new version so every cached profile is loaded again"""
+    version = uuid.uuid4().int
+    cache.set(VERSION_KEY, version, None)
+    return version
@@ -1,71 +1,32 @@
-import csv
+import io
 import os
-from io import StringIO
 
+from django.core.files.base import ContentFile
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from apps.corecode.models import StudentClass
-
+from .importer import StudentImporter
 from .models import Student, StudentBulkUpload
 
 
 @receiver(post_save, sender=StudentBulkUpload)
 def create_bulk_student(sender, created, instance, *args, **kwargs):
     if created:
-        opened = StringIO(instance.csv_file.read().decode())
-        reading = csv.DictReader(opened, delimiter=",")
-        students = []
-        for row in reading:
-            if "registration_number" in row and row["registration_number"]:
-                reg = row["registration_number"]
-                surname = row["surname"] if "surname" in row and row["surname"] else ""
-                firstname = (
-                    row["firstname"] if "firstname" in row and row["firstname"] else ""
-                )
-                other_names = (
-                    row["other_names"]
-                    if "other_names" in row and row["other_names"]
-                    else ""
-                )
-                gender = (
-                    (row["gender"]).lower() if "gender" in row and row["gender"] else ""
-                )
-                phone = (
-                    row["parent_number"]
-                    if "parent_number" in row and row["parent_number"]
-                    else ""
-                )
-                address = row["address"] if "address" in row and row["address"] else ""
-                current_class = (
-                    row["current_class"]
-                    if "current_class" in row and row["current_class"]
-                    else ""
-                )
-                if current_class:
-                    theclass, kind = StudentClass.objects.get_or_create(
-                        name=current_class
-                    )
-
-                check = Student.objects.filter(registration_number=reg).exists()
-                if not check:
-                    students.append(
-                        Student(
-                            registration_number=reg,
-                            surname=surname,
-                            firstname=firstname,
-                            other_name=other_names,
-                            gender=gender,
-                            current_class=theclass,
-                            parent_mobile_number=phone,
-                            address=address,
-                            current_status="active",
-                        )
-                    )
-
-        Student.objects.bulk_create(students)
-        instance.csv_file.close()
-        instance.delete()
+        instance.csv_file.open("rb")
+        try:
+            # decoded line by line as the reader asks for rows, never held whole
+            stream = io.TextIOWrapper(instance.csv_file.file, encoding="utf-8-sig", newline="")
+            importer = StudentImporter().run(stream)
+        finally:
+            instance.csv_file.close()
+
+        instance.summary = importer.summary()
+        if importer.errors:
+            report = io.StringIO()
+            importer.write_errors(report)
+            name = f"{os.path.splitext(os.path.basename(instance.csv_file.name))[0]}.errors.csv"
+            instance.error_report.save(name, ContentFile(report.getvalue().encode()), save=False)
+        instance.save(update_fields=["summary", "error_report"])
 
 
 def _delete_file(path):
@@ -78,6 +39,8 @@ def _delete_file(path):
 def delete_csv_file(sender, instance, *args, **kwargs):
     if instance.csv_file:
         _delete_file(instance.csv_file.path)
+    if instance.error_report:
+        _delete_file(instance.error_report.path)
 
 
 @receiver(post_delete, sender=Student)
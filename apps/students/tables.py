@@ -0,0 +1,30 @@
+from django.db.models import Q
+from django.urls import reverse
+
+from apps.corecode.datatables import Column, ServerSideTable
+
+from .models import Student
+
+
+def enrol_no_search(term):
+    return Q(enrol_no=int(term)) if term.isdigit() else None
+
+
+class StudentTable(ServerSideTable):
+    columns = [
+        Column("Fullname", lambda student: student.student_name, "student_name", "student_name__istartswith"),
+        Column("Registration Number", lambda student: student.enrol_no, "enrol_no", enrol_no_search),
+        Column("Current Class", lambda student: student.course.course_s_name, "course__course_s_name"),
+        Column("Gender", lambda student: student.gender, "gender"),
+        Column("Mobile Phone Number", lambda student: student.mobile_number, "mobile_number", "mobile_number__startswith"),
+        Column("Status", lambda student: student.get_current_status_display(), "current_status"),
+    ]
+    default_order = ["enrol_no"]
+
+    def get_queryset(self, request):
+        return Student.objects.select_related("course").only(
+            "student_name", "enrol_no", "gender", "mobile_number", "current_status", "course__course_s_name"
+        )
+
+    def row_attrs(self, student):
+        return {"data-href": reverse("student-detail", args=[student.pk])}
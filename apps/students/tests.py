@@ -1,3 +1,285 @@
-from django.test import TestCase
+import datetime
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from PIL import Image
+
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.batch.models import BatchModel
+from apps.corecode.models import Sequence, Subject, Time, User
+from apps.course.models import CourseModel
+from apps.enquiry.models import Enquiry
+from apps.finance.models import Due, Invoice, InvoiceItem
+from apps.staffs.models import Staff
+
+from .idcards import card_key, render_card
+from .importer import StudentImporter
+from .models import Exammodel, Student, StudentBulkUpload
+from .profile import get_profile
+
+HEADER = "enrol_no,student_name,rel_name,rel_occupation,date_of_birth,gender,course,class_time,total_fee\n"
+
+
+class StudentImportTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+        self.morning = Time.objects.create(time="9-10")
+        self.evening = Time.objects.create(time="5-6")
+        Student.objects.create(student_name="Asha", enrol_no=24010001, rel_name="Ravi", rel_occupation="Farmer", address="", remark="", course=self.course)
+
+    def test_import_with_errors(self):
+        csv_data = StringIO(
+            HEADER
+            + "24010002,Bala,Kumar,Driver,2001-04-05,male,tally,9-10;5-6,5000\n"
+            + "24010003,Chitra,Mani,Clerk,06/07/2002,female,Tally,,4000\n"
+            + "24010001,Asha,Ravi,Farmer,2001-01-01,female,TALLY,,5000\n"
+            + "24010003,Chitra,Mani,Clerk,2002-07-06,female,TALLY,,4000\n"
+            + "24010004,Devi,Mani,Clerk,2002-07-06,female,MS Office,,4000\n"
+            + "24010005,Ezhil,Mani,Clerk,2002-07-06,female,TALLY,7-8,4000\n"
+        )
+        importer = StudentImporter(chunk_size=2).run(csv_data)
+        self.assertEqual(importer.imported, 2)
+        self.assertEqual([error[0] for error in importer.errors], [4, 5, 6, 7])
+
+        bala = Student.objects.get(enrol_no=24010002)
+        self.assertEqual(set(bala.class_time.all()), {self.morning, self.evening})
+        self.assertEqual(bala.user.username, "24010002")
+        self.assertTrue(bala.user.check_password("05042001"))
+        self.assertEqual(Student.objects.get(enrol_no=24010003).user.username, "24010003")
+        invoice = Invoice.objects.get(student=bala)
+        self.assertEqual(InvoiceItem.objects.get(invoice=invoice).amount, 5000)
+
+        report = StringIO()
+        importer.write_errors(report)
+        self.assertIn("already exists", report.getvalue())
+        self.assertIn("unknown class timing", report.getvalue())
+
+    @override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+    def test_student_enrolled_meanwhile_rejects_its_chunk(self):
+        importer = StudentImporter(chunk_size=1)
+        # admitted through the form after the importer loaded the numbers in use
+        Student.objects.create(student_name="Chitra", enrol_no=24010003, rel_name="Mani", rel_occupation="Clerk", address="", remark="", course=self.course)
+        importer.run(StringIO(
+            HEADER
+            + "24010002,Bala,Kumar,Driver,2001-04-05,male,TALLY,,5000\n"
+            + "24010003,Chitra,Mani,Clerk,2002-07-06,female,TALLY,,4000\n"
+            + "24010004,Devi,Mani,Clerk,2002-07-06,female,TALLY,,4000\n"
+        ))
+        self.assertEqual(importer.imported, 2)
+        self.assertEqual([error[0] for error in importer.errors], [3])
+        self.assertIn("not saved", importer.errors[0][-1])
+        self.assertEqual(Student.objects.get(enrol_no=24010003).student_name, "Chitra")
+        self.assertFalse(Invoice.objects.filter(student__enrol_no=24010003).exists())
+
+    @override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+    def test_queries_do_not_grow_with_rows(self):
+        def import_rows(first, count):
+            rows = "".join(
+                f"{enrol_no},Student {enrol_no},Parent,Farmer,2001-04-05,male,TALLY,9-10,5000\n"
+                for enrol_no in range(first, first + count)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                StudentImporter(chunk_size=1000).run(StringIO(HEADER + rows))
+            return len(queries)
+
+        self.assertEqual(import_rows(25000000, 2), import_rows(26000000, 20))
+        self.assertEqual(User.objects.filter(student_profile__isnull=False).count(), 23)
+
+    def test_upload_writes_summary_and_error_report(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        csv_file = SimpleUploadedFile(
+            "students.csv",
+            (HEADER + "24010002,Bala,Kumar,Driver,2001-04-05,male,TALLY,,5000\n"
+             + "24010009,,Kumar,Driver,2001-04-05,male,TALLY,,5000\n").encode(),
+        )
+        with override_settings(MEDIA_ROOT=media_root):
+            upload = StudentBulkUpload.objects.create(csv_file=csv_file)
+            upload.refresh_from_db()
+            self.assertTrue(upload.summary.startswith("1 students imported, 1 rows rejected"))
+            with upload.error_report.open("r") as report:
+                self.assertIn("missing student name", report.read())
+
+
+class StudentSaveTestCase(TestCase):
+    def setUp(self):
+        course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+        student = Student.objects.create(
+            student_name="Asha", enrol_no=24010001, rel_name="Ravi", rel_occupation="Farmer",
+            address="", remark="", course=course, date_of_birth=datetime.date(2001, 4, 5),
+        )
+        self.student = Student.objects.get(pk=student.pk)
+
+    def user_writes(self, change):
+        with CaptureQueriesContext(connection) as queries:
+            change(self.student)
+            self.student.save()
+        return [query for query in queries if query["sql"].startswith('UPDATE "corecode_user"')]
+
+    def test_unchanged_login_keeps_password(self):
+        password = self.student.user.password
+        self.assertEqual(self.user_writes(lambda student: setattr(student, "remark", "moved")), [])
+        self.student.user.refresh_from_db()
+        self.assertEqual(self.student.user.password, password)
+
+    def test_new_birth_date_resets_password(self):
+        def change(student):
+            student.date_of_birth = datetime.date(2001, 5, 6)
+
+        self.assertEqual(len(self.user_writes(change)), 1)
+        self.assertTrue(User.objects.get(pk=self.student.user_id).check_password("06052001"))
+        # saved again without a change, the new login is the baseline now
+        self.assertEqual(self.user_writes(lambda student: None), [])
+
+
+class IdCardTestCase(TestCase):
+    def setUp(self):
+        caches["idcards"].clear()
+        course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+        self.students = [
+            Student.objects.create(
+                student_name=name, enrol_no=enrol_no, rel_name="Ravi", rel_occupation="Farmer",
+                address="", remark="", course=course,
+            )
+            for enrol_no, name in [(24010002, "Bala"), (24010001, "Asha")]
+        ]
+        staff = Staff.objects.create(name="Trainer", username="trainer", password="secret", address="", pincode=606001)
+        self.batch = BatchModel.objects.create(
+            batch_status="Active", batch_id="B1", batch_course=Subject.objects.create(name="Tally"),
+            batch_staff=staff, batch_timing=Time.objects.create(time="9-10"),
+        )
+        self.batch.batch_students.set(self.students)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+
+    def test_card_cached_until_student_changes(self):
+        cards = caches["idcards"]
+        student = self.students[0]
+        png = render_card(student)
+        self.assertTrue(png.startswith(b"\x89PNG"))
+        self.assertEqual(cards.get(card_key(student)), png)
+
+        student.mobile_number = "9876543210"
+        student.save()
+        self.assertIsNone(cards.get(card_key(student)))
+        self.assertNotEqual(render_card(student), png)
+
+    def test_course_rename_and_host_header(self):
+        student = Student.objects.select_related("course").get(pk=self.students[0].pk)
+        key = card_key(student)
+        # the QR code points at SITE_URL whatever Host the request claims
+        self.client.get(f"/student/generate_student_id_card/{student.pk}/", HTTP_HOST="attacker.example")
+        self.assertIsNotNone(caches["idcards"].get(key))
+
+        student.course.course_s_name = "TALLY PRIME"
+        student.course.save()
+        student = Student.objects.select_related("course").get(pk=student.pk)
+        self.assertNotEqual(card_key(student), key)
+
+    def test_batch_pdf_and_zip(self):
+        response = self.client.get(f"/student/id_cards/batch/{self.batch.pk}/")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response.content.count(b"/Type /Page\n"), 2)
+
+        response = self.client.get(f"/student/id_cards/batch/{self.batch.pk}/?format=zip")
+        with zipfile.ZipFile(BytesIO(response.content)) as archive:
+            self.assertEqual(archive.namelist(), ["24010001.png", "24010002.png"])
+
+
+class StudentProfileTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+        self.staff = Staff.objects.create(name="Trainer", username="trainer", password="secret", address="", pincode=606001)
+        self.students = Student.objects.bulk_create(
+            Student(student_name=name, enrol_no=enrol_no, rel_name="Ravi", rel_occupation="Farmer", address="", remark="", course=course)
+            for enrol_no, name in [(24010001, "Asha"), (24010002, "Bala")]
+        )
+        self.student = Student.objects.get(enrol_no=24010001)
+        for student in Student.objects.all():
+            invoice = Invoice.objects.create(student=student)
+            InvoiceItem.objects.create(invoice=invoice, description="Total Fee", amount=5000)
+            Due.objects.create(invoice=invoice, amount=3000, due_date=datetime.date(2024, 1, 31))
+        self.subject = Subject.objects.create(name="Tally")
+        for _ in range(3):
+            Exammodel.objects.create(student=self.student, subject=self.subject, paratical_mark=40, mark=80, remark="")
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+
+    def test_fixed_queries_and_own_dues_only(self):
+        with self.assertNumQueries(7):
+            profile = get_profile(self.student)
+        self.assertEqual(len(profile["dues"]), 1)
+        self.assertEqual(len(profile["examlog"]), 3)
+        self.assertEqual((profile["payments"][0].payable, profile["payments"][0].balance_due), (5000, 5000))
+        with self.assertNumQueries(0):
+            get_profile(self.student)
+
+    def test_invalidated_on_writes(self):
+        get_profile(self.student)
+        InvoiceItem.objects.create(invoice=self.student.invoice_set.get(), description="Exam Fee", amount=500)
+        self.assertEqual(get_profile(self.student)["payments"][0].payable, 5500)
+        Exammodel.objects.filter(student=self.student).first().delete()
+        self.assertEqual(len(get_profile(self.student)["examlog"]), 2)
+
+    def test_detail_page(self):
+        response = self.client.get(f"/student/{self.student.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["dues"]), 1)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class StudentCreateViewTestCase(TestCase):
+    def setUp(self):
+        staff = Staff.objects.create(name="Counsellor", username="counsellor", password="secret", address="", pincode=606001)
+        self.enquiry = Enquiry.objects.create(name="Kavya", address="Main Road", counsellor=staff)
+        self.course = CourseModel.objects.create(course_name="Tally", course_s_name="TALLY", course_duration="60", course_fee=5000)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret"))
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        photo = BytesIO()
+        Image.new("RGB", (4, 4)).save(photo, "PNG")
+        self.photo = photo.getvalue()
+
+    def post(self, enrol_no, suggested=None):
+        data = {
+            "student_name": "Kavya", "enrol_no": enrol_no, "rel_name": "Ravi", "rel_occupation": "Farmer",
+            "date_of_birth": "2004-05-06", "age": 20, "gender": "female", "religion": "Hindu", "community": "OC",
+            "occupation": "Student", "email": "kavya@example.com", "date_of_admission": "2024-06-01",
+            "course": self.course.pk, "total_fee": 5000, "current_status": "active",
+            "if_enq": self.enquiry.pk, "m_name": "Lakshmi", "address": "Main Road", "remark": "",
+            "passport": SimpleUploadedFile("kavya.png", self.photo),
+        }
+        if suggested:
+            data["suggested_enrol_no"] = suggested
+        return self.client.post(f"/student/create/{self.enquiry.pk}/", data)
+
+    def test_form_only_previews_the_enrolment_number(self):
+        numbers = [
+            self.client.get(f"/student/create/{self.enquiry.pk}/").context["form"].initial["enrol_no"]
+            for _ in range(2)
+        ]
+        self.assertEqual(numbers[0], numbers[1])
+        self.assertFalse(Sequence.objects.filter(name="enrolment").exists())
+
+    def test_forms_opened_together_get_their_own_numbers(self):
+        suggested = self.client.get(f"/student/create/{self.enquiry.pk}/").context["suggested_enrol_no"]
+        self.assertEqual(self.post(suggested, suggested=suggested).status_code, 302)
+        self.assertEqual(self.post(suggested, suggested=suggested).status_code, 302)
+        self.assertEqual(Student.objects.count(), 2)
+        self.assertIn(int(suggested), Student.objects.values_list("enrol_no", flat=True))
+
+    def test_typed_number_moves_the_counter(self):
+        suggested = self.client.get(f"/student/create/{self.enquiry.pk}/").context["suggested_enrol_no"]
+        typed = int(suggested) + 10
+        self.assertEqual(self.post(typed, suggested=suggested).status_code, 302)
+        self.assertEqual(self.client.get(f"/student/create/{self.enquiry.pk}/").context["suggested_enrol_no"], str(typed + 1))
@@ -20,11 +20,13 @@ from .views import (
     CreateCertificateLog,
     PublicView,
     generate_student_id_card,
+    batch_id_cards,
     
 )
 
 urlpatterns = [
     path('generate_student_id_card/<int:student_id>/', generate_student_id_card, name='generate_student_id_card'),
+    path('id_cards/batch/<int:batch_id>/', batch_id_cards, name='batch_id_cards'),
     path("",Studentdashboard,name="dashboard"),
     path('select_enquiry/', select_enquiry, name='select_enquiry'),
     path("list", StudentListView.slist, name="student-list"),
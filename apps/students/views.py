@@ -3,6 +3,7 @@ from django.core.exceptions import ValidationError
 from django.contrib.auth.mixins import AccessMixin
 from datetime import datetime
 from django import forms
+from django.db import transaction
 from django.http import HttpResponse
 from PIL import Image
 import qrcode
@@ -32,120 +33,50 @@ from ..finance.models import Invoice,InvoiceItem
 from django.views.generic import DetailView
 from apps.finance.models import Invoice,Due
 from ..enquiry.models import *
+from .idcards import cards_pdf, cards_zip, render_card, render_cards
+from .importer import FIELDS as STUDENT_IMPORT_FIELDS
+from .profile import get_profile
+from .tables import StudentTable
 from .models import Student, StudentBulkUpload,Bookmodel,Classmodel,Exammodel,Certificatemodel
 from django.utils.decorators import method_decorator
 from apps.corecode.views import student_entry_resricted,staff_student_entry_restricted,different_user_restricted
 from django.contrib.auth.decorators import login_required
 from apps.batch.models import BatchModel
-from apps.attendancev2.dashboard import DashboardManager
-from apps.attendancev2.manager import AttendanceManager
+from apps.attendancev2.public import get_public_attendance
 from django.core.serializers import serialize
-from csc_app.settings import db
 from apps.corecode.models import User
+from apps.corecode.sequences import claim_number, next_number, preview_number
+from apps.corecode.datatables import render_table
+
+ENROLMENT_TEMPLATE = "{yy}{mm}{n:04d}"
+
 
 def generate_student_id_card(request,student_id):
-        # Create a blank image
-    image = Image.new('RGB', (1000, 900), (255, 255, 255))
-    draw = ImageDraw.Draw(image)
-    student = Student.objects.get(id=student_id)
-    
+    student = get_object_or_404(Student.objects.select_related("course"), id=student_id)
+    response = HttpResponse(render_card(student), content_type='image/png')
+    response['Content-Disposition'] = 'attachment; filename=student_id_card.png'
+    return response
 
-# Get the path of the system font
-
-    font_path = os.path.join(settings.BASE_DIR, 'static/dist/css/arial.ttf')
-    # Use the system font for ImageFont
-    font = ImageFont.truetype(font_path, size=45)
-
-
-    d_date = datetime.datetime.now()
-    reg_format_date = d_date.strftime("  %d-%m-%Y\t\t\t\t\t ID CARD Generator\t\t\t\t\t  %I:%M:%S %p")
-
-    # Company Name
-    text_color = 'rgb(255, 255, 0)'  # yellow color
-    background_color = 'rgb(255, 0, 0)'  # red color
-    draw.rectangle([(0, 0), (1000, 150)], fill='red')
-    (x, y) = (300, 50)
-    logo_path = os.path.join(settings.BASE_DIR, "static/dist/img/logoid.jpg")
-    logo = Image.open(logo_path)
-    logo = logo.resize((150, 120))  # Resize the logo as needed
-    image.paste(logo, (100, 25))  # Paste the logo at the desired location
-    company = "Virudhachalam   CSC"
-    color = 'rgb(0, 0, 0)' # black color
-    draw.text((x, y), company, fill=text_color, font=font)
-
-    # ID Number
-    (x, y) = (50, 200)
-    idno = student.enrol_no
-    message = str('Roll Number: ' + str(idno))
-    draw.text((x, y), message, fill=color, font=font)
-
-    # Name
-    (x, y) = (50, 300)
-    name = student.student_name
-    fname = str('Name: ' + str(name))
-    draw.text((x, y), fname, fill=color, font=font)
-
-    (x, y) = (50, 400)
-    name = student.course
-    fname = str('Course: ' + str(name))
-    draw.text((x, y), fname, fill=color, font=font)
-
-    # Gender
-    (x, y) = (50, 500)
-    gender = student.gender
-    fgender = str('Gender: ' + str(gender))
-    draw.text((x, y), fgender, fill=color, font=font)
-
-    # DOB
-    (x, y) = (50, 600)
-    dob = student.date_of_birth
-    fdob = str('Date of Birth: ' + str(dob))
-    draw.text((x, y), fdob, fill=color, font=font)
-
-    # Blood Group
-
-    # Mobile Number
-    (x, y) = (50, 700)
-    mobile_number = student.mobile_number
-    fmobile_number = str('Mobile Number: ' + str(mobile_number))
-    draw.text((x, y), fmobile_number, fill=color, font=font)
-
-
-    # Save the edited image
-    image_path = os.path.join(settings.BASE_DIR, "media/idcards", f"student_id_card_{student_id}.png")
-    image.save(image_path)
-
-    # Generate QR code
-    public_student_profile_url = reverse('public_student_profile', args=[student.id])
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(request.get_host() + public_student_profile_url)
-    qr.make(fit=True)
-    qr_image = qr.make_image(fill_color="black", back_color="white")
-
-    qr_path = os.path.join('media/qrcodes', f'qr_code{student_id}.png')
-    qr_image.save(qr_path)
-
-    # Paste QR code onto the ID card
-    if student.passport.path:
-        student_photo = Image.open(student.passport.path)
-    id_card = Image.open(image_path)
-    qr_code = Image.open(qr_path)
-    student_photo = student_photo.resize((320, 200))
-    qr_code = qr_code.resize((320, 400))
-    id_card.paste(student_photo,(650,200))
-    id_card.paste(qr_code, (650, id_card.height // 2))
-    id_card.save(image_path)
-
-    # Serve the image as a downloadable file
-    with open(image_path, 'rb') as file:
-        response = HttpResponse(file.read(), content_type='image/png')
-        response['Content-Disposition'] = 'attachment; filename=student_id_card.png'
+
+@login_required
+@student_entry_resricted()
+def batch_id_cards(request, batch_id):
+    """Every card of a batch as one printable PDF, or a ZIP of PNGs with ?format=zip"""
+    batch = get_object_or_404(BatchModel, pk=batch_id)
+    students = list(batch.batch_students.select_related("course").order_by("enrol_no"))
+    if not students:
+        raise Http404("Batch has no students")
+    cards = render_cards(students)
+    if request.GET.get("format") == "zip":
+        names = [f"{student.enrol_no}.png" for student in students]
+        response = HttpResponse(cards_zip(cards, names), content_type="application/zip")
+        response["Content-Disposition"] = f'attachment; filename="id_cards_{batch.batch_id}.zip"'
+    else:
+        response = HttpResponse(cards_pdf(cards), content_type="application/pdf")
+        response["Content-Disposition"] = f'attachment; filename="id_cards_{batch.batch_id}.pdf"'
     return response
+
+
 def handler404(request, exception):
     return render(request, '404.html', status=404)
 
@@ -155,7 +86,7 @@ class StudentListView(LoginRequiredMixin, ListView):
     
     def slist(request):
         template_name = "students/student_list.html"
-        return render(request, template_name , context={"students":Student.objects.all()})
+        return render_table(request, StudentTable(), template_name)
 
 def select_enquiry(request):
     enquiries = Enquiry.objects.filter(enquiry_status = "Following")
@@ -172,15 +103,11 @@ class StudentDetailView(LoginRequiredMixin, DetailView):
     model = Student
     template_name = "students/student_detail.html"
 
+    queryset = Student.objects.select_related("course")
+
     def get_context_data(self, **kwargs):
         context = super(StudentDetailView, self).get_context_data(**kwargs)
-        context['invoice'] = Invoice.objects.filter(student__id = self.object.id).first()
-        context["payments"] = Invoice.objects.filter(student=self.object)
-        context["booklog"] = Bookmodel.objects.filter(student=self.object)
-        context["classlog"] = Classmodel.objects.filter(student=self.object)
-        context["examlog"] = Exammodel.objects.filter(student=self.object)
-        context["certilog"] = Certificatemodel.objects.filter(student=self.object)
-        context['dues'] = Due.objects.all()
+        context.update(get_profile(self.object))
         return context
 
 @method_decorator(student_entry_resricted(),name='dispatch')
@@ -188,12 +115,13 @@ class StudentCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
     model = Student
     fields = "__all__"
     success_message = "New student successfully added."
+    allocate_enrol_no = False
+    # yymm followed by a running number; the counter continues from the old
+    # count based numbering the first time it is used
     def automatic_ro(self):
-            id = Student.objects.count()
-            year = str(datetime.datetime.now().year)[-2:]  # Last two digits of the current year
-            month = str(datetime.datetime.now().month).zfill(2)  # Month with leading zero if needed
-            object_id = str(id).zfill(4)  # Object ID with leading zeros if needed
-            return f'{year}{month}{object_id}'
+            return next_number("enrolment", ENROLMENT_TEMPLATE, seed=Student.objects.count)
+    def preview_ro(self):
+            return preview_number("enrolment", ENROLMENT_TEMPLATE, seed=Student.objects.count)
     def get(self, request, *args, **kwargs):
         # Stage 1: Select Enquiry
         if 'enquiry_id' not in kwargs:
@@ -238,6 +166,7 @@ class StudentCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
         #     del form.fields["password"]
         del form.fields["username"]
         del form.fields["password"]
+        enrol_no = None
         try:
             # If enquiry_id is provided, fetch the Enquiry instance
             if enquiry_id:
@@ -245,8 +174,10 @@ class StudentCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
                 
                 # Pre-fill the form fields based on the Enquiry instance
                 form.initial['student_name'] = enquiry_instance.name
-                form.initial['enrol_no'] = self.automatic_ro()
-                form.initial['username'] = self.automatic_ro()
+                # allocated when the form is saved, see form_valid
+                enrol_no = self.preview_ro()
+                form.initial['enrol_no'] = enrol_no
+                form.initial['username'] = enrol_no
                 form.initial['password'] = enquiry_instance.formatted_date_of_birth()
                 form.initial['date_of_birth'] = enquiry_instance.date_of_birth
                 form.initial['address'] = enquiry_instance.address
@@ -271,7 +202,9 @@ class StudentCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
             raise Http404("Enquiry does not exist")
 
        
-        return render(request, 'students/student_form.html', {'form': form, 'enquiry_id': enquiry_id, 'enquiry': enquiry})
+        return render(request, 'students/student_form.html', {
+            'form': form, 'enquiry_id': enquiry_id, 'enquiry': enquiry, 'suggested_enrol_no': enrol_no,
+        })
 
     def get_form(self, form_class=None):
         form = super().get_form(form_class)
@@ -303,7 +236,14 @@ class StudentCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
                         raise ValidationError("Username already exists.")
                     return username
 
-            form = StudentForm(request.POST,request.FILES)
+            data = request.POST.copy()
+            suggested = data.get('suggested_enrol_no')
+            if suggested and data.get('enrol_no') == suggested:
+                # the suggestion may be stale by now, a fresh number is
+                # taken from the counter on save
+                data['enrol_no'] = data['suggested_enrol_no'] = self.preview_ro()
+                self.allocate_enrol_no = True
+            form = StudentForm(data,request.FILES)
             del form.fields['user']
             if form.is_valid():
                 if 'passport' in request.FILES:
@@ -312,7 +252,10 @@ class StudentCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
             
 
 
-            return render(request, 'students/student_form.html', {'form': form, 'enquiry_id': enquiry_id, 'enquiry': enquiry})
+            return render(request, 'students/student_form.html', {
+                'form': form, 'enquiry_id': enquiry_id, 'enquiry': enquiry,
+                'suggested_enrol_no': data.get('suggested_enrol_no'),
+            })
 
     def form_valid(self, form):
         
@@ -320,17 +263,23 @@ class StudentCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
             if User.objects.filter(username=username).exists():
                 form.add_error('username', "Username already exists.")
                 return self.form_invalid(form)
-            # Additional logic after the form is valid
-            response = super().form_valid(form)
-            total_fee = form.cleaned_data.get('total_fee', 0)
-            invoice = Invoice.objects.create(
-            student=self.object, 
-            status = "Active",)
-            invoice_create = InvoiceItem.objects.create(
-            invoice = invoice,
-            description = "Total Fee",
-            amount = total_fee
-            )
+            with transaction.atomic():
+                if self.allocate_enrol_no:
+                    form.instance.enrol_no = int(self.automatic_ro())
+                else:
+                    # keep the counter ahead of a number typed in by hand
+                    claim_number("enrolment", form.instance.enrol_no, ENROLMENT_TEMPLATE, seed=Student.objects.count)
+                # Additional logic after the form is valid
+                response = super().form_valid(form)
+                total_fee = form.cleaned_data.get('total_fee', 0)
+                invoice = Invoice.objects.create(
+                student=self.object, 
+                status = "Active",)
+                invoice_create = InvoiceItem.objects.create(
+                invoice = invoice,
+                description = "Total Fee",
+                amount = total_fee
+                )
             objectcha = Enquiry.objects.filter(auto_increment=self.usefrfollow)
             for object1 in objectcha:
                 object1.enquiry_status = "Admitted"
@@ -380,12 +329,22 @@ class StudentDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("student-list")
 
 
-class StudentBulkUploadView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
+@method_decorator(student_entry_resricted(),name='dispatch')
+class StudentBulkUploadView(LoginRequiredMixin, CreateView):
     model = StudentBulkUpload
     template_name = "students/students_upload.html"
     fields = ["csv_file"]
-    success_url = "/student/list"
-    success_message = "Successfully uploaded students"
+
+    def get_success_url(self):
+        # back to the form with the import summary and error report link
+        return f"{reverse_lazy('student-upload')}?upload={self.object.pk}"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        upload = self.request.GET.get("upload")
+        if upload and upload.isdigit():
+            context["upload"] = StudentBulkUpload.objects.filter(pk=upload).first()
+        return context
 
 
 class DownloadCSVViewdownloadcsv(LoginRequiredMixin, View):
@@ -394,18 +353,7 @@ class DownloadCSVViewdownloadcsv(LoginRequiredMixin, View):
         response["Content-Disposition"] = 'attachment; filename="student_template.csv"'
 
         writer = csv.writer(response)
-        writer.writerow(
-            [
-                "registration_number",
-                "surname",
-                "firstname",
-                "other_names",
-                "gender",
-                "parent_number",
-                "address",
-                "current_class",
-            ]
-        )
+        writer.writerow(STUDENT_IMPORT_FIELDS)
 
         return response
 
@@ -622,29 +570,16 @@ class PublicView(PublicAccessMixin,DetailView):
     model = Student
     template_name = "public/indexs.html"
     login_url = None
+    queryset = Student.objects.select_related("course")
+
     def get_context_data(self, **kwargs):
         context = super(PublicView, self).get_context_data(**kwargs)
-        context["payments"] = Invoice.objects.filter(student=self.object)
-        context["booklog"] = Bookmodel.objects.filter(student=self.object)
-        context["classlog"] = Classmodel.objects.filter(student=self.object)
-        context["examlog"] = Exammodel.objects.filter(student=self.object)
-        context["certilog"] = Certificatemodel.objects.filter(student=self.object)
-        context["dues"] = Due.objects.filter(invoice__student=self.object)
+        context.update(get_profile(self.object))
         return context
     
     
 def attendance_test(request,**kwargs):
     student_id = kwargs.get('pk')
     student = Student.objects.get(id=student_id)
-    batches = BatchModel.objects.filter(batch_students__id=student.id)
-    manager = DashboardManager(db)
-    lab_manager = AttendanceManager(db)
-    lab_data = lab_manager.get_public_student_lab_data(student.enrol_no)
-    data = {}
-    for batch in batches:
-        x = manager.get_public_attendance(student.enrol_no,batch.id)
-        x.append(batch.batch_staff.username)
-        data[str(batch.batch_course)+"("+str(batch.batch_id)+")"] = x
-    #print(data)
-    
+    data, lab_data = get_public_attendance(student)
     return render(request, 'public/student_attendance.html', {'data':data,'object':student,"lab_data":lab_data})
\ No newline at end of file
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.0/ref/settings/
 """
 
 import os
+import sys
 import pymysql
 
 pymysql.version_info = (1,4,6,'final',0)
@@ -58,6 +59,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "apps.corecode.middleware.RequestTelemetry",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -73,7 +75,7 @@ ROOT_URLCONF = "csc_app.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "apps.corecode.telemetry.TimedDjangoTemplates",
         "DIRS": [
             os.path.join(BASE_DIR, "templates"),
         ],
@@ -133,6 +135,21 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Threads hashing passwords when accounts are created in bulk (student
+# imports); defaults to one per CPU
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 0)) or None
+
+# Processes drawing ID cards for a whole batch; defaults to one per CPU
+ID_CARD_WORKERS = int(os.environ.get("ID_CARD_WORKERS", 0)) or None
+
+# Printed in the QR code of ID cards, never taken from the request's Host
+# header; set it for deployments other than the production site
+SITE_URL = os.environ.get("SITE_URL", "https://vdm.csceducation.net")
+
+# SQLite FTS5 side index behind the global search box, kept in sync by the
+# signals in apps.corecode.signals; rebuild with `manage.py rebuild_search_index`
+SEARCH_INDEX_PATH = os.environ.get("SEARCH_INDEX_PATH", os.path.join(BASE_DIR, "search_index.sqlite3"))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.0/topics/i18n/
@@ -157,21 +174,42 @@ STATIC_URL = '/static/'
 
 MEDIA_URL = '/media/'
 
-if DEBUG:
-
-    STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
-else:
-
-    STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+# collectstatic output, served by WhiteNoise under content hashed names
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# How /media/ responses are sent once access is checked:
+#   "django"     the worker streams the file (development)
+#   "x-accel"    nginx, with `location /protected-media/ { internal; alias <MEDIA_ROOT>/; }`
+#   "x-sendfile" Apache mod_xsendfile or lighttpd
+# Behind nginx, serve /media/ directly with an alias and let only
+# apps.corecode.media.PROTECTED_MEDIA_PREFIXES reach Django.
+MEDIA_SERVING = os.environ.get("MEDIA_SERVING", "django")
+MEDIA_ACCEL_PREFIX = "/protected-media/"
+# photos and ID cards keep their names when regenerated, so no immutable caching
+MEDIA_CACHE_SECONDS = 60 * 60
+
 LOGIN_REDIRECT_URL = "/redirector" #before it was "/" now we redirect them to this view and further separate users and redirect according to their roles
 
 LOGOUT_REDIRECT_URL = "/"
 
 
+# Sessions slide their expiry on every request, but the store only writes an
+# unchanged session once per SESSION_REFRESH_INTERVAL seconds. Set
+# SESSION_STORE=cached_db to read sessions from the cache as well.
+SESSION_ENGINE = f"apps.corecode.sessions.{os.environ.get('SESSION_STORE', 'db')}"
+SESSION_REFRESH_INTERVAL = 5 * 60
+
+# Expired sessions are deleted outside requests by the scheduled
+# `manage.py clearsessions` job (see README). Setting this to a number of
+# seconds instead lets the first request that refreshes a session after that
+# long run the cleanup; only one worker runs it when the cache is Redis, as
+# the file cache's add() is not atomic.
+SESSION_CLEANUP_INTERVAL = int(os.environ.get("SESSION_CLEANUP_INTERVAL", 0)) or None
+
 SESSION_SAVE_EVERY_REQUEST = True
 
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
@@ -209,8 +247,65 @@ SESSION_COOKIE_AGE = 10800
 #    },
 #}
 #
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
-WHITENOISE_AUTOREFRESH = True
+# Requests slower than this are logged with their slowest SQL queries
+TELEMETRY_SLOW_REQUEST_MS = int(os.environ.get("TELEMETRY_SLOW_REQUEST_MS", 1000))
+TELEMETRY_SLOW_QUERY_COUNT = 5
+
+# Shared by every worker on the host so version bumps (billing config,
+# dashboards) are seen by all of them; set REDIS_URL to share across hosts
+REDIS_URL = os.environ.get("REDIS_URL")
+# test setUps clear the cache, which must never be the live shared one
+TESTING = len(sys.argv) > 1 and sys.argv[1] == "test" or os.path.basename(sys.argv[0]) in ("pytest", "py.test")
+if TESTING:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        "idcards": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "idcards",
+        },
+    }
+elif REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.path.join(BASE_DIR, "cache"),
+        }
+    }
+if not TESTING:
+    # rendered ID card PNGs, kept apart so a batch print never culls the
+    # small version keys of the default cache
+    CACHES["idcards"] = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(BASE_DIR, "cache-idcards"),
+        "TIMEOUT": 60 * 60 * 24 * 30,
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("ID_CARD_CACHE_ENTRIES", 5000))},
+    }
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    # hashed names from the manifest let WhiteNoise send far future,
+    # immutable cache headers; the manifest needs collectstatic, so
+    # development keeps plain names
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage"
+        if DEBUG
+        else "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+# files missing from the manifest fall back to their plain name
+WHITENOISE_MANIFEST_STRICT = False
+WHITENOISE_AUTOREFRESH = DEBUG
 
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 CSRF_TRUSTED_ORIGINS = ['https://vdm.csceducation.net']
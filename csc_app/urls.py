@@ -18,13 +18,12 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path,re_path
-from django.views.static import serve
 from apps.students import views
 from apps.corecode.views import logout_view,login_url
+from apps.corecode.media import serve_media
 handler404 = 'apps.students.views.handler404'
 urlpatterns = [
-    re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
-    re_path(r'^static/(?P<path>.*)$', serve, {'document_root': settings.STATIC_ROOT}),
+    re_path(r'^media/(?P<path>.*)$', serve_media, name='media'),
     path('login/<str:username>/<str:password>/', login_url, name='login_url'),
     path('admin/', admin.site.urls , name='admin'),
     path("accounts/", include("django.contrib.auth.urls")),